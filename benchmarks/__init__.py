@@ -0,0 +1,3 @@
+"""
+Compiler front-end benchmarks.
+"""
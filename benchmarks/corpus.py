@@ -0,0 +1,193 @@
+"""
+A seeded generator of synthetic Raccoon programs for benchmarking the compiler front-end.
+
+The programs are made of the kinds of code the front-end sees in practice: classes like
+`samples/class.ra`, functions with nested functions, comprehensions, control flow and deeply
+nested expressions. The same seed and line count always give the same program.
+"""
+
+import random
+
+
+class CorpusGenerator:
+    """
+    Generates Raccoon programs using a `random.Random` seeded with `seed`.
+    """
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        self.name_count = 0
+
+    def generate(self, lines):
+        """
+        Generates a program of at least *lines* lines. Code units are never cut in the middle, so
+        the program can be a few lines longer.
+        """
+        units = [
+            self.generate_class,
+            self.generate_nested_functions,
+            self.generate_comprehensions,
+            self.generate_control_flow,
+            self.generate_expressions,
+        ]
+        code_lines = []
+
+        while len(code_lines) < lines:
+            code_lines.extend(self.random.choice(units)())
+            code_lines.append("")
+
+        return "\n".join(code_lines) + "\n"
+
+    def new_name(self, prefix="name"):
+        self.name_count += 1
+        return f"{prefix}_{self.name_count}"
+
+    def generate_operand(self, names):
+        choice = self.random.random()
+
+        if choice < 0.5:
+            return self.random.choice(names)
+        elif choice < 0.8:
+            return str(self.random.randint(0, 1000))
+        elif choice < 0.9:
+            return f"{self.random.randint(0, 100)}.{self.random.randint(0, 99)}"
+        else:
+            return f"{self.random.choice(names)}.{self.random.choice(names)}"
+
+    def generate_expression(self, names, depth):
+        """
+        Generates a binary expression nested *depth* levels deep.
+        """
+        if depth == 0:
+            return self.generate_operand(names)
+
+        lhs = self.generate_expression(names, depth - 1)
+
+        # Raccoon's power operator only takes an integer exponent.
+        if self.random.random() < 0.1:
+            return f"({lhs} ^ {self.random.randint(2, 3)})"
+
+        operator = self.random.choice(["+", "-", "*", "/", "//", "%", "<<", ">>", "&", "|"])
+        rhs = self.generate_expression(names, self.random.randint(0, depth - 1))
+
+        return f"({lhs} {operator} {rhs})"
+
+    def generate_condition(self, names):
+        operator = self.random.choice(["<", ">", "==", "!=", "<=", ">=", "is", "in", "not in"])
+        condition = f"{self.random.choice(names)} {operator} {self.generate_operand(names)}"
+
+        if self.random.random() < 0.3:
+            condition += f" and {self.random.choice(names)}"
+
+        return condition
+
+    def generate_class(self):
+        class_name = self.new_name("Class").title()
+        fields = [self.new_name("field") for _ in range(self.random.randint(1, 4))]
+        lines = [
+            f"class {class_name}:",
+            '    """',
+            f"    Docstring of {class_name}.",
+            '    """',
+            "",
+            "    count = 0",
+            "",
+            f"    def __init__(self, {', '.join(fields)}):",
+        ]
+        lines.extend(f"        self.{field} = {field}" for field in fields)
+        lines.append(f"        {class_name}.count += 1")
+
+        for _ in range(self.random.randint(1, 3)):
+            method_name = self.new_name("method")
+            operands = [f"self.{field}" for field in fields] + ["other"]
+            lines.extend(
+                [
+                    "",
+                    f"    def {method_name}(self, other):",
+                    f"        result = {self.generate_expression(operands, 2)}",
+                    '        return f"{result} {self.' + fields[0] + '}"',
+                ]
+            )
+
+        lines.extend(
+            [
+                "",
+                "",
+                f"{class_name.lower()} = {class_name}({', '.join(repr(f) for f in fields)})",
+                f'print("{class_name} >", {class_name.lower()})',
+            ]
+        )
+
+        return lines
+
+    def generate_nested_functions(self):
+        outer_name = self.new_name("outer")
+        inner_name = self.new_name("inner")
+        params = [self.new_name("param") for _ in range(self.random.randint(1, 3))]
+
+        return [
+            f"def {outer_name}({', '.join(params)}):",
+            f"    def {inner_name}(value):",
+            f"        return value * {self.generate_expression(params, 2)}",
+            "",
+            f"    total = {inner_name}({params[0]})",
+            "    adder = lambda x: x + total",
+            f"    return adder({self.random.choice(params)})",
+            "",
+            f"{outer_name}({', '.join(str(self.random.randint(0, 9)) for _ in params)})",
+        ]
+
+    def generate_comprehensions(self):
+        names = [self.new_name("item") for _ in range(3)]
+        list_name, dict_name, set_name = (self.new_name("values") for _ in range(3))
+
+        return [
+            f"{list_name} = [{names[0]} * 2 for {names[0]} in range({self.random.randint(1, 100)})"
+            f" if {names[0]} % 2 == 0]",
+            f"{dict_name} = {{{names[1]}: {names[2]} for {names[1]}, {names[2]} in pairs}}",
+            f"{set_name} = {{{names[0]} for {names[0]} in {list_name}}}",
+            f"pairs = [[{names[0]}, {names[1]}] for {names[0]} in {list_name}]",
+            f"mapping = {{'a': {list_name}[0], 'b': [1, 2, 3], 'c': ({names[0]}, {names[1]})}}",
+            f"subset = {list_name}[1:{self.random.randint(2, 9)}]",
+        ]
+
+    def generate_control_flow(self):
+        names = [self.new_name("var") for _ in range(3)]
+        counter = self.new_name("counter")
+
+        return [
+            f"{counter} = 0",
+            f"for {names[0]} in range({self.random.randint(1, 100)}):",
+            f"    if {self.generate_condition(names)}:",
+            f"        {counter} += {self.generate_expression(names, 1)}",
+            f"    elif {self.generate_condition(names)}:",
+            f"        {counter} -= 1",
+            "    else:",
+            "        continue",
+            "",
+            f"while {counter} > 0:",
+            f"    {counter} = {counter} - 1 if {names[1]} else {counter} // 2",
+            f"    if {counter} == {self.random.randint(0, 9)}:",
+            "        break",
+        ]
+
+    def generate_expressions(self):
+        names = [self.new_name("operand") for _ in range(4)]
+        lines = []
+
+        for _ in range(self.random.randint(1, 4)):
+            target = self.new_name("result")
+            lines.append(f"{target} = {self.generate_expression(names, self.random.randint(3, 8))}")
+
+        lines.append(
+            f"print({names[0]}.method({names[1]}, 2.5, 'text', key={names[2]})[{names[3]}], *args)"
+        )
+
+        return lines
+
+
+def generate_program(lines, seed=0):
+    """
+    Returns a synthetic Raccoon program with at least *lines* lines.
+    """
+    return CorpusGenerator(seed).generate(lines)
@@ -0,0 +1,247 @@
+"""
+Benchmarks the compiler front-end on synthetic Raccoon programs.
+
+    python -m benchmarks.run --lines 1000 --lines 10000 --output results.json
+    python -m benchmarks.run --compare results.json
+
+For each program size it measures:
+    - Lexer throughput in tokens per second.
+    - Parser throughput in top-level statements per second and the number of results in the
+      parser's memo arrays.
+    - SemanticAnalyzer time.
+    - Peak memory of each stage, measured in a separate run with `tracemalloc` since tracing
+      slows everything down.
+
+Timings are the best of `--repeat` runs. The results are written as JSON so that a later run can
+be compared against them with `--compare`.
+"""
+
+import gc
+import json
+import platform
+import time
+import tracemalloc
+import click
+from compiler import CompilerOptions
+from compiler.lexer import Lexer
+from compiler.parser import Parser
+from compiler.parser.parser import NOT_MEMOIZED
+from compiler.semantic import SemanticAnalyzer
+from benchmarks.corpus import generate_program
+
+
+# Metrics where a bigger value is better. For the rest, a smaller value is better.
+THROUGHPUT_METRICS = ("lexer_tokens_per_second", "parser_statements_per_second")
+
+# Sizes of the program that only change with the corpus generator.
+PROGRAM_METRICS = ("lines", "tokens", "statements")
+
+
+def get_memo_size(parser):
+    """
+    Returns the number of results memoized by the parser.
+    """
+    return sum(
+        result is not NOT_MEMOIZED
+        for rule_memo in parser.memo
+        if rule_memo is not None
+        for result in rule_memo[0]
+    )
+
+
+def run_front_end(code, compiler_opts):
+    """
+    Runs the front-end stages on code once and returns their times and results.
+    """
+    start = time.perf_counter()
+    tokens = Lexer.create(code, compiler_opts).lex()
+    lexed = time.perf_counter()
+
+    parser = Parser(tokens, compiler_opts)
+    ast = parser.program()
+    parsed = time.perf_counter()
+    memo_size = get_memo_size(parser)
+
+    # Freeing the memo arrays is not part of semantic analysis.
+    parser.reset()
+    analysis_start = time.perf_counter()
+
+    SemanticAnalyzer(ast, tokens, compiler_opts).analyze()
+    analyzed = time.perf_counter()
+
+    return {
+        "tokens": len(tokens),
+        "statements": len(ast.statements),
+        "memo_size": memo_size,
+        "lexer_time": lexed - start,
+        "parser_time": parsed - lexed,
+        "semantic_time": analyzed - analysis_start,
+    }
+
+
+def trace_peak_memory(function, *args):
+    """
+    Calls function and returns its result with the peak memory in bytes it allocated.
+    """
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        result = function(*args)
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_peak_memory(code, compiler_opts):
+    """
+    Returns the peak memory in bytes allocated by each stage while lexing, parsing and analyzing
+    code.
+    """
+    tokens, lexer_peak = trace_peak_memory(Lexer.create(code, compiler_opts).lex)
+    parser = Parser(tokens, compiler_opts)
+    ast, parser_peak = trace_peak_memory(parser.program)
+    parser.reset()
+    _, semantic_peak = trace_peak_memory(SemanticAnalyzer(ast, tokens, compiler_opts).analyze)
+
+    return {
+        "lexer_peak_memory": lexer_peak,
+        "parser_peak_memory": parser_peak,
+        "semantic_peak_memory": semantic_peak,
+    }
+
+
+def benchmark(lines, seed, repeat, memory, compiler_opts):
+    code = generate_program(lines, seed)
+    runs = []
+
+    for _ in range(repeat):
+        gc.collect()
+        runs.append(run_front_end(code, compiler_opts))
+
+    best = {key: min(run[key] for run in runs) for key in runs[0]}
+    result = {
+        "lines": code.count("\n"),
+        "tokens": best["tokens"],
+        "statements": best["statements"],
+        "memo_size": best["memo_size"],
+        "lexer_time": best["lexer_time"],
+        "lexer_tokens_per_second": best["tokens"] / best["lexer_time"],
+        "parser_time": best["parser_time"],
+        "parser_statements_per_second": best["statements"] / best["parser_time"],
+        "semantic_time": best["semantic_time"],
+    }
+
+    if memory:
+        result.update(measure_peak_memory(code, compiler_opts))
+
+    return result
+
+
+def compare(results, old_results, threshold):
+    """
+    Prints how each metric changed from the old results and returns the regressions, the metrics
+    that got worse by more than *threshold*.
+    """
+    old_benchmarks = {benchmark["lines"]: benchmark for benchmark in old_results["benchmarks"]}
+    regressions = []
+
+    for benchmark in results["benchmarks"]:
+        old_benchmark = old_benchmarks.get(benchmark["lines"])
+
+        if old_benchmark is None:
+            continue
+
+        click.echo(f"\n{benchmark['lines']} lines:")
+
+        for metric, value in benchmark.items():
+            old_value = old_benchmark.get(metric)
+
+            if metric in PROGRAM_METRICS or not old_value:
+                continue
+
+            ratio = value / old_value
+            regressed = (
+                ratio < 1 - threshold if metric in THROUGHPUT_METRICS else ratio > 1 + threshold
+            )
+            click.echo(
+                f"    {metric:<32} {old_value:>14.6g} -> {value:>14.6g} ({ratio:.2f}x)"
+                + ("  REGRESSION" if regressed else "")
+            )
+
+            if regressed:
+                regressions.append((benchmark["lines"], metric))
+
+    return regressions
+
+
+@click.command()
+@click.option(
+    "--lines",
+    "-l",
+    "line_counts",
+    multiple=True,
+    type=int,
+    default=(1000, 10000),
+    show_default=True,
+    help="Lines of the generated program. Can be given more than once",
+)
+@click.option("--seed", default=0, show_default=True, help="Seed of the corpus generator")
+@click.option("--repeat", default=3, show_default=True, help="Runs to take the best time of")
+@click.option("--memory/--no-memory", default=True, show_default=True, help="Measure peak memory")
+@click.option("--regex-lexer", is_flag=True, help="Lexes code with the regex master-pattern engine")
+@click.option("--output", "-o", type=click.Path(), help="Writes the results to a JSON file")
+@click.option(
+    "--compare", "compare_path", type=click.Path(exists=True), help="Compares with old results"
+)
+@click.option(
+    "--threshold",
+    default=0.1,
+    show_default=True,
+    help="Relative change of a metric reported as a regression",
+)
+def app(line_counts, seed, repeat, memory, regex_lexer, output, compare_path, threshold):
+    """
+    python -m benchmarks.run --lines 1000 --output results.json
+    """
+    compiler_opts = CompilerOptions()
+
+    if regex_lexer:
+        compiler_opts.lexer_engine = "regex"
+
+    results = {
+        "python": platform.python_version(),
+        "seed": seed,
+        "lexer_engine": compiler_opts.lexer_engine,
+        "benchmarks": [],
+    }
+
+    for lines in line_counts:
+        result = benchmark(lines, seed, repeat, memory, compiler_opts)
+        results["benchmarks"].append(result)
+
+        click.echo(
+            f"{result['lines']} lines: "
+            f"lexer {result['lexer_tokens_per_second']:.0f} tokens/s, "
+            f"parser {result['parser_statements_per_second']:.0f} statements/s "
+            f"({result['memo_size']} memo entries), "
+            f"semantic {result['semantic_time']:.3f}s"
+        )
+
+    if output:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if compare_path:
+        with open(compare_path) as file:
+            old_results = json.load(file)
+
+        if old_results.get("seed") != seed:
+            click.echo(f"Warning: old results were generated with seed {old_results.get('seed')}")
+
+        if compare(results, old_results, threshold):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    app()
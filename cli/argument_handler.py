@@ -1,6 +1,7 @@
 """
 """
 import subprocess
+import mmap
 from os import path
 import click
 import json
@@ -9,9 +10,11 @@ from sys import argv
 from compiler import CompilerOptions
 from compiler.lexer import Lexer
 from compiler.parser import Parser
+from compiler.parser.parser import RULE_NAMES
+from compiler.parser.cache import parse_module
 from compiler.semantic import SemanticAnalyzer
 from compiler.codegen import LLVMCodegen
-from utils import json_dumps
+from compiler.serializer import JSONSerializer
 
 
 class ArgumentHandler:
@@ -21,13 +24,64 @@ class ArgumentHandler:
     """
 
     @staticmethod
-    def get_compiler_options():
+    def get_compiler_options(memo_profile=None):
         compiler_opts = CompilerOptions()
         if "-vv" in argv or "--verbose" in argv:
             compiler_opts.verbose = True
 
+        if "--regex-lexer" in argv:
+            compiler_opts.lexer_engine = "regex"
+
+        if "--parallel-lexer" in argv:
+            compiler_opts.lexer_jobs = 0
+
+        if "--parallel-parser" in argv:
+            compiler_opts.parser_jobs = 0
+
+        if "--ast-cache" in argv:
+            compiler_opts.ast_cache = True
+
+        if "--parser-stats" in argv:
+            compiler_opts.parser_stats = True
+
+        if memo_profile:
+            with open(memo_profile) as file:
+                compiler_opts.unmemoized_rules = json.load(file)["unmemoized_rules"]
+
         return compiler_opts
 
+    @staticmethod
+    def parse(parser):
+        """
+        Parses a program and prints the statistics of the parser rules if they are recorded,
+        followed by a memo profile that leaves out the rules with a low hit rate.
+        """
+
+        ast = parser.parse()
+
+        if parser.stats is not None:
+            unmemoized_rules = parser.unmemoized_rules.union(
+                parser.stats.get_unprofitable_rules(RULE_NAMES)
+            )
+            click.echo(parser.stats.format(RULE_NAMES), err=True)
+            click.echo(json.dumps({"unmemoized_rules": sorted(unmemoized_rules)}), err=True)
+
+        return ast
+
+    @staticmethod
+    def lex_and_parse(code, compiler_opts, file_path=None):
+        """
+        Returns the tokens and the AST of code, from the .ram cache file of the source file at
+        `file_path` if `compiler_opts.ast_cache` is set.
+        """
+
+        if file_path is not None and compiler_opts.ast_cache:
+            ast, tokens = parse_module(file_path, code, compiler_opts)
+            return tokens, ast
+
+        tokens = Lexer.create(code, compiler_opts).lex_buffer()
+        return tokens, ArgumentHandler.parse(Parser(tokens, compiler_opts))
+
     @staticmethod
     def get_output_type():
         supported_output_types = [
@@ -50,7 +104,13 @@ class ArgumentHandler:
         return last_supported_output_types_in_args
 
     @staticmethod
-    def compile_code(code, output_type="exe", compiler_opts=CompilerOptions()):
+    def compile_code(
+        code,
+        output_type="exe",
+        compiler_opts=None,
+        json_format="indent",
+        file_path=None,
+    ):
         """
         supported_output_types = [
             "exe",
@@ -61,48 +121,63 @@ class ArgumentHandler:
             "lowered_ast",
             "tokens",
         ]
+
+        Tokens, ASTs and semantic information are written out by a `JSONSerializer` in
+        `json_format`, which is "indent", "compact" or "ndjson". `file_path` is the source file
+        of code, if any, whose .ram cache file is used if `compiler_opts.ast_cache` is set.
         """
 
+        compiler_opts = compiler_opts or CompilerOptions()
+        serializer = JSONSerializer(json_format=json_format)
+
         if output_type == "tokens":
-            tokens = Lexer(code, compiler_opts).lex()
-            result = json_dumps(tokens)
+            # Tokens are written out as they get lexed instead of being collected first.
+            serializer.write_iter(Lexer.create(code, compiler_opts).iter_tokens())
 
         elif output_type == "ast":
-            ast = Parser.from_code(code, compiler_opts).parse()
-            result = json_dumps(ast)
+            if file_path is not None and compiler_opts.ast_cache:
+                ast = parse_module(file_path, code, compiler_opts)[0]
+            else:
+                ast = ArgumentHandler.parse(Parser.from_code(code, compiler_opts))
+
+            serializer.write(ast)
 
         elif output_type == "sema":
-            tokens = Lexer(code, compiler_opts).lex()
-            ast = Parser(tokens, compiler_opts).parse()
+            tokens, ast = ArgumentHandler.lex_and_parse(code, compiler_opts, file_path)
             semantic_info = SemanticAnalyzer(ast, tokens, compiler_opts).analyze()
-            result = json_dumps(semantic_info)
+            serializer.write(semantic_info)
 
         elif output_type == "ll":
             compiler_opts.target_code = "llvm"
-            tokens = Lexer(code, compiler_opts).lex()
-            ast = Parser(tokens, compiler_opts).parse()
+            tokens, ast = ArgumentHandler.lex_and_parse(code, compiler_opts, file_path)
             semantic_info = SemanticAnalyzer(ast, tokens, compiler_opts).analyze()
             llvm = LLVMCodegen(ast, semantic_info).generate()
-            result = llvm.dumps()
+            click.echo(llvm.dumps())
 
         elif output_type == "wasm":
             compiler_opts.target_code = "wasm"
-            tokens = Lexer(code, compiler_opts).lex()
-            ast = Parser(tokens, compiler_opts).parse()
+            tokens, ast = ArgumentHandler.lex_and_parse(code, compiler_opts, file_path)
             semantic_info = SemanticAnalyzer(ast, tokens, compiler_opts).analyze()
-            result = json_dumps(semantic_info)
+            serializer.write(semantic_info)
 
         else:
             click.echo("Unimplemented Output Type!")
-            return
-
-        click.echo(result)
 
     @staticmethod
-    def compile_file(file_path, output_type="exe", compiler_opts=CompilerOptions()):
-        # Raccoon only supports UTF-8 encoded source files.
-        with open(file_path, mode="r", encoding="utf-8") as f:
-            ArgumentHandler.compile_code(f.read(), output_type, compiler_opts)
+    def compile_file(file_path, output_type="exe", compiler_opts=None, json_format="indent"):
+        # Raccoon only supports UTF-8 encoded source files. The file is memory-mapped and lexed as
+        # bytes, so it never has to be decoded as a whole.
+        with open(file_path, mode="rb") as f:
+            if path.getsize(file_path) == 0:  # Empty files cannot be memory-mapped.
+                ArgumentHandler.compile_code(
+                    b"", output_type, compiler_opts, json_format, file_path
+                )
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as code:
+                ArgumentHandler.compile_code(
+                    code, output_type, compiler_opts, json_format, file_path
+                )
 
     @staticmethod
     def run_compiled_file(file_path):
@@ -8,6 +8,7 @@ TODO:
 
 import click
 from argument_handler import ArgumentHandler
+from compiler import __version__
 
 
 @click.command(options_metavar="[options]")
@@ -24,32 +25,78 @@ from argument_handler import ArgumentHandler
 @click.option("--ast", is_flag=True, help="Prints AST")
 @click.option("--tokens", is_flag=True, help="Prints lexer tokens")
 @click.option("--sema", is_flag=True, help="Prints semantic information")
+@click.option(
+    "--json-format",
+    type=click.Choice(["indent", "compact", "ndjson"]),
+    default="indent",
+    help="Format of the tokens, AST and semantic information. NDJSON writes a line per item",
+)
 @click.option("--ll", is_flag=True, help="Prints LLVM IR")
 @click.option("--wasm", is_flag=True, help="Prints Webassembly code")
 @click.option(
     "-vv", "--verbose", is_flag=True, help="Prints debug information"
 )
+@click.option(
+    "--regex-lexer", is_flag=True, help="Lexes code with the regex master-pattern engine"
+)
+@click.option(
+    "--parallel-lexer", is_flag=True, help="Lexes large code in a process per core"
+)
+@click.option(
+    "--parallel-parser", is_flag=True, help="Parses large code in a process per core"
+)
+@click.option(
+    "--ast-cache", is_flag=True, help="Reuses the ASTs of unchanged files from .ram cache files"
+)
+@click.option(
+    "--parser-stats",
+    is_flag=True,
+    help="Prints calls, memo hits and backtracks of each parser rule, and a memo profile",
+)
+@click.option(
+    "--memo-profile",
+    type=click.Path(exists=True),
+    help="JSON file with the parser rules not to memoize. An empty list memoizes all rules",
+    metavar="<file>",
+)
 @click.argument(
     "program_file", nargs=1, required=False, type=click.Path(), metavar="[program file]"
 )
-def app(version, program_file, compile_string, ast, tokens, sema, ll, wasm, verbose):
+def app(
+    version,
+    program_file,
+    compile_string,
+    ast,
+    tokens,
+    sema,
+    json_format,
+    ll,
+    wasm,
+    verbose,
+    regex_lexer,
+    parallel_lexer,
+    parallel_parser,
+    ast_cache,
+    parser_stats,
+    memo_profile,
+):
     """
     raccoon.py test.ra --ast
     """
     ctx = click.get_current_context()
 
     if version:
-        click.echo("Raccoon 0.0.1")
+        click.echo(f"Raccoon {__version__}")
 
     elif program_file:
         output_type = ArgumentHandler.get_output_type()
-        compiler_opts = ArgumentHandler.get_compiler_options()
-        ArgumentHandler.compile_file(program_file, output_type, compiler_opts)
+        compiler_opts = ArgumentHandler.get_compiler_options(memo_profile)
+        ArgumentHandler.compile_file(program_file, output_type, compiler_opts, json_format)
 
     elif compile_string:
         output_type = ArgumentHandler.get_output_type()
-        compiler_opts = ArgumentHandler.get_compiler_options()
-        ArgumentHandler.compile_code(compile_string, output_type, compiler_opts)
+        compiler_opts = ArgumentHandler.get_compiler_options(memo_profile)
+        ArgumentHandler.compile_code(compile_string, output_type, compiler_opts, json_format)
 
     else:
         click.echo(ctx.get_help())
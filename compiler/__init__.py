@@ -1,3 +1,6 @@
+__version__ = "0.0.1"
+
 from .options import CompilerOptions
+from .interner import Interner
 from .visitor import Visitor
 from .ast import ast
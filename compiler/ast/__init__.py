@@ -1 +1,2 @@
 from .ast import *
+from .arena import ASTArena
@@ -0,0 +1,299 @@
+"""
+A flat representation of an AST, with its nodes in `array` columns instead of Python objects.
+"""
+
+import marshal
+from array import array
+from enum import Enum
+from compiler.ast.ast import (
+    AST_CLASSES,
+    AST_CLASS_IDS,
+    AST_ENUM_CLASSES,
+    ENUM_CLASS_IDS,
+    TOKEN_INDEX_FIELDS,
+    LazyList,
+)
+
+# The tags of the items a field is stored as.
+CHILD_ITEM = 0
+LIST_ITEM = 1
+TUPLE_ITEM = 2
+INT_ITEM = 3
+NONE_ITEM = 4
+FALSE_ITEM = 5
+TRUE_ITEM = 6
+ENUM_ITEM = 7
+CONSTANT_ITEM = 8
+
+# The columns of an arena and their array type codes.
+COLUMNS = (
+    ("kinds", "H"),
+    ("parents", "i"),
+    ("token_indices", "i"),
+    ("ends", "I"),
+    ("child_starts", "I"),
+    ("children", "I"),
+    ("item_starts", "I"),
+    ("item_tags", "B"),
+    ("item_values", "q"),
+)
+
+
+class ASTArena:
+    """
+    Holds the nodes of an AST in `array` columns, numbered in pre-order from 0 for the root.
+
+    Each node has a kind, which is the index of its class in `AST_CLASSES`, its parent or -1, its
+    token index or -1 if it does not refer to a token, and the end of its subtree. Since nodes are
+    numbered in pre-order, the nodes of the subtree of a node are the ones from it to its end, so
+    a pass over a whole program is a loop over a range. The children of a node are the AST nodes
+    in its fields, in the order of `iter_children`.
+
+    The fields of a node are kept as items, a tag and a value each, so that the arena can be
+    turned back into the object AST. A child is an item with its position among the children of
+    the node, and a list or tuple is an item with its length, followed by the items of its
+    elements. Values that are not ints, None, bools or enums are kept in `constants`.
+
+        arena = ASTArena.from_ast(program)
+
+        for node in arena.find(Function):
+            name = arena.get_field(node, "name")
+            print(tokens[arena.token_indices[name]].data)
+
+    The columns can be turned into bytes with `to_bytes` and shared with other processes, where
+    `from_bytes` reads them back without copying them.
+    """
+
+    def __init__(self):
+        for name, type_code in COLUMNS:
+            setattr(self, name, array(type_code))
+
+        self.constants = []
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @staticmethod
+    def from_ast(ast):
+        """
+        Creates an arena from an object AST.
+        """
+
+        arena = ASTArena()
+        kinds, parents, token_indices = arena.kinds, arena.parents, arena.token_indices
+        child_starts, children, item_starts = arena.child_starts, arena.children, arena.item_starts
+        stack = [(ast, -1, -1)]
+
+        # Children are numbered when they are visited, so their places among the children of
+        # their parent are filled in then.
+        while stack:
+            value, parent, child_place = stack.pop()
+            node = len(kinds)
+            node_class = type(value)
+
+            if child_place >= 0:
+                children[child_place] = node
+
+            token_index_fields = TOKEN_INDEX_FIELDS.get(node_class)
+            token_index = getattr(value, token_index_fields[0]) if token_index_fields else None
+
+            kinds.append(AST_CLASS_IDS[node_class])
+            parents.append(parent)
+            token_indices.append(-1 if token_index is None else token_index)
+            item_starts.append(len(arena.item_tags))
+            child_starts.append(len(children))
+
+            node_children = []
+
+            for field in node_class.__slots__:
+                arena.add_item(getattr(value, field), node_children)
+
+            first_place = len(children)
+            children.extend([0] * len(node_children))
+            stack.extend(
+                (node_children[place], node, first_place + place)
+                for place in reversed(range(len(node_children)))
+            )
+
+        item_starts.append(len(arena.item_tags))
+        child_starts.append(len(children))
+
+        # The subtree of a node ends where the subtree of its last child ends.
+        ends = arena.ends = array("I", bytes(4 * len(kinds)))
+
+        for node in reversed(range(len(kinds))):
+            last_place = child_starts[node + 1] - 1
+            has_children = last_place >= child_starts[node]
+            ends[node] = ends[children[last_place]] if has_children else node + 1
+
+        return arena
+
+    def add_item(self, value, node_children):
+        """
+        Adds the items of a field value, and adds the AST nodes in it to node_children.
+        """
+
+        value_type = type(value)
+
+        if value_type in AST_CLASS_IDS:
+            tag, item_value = CHILD_ITEM, len(node_children)
+            node_children.append(value)
+        elif value_type == list or value_type == tuple or isinstance(value, LazyList):
+            tag, item_value = (TUPLE_ITEM if value_type == tuple else LIST_ITEM), len(value)
+        elif value is None:
+            tag, item_value = NONE_ITEM, 0
+        elif value_type == bool:
+            tag, item_value = (TRUE_ITEM if value else FALSE_ITEM), 0
+        elif value_type == int:
+            tag, item_value = INT_ITEM, value
+        elif isinstance(value, Enum):
+            tag, item_value = ENUM_ITEM, (ENUM_CLASS_IDS[value_type] << 32) | value.value
+        else:
+            tag, item_value = CONSTANT_ITEM, len(self.constants)
+            self.constants.append(value)
+
+        self.item_tags.append(tag)
+        self.item_values.append(item_value)
+
+        if tag == LIST_ITEM or tag == TUPLE_ITEM:
+            for element in value:
+                self.add_item(element, node_children)
+
+    def read_item(self, position, node_children):
+        """
+        Returns the value of the item at position, with node_children for its children, and the
+        position after it.
+        """
+
+        tag = self.item_tags[position]
+        item_value = self.item_values[position]
+        position += 1
+
+        if tag == CHILD_ITEM:
+            return node_children[item_value], position
+
+        if tag == LIST_ITEM or tag == TUPLE_ITEM:
+            elements = []
+
+            for _ in range(item_value):
+                element, position = self.read_item(position, node_children)
+                elements.append(element)
+
+            return (elements if tag == LIST_ITEM else tuple(elements)), position
+
+        if tag == INT_ITEM:
+            return item_value, position
+
+        if tag == ENUM_ITEM:
+            return AST_ENUM_CLASSES[item_value >> 32](item_value & 0xFFFFFFFF), position
+
+        if tag == CONSTANT_ITEM:
+            return self.constants[item_value], position
+
+        return (None, False, True)[tag - NONE_ITEM], position
+
+    def get_class(self, node):
+        return AST_CLASSES[self.kinds[node]]
+
+    def get_children(self, node):
+        """
+        Returns the children of a node.
+        """
+
+        return self.children[self.child_starts[node] : self.child_starts[node + 1]]
+
+    def walk(self, node=0):
+        """
+        Returns the nodes of the subtree of a node in pre-order, as a range.
+        """
+
+        return range(node, self.ends[node])
+
+    def find(self, node_class, node=0):
+        """
+        Returns the nodes of a class in the subtree of a node, in pre-order.
+        """
+
+        kinds = self.kinds
+        kind = AST_CLASS_IDS[node_class]
+        return [found for found in range(node, self.ends[node]) if kinds[found] == kind]
+
+    def get_fields(self, node):
+        """
+        Returns the fields of a node as a dict, with the nodes of the arena for its children.
+        """
+
+        node_class = AST_CLASSES[self.kinds[node]]
+        node_children = self.get_children(node)
+        position = self.item_starts[node]
+        fields = {}
+
+        for field in node_class.__slots__:
+            fields[field], position = self.read_item(position, node_children)
+
+        return fields
+
+    def get_field(self, node, field):
+        return self.get_fields(node)[field]
+
+    def to_ast(self, node=0):
+        """
+        Returns the subtree of a node as an object AST.
+        """
+
+        children, child_starts = self.children, self.child_starts
+        objects = {}
+
+        # Nodes come after their ancestors, so the children of a node are built before it.
+        for current in reversed(self.walk(node)):
+            node_class = AST_CLASSES[self.kinds[current]]
+            value = node_class.__new__(node_class)
+            node_children = [
+                objects.pop(child)
+                for child in children[child_starts[current] : child_starts[current + 1]]
+            ]
+            position = self.item_starts[current]
+
+            for field in node_class.__slots__:
+                item, position = self.read_item(position, node_children)
+                setattr(value, field, item)
+
+            objects[current] = value
+
+        return objects[node]
+
+    def to_bytes(self):
+        """
+        Returns the columns and constants of the arena as bytes for `from_bytes`.
+        """
+
+        columns = [getattr(self, name).tobytes() for name, _ in COLUMNS]
+        # Columns are padded to 8 bytes, so that they can be read in place with their item sizes.
+        columns = [column + bytes(-len(column) % 8) for column in columns]
+        header = marshal.dumps(
+            ([len(getattr(self, name)) for name, _ in COLUMNS], self.constants)
+        )
+        header += bytes(-len(header) % 8)
+
+        return b"".join([len(header).to_bytes(8, "little"), header, *columns])
+
+    @staticmethod
+    def from_bytes(data):
+        """
+        Creates an arena from the bytes `to_bytes` gives, or any buffer holding them like shared
+        memory. The columns are memoryviews of data instead of copies.
+        """
+
+        data = memoryview(data)
+        header_size = int.from_bytes(data[:8], "little")
+        lengths, constants = marshal.loads(data[8 : 8 + header_size])
+        arena = ASTArena()
+        arena.constants = constants
+        position = 8 + header_size
+
+        for (name, type_code), length in zip(COLUMNS, lengths):
+            size = length * array(type_code).itemsize
+            setattr(arena, name, data[position : position + size].cast(type_code))
+            position += size + -size % 8
+
+        return arena
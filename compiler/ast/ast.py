@@ -2,6 +2,7 @@
 Contains classes that describe Raccoon's Abstract Syntax Tree.
 """
 import json
+from collections.abc import Sequence
 from copy import deepcopy
 from enum import Enum
 
@@ -128,21 +129,101 @@ class ComprehensionType(Enum):
     SET = 3
 
 
+class LazyList(Sequence):
+    """
+    A list field whose items are loaded with `load_item` when they are first accessed, like the
+    statements of a program read from a .ram cache file. Traversals of ASTs go through it like
+    they go through a list.
+    """
+
+    def __init__(self, length):
+        self.items = [None] * length
+
+    def load_item(self, index):
+        raise NotImplementedError
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if type(index) == slice:
+            return [self[i] for i in range(*index.indices(len(self.items)))]
+
+        if index < 0:
+            index += len(self.items)
+
+        item = self.items[index]
+
+        if item is None:
+            item = self.items[index] = self.load_item(index)
+
+        return item
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Sequence)
+            and len(self) == len(other)
+            and all(a == b for a, b in zip(self, other))
+        )
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __deepcopy__(self, memo):
+        return deepcopy(list(self), memo)
+
+
 class AST:
     """
     We really only need our AST classes to inherit from this one class. We don't need a
     complicated type hierarchy since the Parser already ensures a StatementExpr can't be
     passed where an ExprAST is expected, for example.
+
+    Each AST class lists its fields in `__slots__`, in the order its `__init__` sets them, so
+    that its nodes have no `__dict__`. Equality, repr and `iter_children` go through those fields.
+
+    `structural_hash` is not a field, it caches the hash `compiler.ast.hashing` gives a node.
     """
 
+    __slots__ = ("structural_hash",)
+
+    def get_fields(self):
+        """
+        Returns the fields of the node as a dict, in the order of `__slots__`.
+        """
+
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def iter_children(self):
+        """
+        Yields the AST nodes in the fields of the node, including the ones in lists and tuples,
+        in the order of `__slots__`.
+        """
+
+        stack = [getattr(self, field) for field in reversed(self.__slots__)]
+
+        while stack:
+            value = stack.pop()
+
+            if isinstance(value, AST):
+                yield value
+            elif type(value) in (list, tuple) or isinstance(value, LazyList):
+                stack.extend(reversed(value))
+
     def __repr__(self):
-        fields = deepcopy(vars(self))
+        fields = deepcopy(self.get_fields())
         fields['kind'] = type(self).__name__
         string = ", ".join([f"{repr(key)}: {repr(val)}" for key, val in fields.items()])
         return "{" + string + "}"
 
     def __eq__(self, other):
-        return vars(self) == vars(other) if isinstance(other, AST) else None
+        if not isinstance(other, AST):
+            return None
+
+        fields = self.__slots__
+        return fields == other.__slots__ and all(
+            getattr(self, field) == getattr(other, field) for field in fields
+        )
 
     def accept_on_children(self, visitor):
         pass
@@ -164,76 +245,104 @@ class Null(AST):
     `None` which would require a logic like this: `self.expr or self.expr.accept(visitor)`.
     """
 
-    pass
+    __slots__ = ()
 
 
 class Newline(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class Indent(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class Dedent(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class Identifier(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class Integer(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class Float(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class ImagInteger(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class ImagFloat(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class String(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class StringList(AST):
+    __slots__ = ("strings",)
+
     def __init__(self, strings):
         self.strings = strings
 
 
 class ByteString(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class PrefixedString(AST):
+    __slots__ = ("index",)
+
     def __init__(self, index):
         self.index = index
 
 
 class Operator(AST):
+    __slots__ = ("op", "rem_op")
+
     def __init__(self, op, rem_op=None):
         self.op = op
         self.rem_op = rem_op  # For when operator spans two tokens like `not in`
 
 
 class UnaryExpr(AST):
+    __slots__ = ("expr", "op")
+
     def __init__(self, expr, op):
         self.expr = expr
         self.op = op
@@ -244,6 +353,8 @@ class UnaryExpr(AST):
 
 
 class BinaryExpr(AST):
+    __slots__ = ("lhs", "op", "rhs")
+
     def __init__(self, lhs, op, rhs):
         self.lhs = lhs
         self.op = op
@@ -256,6 +367,8 @@ class BinaryExpr(AST):
 
 
 class FuncParam(AST):
+    __slots__ = ("name", "type_annotation", "default_value_expr")
+
     def __init__(self, name, type_annotation=Null(), default_value_expr=Null()):
         self.name = name
         self.type_annotation = type_annotation
@@ -268,6 +381,14 @@ class FuncParam(AST):
 
 
 class FuncParams(AST):
+    __slots__ = (
+        "params",
+        "positional_only_params",
+        "tuple_rest_param",
+        "keyword_only_params",
+        "named_tuple_rest_param",
+    )
+
     def __init__(
         self,
         params,
@@ -290,6 +411,16 @@ class FuncParams(AST):
 
 
 class Function(AST):
+    __slots__ = (
+        "name",
+        "body",
+        "params",
+        "return_type_annotation",
+        "generics_annotation",
+        "is_async",
+        "decorators",
+    )
+
     def __init__(
         self,
         name,
@@ -318,6 +449,8 @@ class Function(AST):
 
 
 class TupleRestExpr(AST):
+    __slots__ = ("expr",)
+
     def __init__(self, expr):
         self.expr = expr
 
@@ -326,6 +459,8 @@ class TupleRestExpr(AST):
 
 
 class NamedTupleRestExpr(AST):
+    __slots__ = ("expr",)
+
     def __init__(self, expr):
         self.expr = expr
 
@@ -334,6 +469,17 @@ class NamedTupleRestExpr(AST):
 
 
 class Comprehension(AST):
+    __slots__ = (
+        "expr",
+        "key_expr",
+        "var_expr",
+        "iterable_expr",
+        "comprehension_type",
+        "for_if_expr",
+        "is_async",
+        "nested_comprehension",
+    )
+
     def __init__(
         self,
         expr,
@@ -364,6 +510,8 @@ class Comprehension(AST):
 
 
 class Yield(AST):
+    __slots__ = ("exprs", "is_yield_from")
+
     def __init__(self, exprs, is_yield_from=False):
         self.exprs = exprs
         self.is_yield_from = is_yield_from
@@ -373,6 +521,8 @@ class Yield(AST):
 
 
 class Dict(AST):
+    __slots__ = ("key_value_pairs",)
+
     def __init__(self, key_value_pairs=[]):
         self.key_value_pairs = key_value_pairs
 
@@ -383,6 +533,8 @@ class Dict(AST):
 
 
 class Set(AST):
+    __slots__ = ("exprs",)
+
     def __init__(self, exprs=[]):
         self.exprs = exprs
 
@@ -391,6 +543,8 @@ class Set(AST):
 
 
 class List(AST):
+    __slots__ = ("exprs",)
+
     def __init__(self, exprs=[]):
         self.exprs = exprs
 
@@ -399,6 +553,8 @@ class List(AST):
 
 
 class Tuple(AST):
+    __slots__ = ("exprs",)
+
     def __init__(self, exprs=[]):
         self.exprs = exprs
 
@@ -407,6 +563,8 @@ class Tuple(AST):
 
 
 class SubscriptIndex(AST):
+    __slots__ = ("from_expr", "skip_expr", "to_expr")
+
     def __init__(self, from_expr=Null(), skip_expr=Null(), to_expr=Null()):
         self.from_expr = from_expr
         self.skip_expr = skip_expr
@@ -419,6 +577,8 @@ class SubscriptIndex(AST):
 
 
 class Subscript(AST):
+    __slots__ = ("expr", "indices")
+
     def __init__(self, expr, indices):
         self.expr = expr
         self.indices = indices
@@ -429,6 +589,8 @@ class Subscript(AST):
 
 
 class Call(AST):
+    __slots__ = ("expr", "arguments")
+
     def __init__(self, expr, arguments):
         self.expr = expr
         self.arguments = arguments
@@ -439,6 +601,8 @@ class Call(AST):
 
 
 class Field(AST):
+    __slots__ = ("expr", "field")
+
     def __init__(self, expr, field):
         self.expr = expr
         self.field = field
@@ -448,15 +612,19 @@ class Field(AST):
 
 
 class Bool(AST):
+    __slots__ = ("is_true",)
+
     def __init__(self, is_true):
         self.is_true = is_true
 
 
 class NoneLiteral(AST):
-    pass
+    __slots__ = ()
 
 
 class Argument(AST):
+    __slots__ = ("expr", "name")
+
     def __init__(self, expr, name=Null()):
         self.expr = expr
         self.name = name
@@ -467,6 +635,8 @@ class Argument(AST):
 
 
 class AwaitedExpr(AST):
+    __slots__ = ("expr",)
+
     def __init__(self, expr):
         self.expr = expr
 
@@ -475,6 +645,8 @@ class AwaitedExpr(AST):
 
 
 class WithArgument(AST):
+    __slots__ = ("expr", "name")
+
     def __init__(self, expr, name=Null()):
         self.expr = expr
         self.name = name
@@ -485,6 +657,8 @@ class WithArgument(AST):
 
 
 class WithStatement(AST):
+    __slots__ = ("arguments", "body", "is_async")
+
     def __init__(self, arguments, body, is_async=False):
         self.arguments = arguments
         self.body = body
@@ -496,6 +670,8 @@ class WithStatement(AST):
 
 
 class Except(AST):
+    __slots__ = ("argument", "name", "body")
+
     def __init__(self, argument, name, body):
         self.argument = argument
         self.name = name
@@ -508,6 +684,8 @@ class Except(AST):
 
 
 class TryStatement(AST):
+    __slots__ = ("try_body", "except_clauses", "else_body", "finally_body")
+
     def __init__(self, try_body, except_clauses=[], else_body=[], finally_body=[]):
         self.try_body = try_body
         self.except_clauses = except_clauses
@@ -522,6 +700,8 @@ class TryStatement(AST):
 
 
 class ForStatement(AST):
+    __slots__ = ("var_expr", "iterable_expr", "body", "else_body", "for_if_expr", "is_async")
+
     def __init__(
         self,
         var_expr,
@@ -547,6 +727,8 @@ class ForStatement(AST):
 
 
 class WhileStatement(AST):
+    __slots__ = ("cond_expr", "body", "else_body", "for_if_expr")
+
     def __init__(self, cond_expr, body, else_body=[], for_if_expr=Null()):
         self.cond_expr = cond_expr
         self.body = body
@@ -561,6 +743,8 @@ class WhileStatement(AST):
 
 
 class Elif(AST):
+    __slots__ = ("cond_expr", "body")
+
     def __init__(self, cond_expr, body):
         self.cond_expr = cond_expr
         self.body = body
@@ -571,6 +755,8 @@ class Elif(AST):
 
 
 class IfStatement(AST):
+    __slots__ = ("cond_expr", "if_body", "elifs", "else_body")
+
     def __init__(self, cond_expr, if_body, elifs=[], else_body=Null()):
         self.cond_expr = cond_expr
         self.if_body = if_body
@@ -585,6 +771,8 @@ class IfStatement(AST):
 
 
 class IfExpr(AST):
+    __slots__ = ("if_expr", "cond_expr", "else_expr")
+
     def __init__(self, if_expr, cond_expr, else_expr):
         self.if_expr = if_expr
         self.cond_expr = cond_expr
@@ -597,6 +785,8 @@ class IfExpr(AST):
 
 
 class NamedExpression(AST):
+    __slots__ = ("name", "expr")
+
     def __init__(self, name, expr):
         self.name = name
         self.expr = expr
@@ -607,6 +797,8 @@ class NamedExpression(AST):
 
 
 class GenericType(AST):
+    __slots__ = ("generic_type", "specialization_types")
+
     def __init__(self, generic_type, specialization_types):
         self.generic_type = generic_type
         self.specialization_types = specialization_types
@@ -617,6 +809,8 @@ class GenericType(AST):
 
 
 class FunctionType(AST):
+    __slots__ = ("return_type", "param_types")
+
     def __init__(self, return_type, param_types=[]):
         self.return_type = return_type
         self.param_types = param_types
@@ -627,6 +821,8 @@ class FunctionType(AST):
 
 
 class ListType(AST):
+    __slots__ = ("types",)
+
     def __init__(self, types):
         self.types = types
 
@@ -635,6 +831,8 @@ class ListType(AST):
 
 
 class TupleType(AST):
+    __slots__ = ("types",)
+
     def __init__(self, types):
         self.types = types
 
@@ -643,6 +841,8 @@ class TupleType(AST):
 
 
 class Type(AST):
+    __slots__ = ("type",)
+
     def __init__(self, type):
         self.type = type
 
@@ -651,6 +851,8 @@ class Type(AST):
 
 
 class IntersectionType(AST):
+    __slots__ = ("types",)
+
     def __init__(self, types):
         self.types = types
 
@@ -659,6 +861,8 @@ class IntersectionType(AST):
 
 
 class UnionType(AST):
+    __slots__ = ("types",)
+
     def __init__(self, types):
         self.types = types
 
@@ -667,6 +871,8 @@ class UnionType(AST):
 
 
 class GenericsAnnotation(AST):
+    __slots__ = ("types",)
+
     def __init__(self, types):
         self.types = types
 
@@ -675,6 +881,8 @@ class GenericsAnnotation(AST):
 
 
 class Class(AST):
+    __slots__ = ("name", "body", "parent_classes", "generics_annotation", "decorators")
+
     def __init__(
         self, name, body, parent_classes=[], generics_annotation=Null(), decorators=[]
     ):
@@ -693,6 +901,8 @@ class Class(AST):
 
 
 class ListLHS(AST):
+    __slots__ = ("exprs",)
+
     def __init__(self, exprs):
         self.exprs = exprs
 
@@ -701,6 +911,8 @@ class ListLHS(AST):
 
 
 class TupleLHS(AST):
+    __slots__ = ("exprs",)
+
     def __init__(self, exprs):
         self.exprs = exprs
 
@@ -709,6 +921,8 @@ class TupleLHS(AST):
 
 
 class Globals(AST):
+    __slots__ = ("names",)
+
     def __init__(self, names):
         self.names = names
 
@@ -717,6 +931,8 @@ class Globals(AST):
 
 
 class NonLocals(AST):
+    __slots__ = ("names",)
+
     def __init__(self, names):
         self.names = names
 
@@ -725,6 +941,8 @@ class NonLocals(AST):
 
 
 class AssertStatement(AST):
+    __slots__ = ("cond_expr", "message_expr")
+
     def __init__(self, cond_expr, message_expr=Null()):
         self.cond_expr = cond_expr
         self.message_expr = message_expr
@@ -735,18 +953,20 @@ class AssertStatement(AST):
 
 
 class PassStatement(AST):
-    pass
+    __slots__ = ()
 
 
 class BreakStatement(AST):
-    pass
+    __slots__ = ()
 
 
 class ContinueStatement(AST):
-    pass
+    __slots__ = ()
 
 
 class ReturnStatement(AST):
+    __slots__ = ("exprs",)
+
     def __init__(self, exprs=[]):
         self.exprs = exprs
 
@@ -758,6 +978,8 @@ class ReturnStatement(AST):
 
 
 class RaiseStatement(AST):
+    __slots__ = ("expr", "from_expr")
+
     def __init__(self, expr=Null(), from_expr=Null()):
         self.expr = expr
         self.from_expr = from_expr
@@ -768,6 +990,8 @@ class RaiseStatement(AST):
 
 
 class AssignmentStatement(AST):
+    __slots__ = ("lhses", "assignment_op", "value_expr", "type_annotation")
+
     def __init__(self, lhses, assignment_op, value_expr, type_annotation=Null()):
         self.lhses = lhses
         self.assignment_op = assignment_op
@@ -781,6 +1005,8 @@ class AssignmentStatement(AST):
 
 
 class MainPath(AST):
+    __slots__ = ("path_names", "relative_level", "alias")
+
     def __init__(self, path_names, alias=None, relative_level=0):
         self.path_names = path_names
         self.relative_level = relative_level
@@ -792,6 +1018,8 @@ class MainPath(AST):
 
 
 class SubPath(AST):
+    __slots__ = ("is_import_all", "path_names", "alias")
+
     def __init__(self, path_names, alias=None, is_import_all=False):
         self.is_import_all = is_import_all
         self.path_names = path_names
@@ -803,6 +1031,8 @@ class SubPath(AST):
 
 
 class ImportStatement(AST):
+    __slots__ = ("main_path", "sub_paths")
+
     def __init__(self, main_path, sub_paths):
         self.main_path = main_path
         self.sub_paths = sub_paths
@@ -813,6 +1043,8 @@ class ImportStatement(AST):
 
 
 class Decorator(AST):
+    __slots__ = ("path_names", "arguments")
+
     def __init__(self, path_names, arguments):
         self.path_names = path_names
         self.arguments = arguments
@@ -823,8 +1055,69 @@ class Decorator(AST):
 
 
 class Program(AST):
+    __slots__ = ("statements",)
+
     def __init__(self, statements=[]):
         self.statements = statements
 
     def accept_on_children(self, visitor):
         [statement.accept(visitor) for statement in self.statements]
+
+
+# The AST classes and the enums their fields use, in a fixed order that gives them IDs in the
+# binary and flat encodings of ASTs.
+AST_CLASSES = tuple(
+    value
+    for value in list(globals().values())
+    if isinstance(value, type) and issubclass(value, AST) and value is not AST
+)
+AST_ENUM_CLASSES = (BinaryOpKind, UnaryOpKind, ComprehensionType)
+
+AST_CLASS_IDS = {node_class: class_id for class_id, node_class in enumerate(AST_CLASSES)}
+
+ENUM_CLASS_IDS = {enum_class: enum_id for enum_id, enum_class in enumerate(AST_ENUM_CLASSES)}
+
+# Fields that hold token indices.
+TOKEN_INDEX_FIELDS = {
+    Newline: ("index",),
+    Indent: ("index",),
+    Dedent: ("index",),
+    Identifier: ("index",),
+    Integer: ("index",),
+    Float: ("index",),
+    ImagInteger: ("index",),
+    ImagFloat: ("index",),
+    String: ("index",),
+    ByteString: ("index",),
+    PrefixedString: ("index",),
+    Operator: ("op", "rem_op"),
+}
+
+
+def shift_token_indices(ast, offset):
+    """
+    Adds offset to the token indices in an AST, so that it can be reused for the same tokens at
+    another position of the token stream. The AST is changed in place.
+
+    Memoized parser results can be in an AST more than once, so each node is only shifted once.
+    """
+
+    stack = [ast]
+    shifted = set()
+
+    while stack:
+        value = stack.pop()
+
+        if type(value) in (list, tuple) or isinstance(value, LazyList):
+            stack.extend(value)
+        elif (fields := TOKEN_INDEX_FIELDS.get(type(value))) is not None:
+            if id(value) in shifted:
+                continue
+
+            shifted.add(id(value))
+
+            for field in fields:
+                if (index := getattr(value, field)) is not None:
+                    setattr(value, field, index + offset)
+        elif isinstance(value, AST):
+            stack.extend(getattr(value, field) for field in value.__slots__)
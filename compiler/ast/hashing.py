@@ -0,0 +1,80 @@
+"""
+Structural hashing of ASTs.
+
+The structural hash of a node is computed from its class, the data of its tokens and the
+structural hashes of its children, and not from token indices. So two nodes have the same hash if
+they are written the same, wherever they are in a program, and a node keeps its hash when the code
+before it changes. That makes hashes keys for caching compiled functions and classes, and for
+telling which top-level statements changed between two versions of a program.
+
+Hashes are 16-byte BLAKE2 digests, which stay the same across processes and builds unlike
+`hash()` of strings. They are cached on nodes in `structural_hash`, so a node must not change once
+it is hashed.
+"""
+
+from hashlib import blake2b
+from compiler.ast.ast import TOKEN_INDEX_FIELDS, LazyList
+from compiler.visitor import DispatchVisitor
+
+
+def get_structural_hash(ast, tokens):
+    """
+    Returns the structural hash of an AST whose nodes refer to tokens, hashing the nodes that are
+    not hashed yet.
+    """
+
+    if (structural_hash := getattr(ast, "structural_hash", None)) is None:
+        StructuralHasher(tokens).walk(ast)
+        structural_hash = ast.structural_hash
+
+    return structural_hash
+
+
+class StructuralHasher(DispatchVisitor):
+    """
+    Hashes the nodes of an AST bottom-up, skipping the subtrees that are already hashed.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def start_visit(self):
+        pass
+
+    def enter(self, ast):
+        return getattr(ast, "structural_hash", None) is None
+
+    def leave(self, ast):
+        node_class = type(ast)
+        token_fields = TOKEN_INDEX_FIELDS.get(node_class, ())
+        digest = blake2b(node_class.__name__.encode(), digest_size=16)
+
+        for field in node_class.__slots__:
+            value = getattr(ast, field)
+
+            if field in token_fields:
+                data = b"" if value is None else self.tokens[value].data.encode()
+                digest.update(b"t%d:" % len(data))
+                digest.update(data)
+            else:
+                self.update(digest, value)
+
+        ast.structural_hash = digest.digest()
+
+    def update(self, digest, value):
+        """
+        Adds a field value to a digest.
+        """
+
+        if (structural_hash := getattr(value, "structural_hash", None)) is not None:
+            digest.update(b"n")
+            digest.update(structural_hash)
+        elif type(value) == list or type(value) == tuple or isinstance(value, LazyList):
+            digest.update(b"l%d:" % len(value))
+
+            for item in value:
+                self.update(digest, item)
+        else:
+            data = repr(value).encode()
+            digest.update(b"v%d:" % len(data))
+            digest.update(data)
@@ -0,0 +1,59 @@
+"""
+Interning of identifier names into small integer symbol IDs.
+
+The lexer interns every identifier it produces, so that later stages can compare and hash the
+integer IDs carried by identifier tokens instead of their strings. Since symbol IDs are only
+meaningful within the intern table that gave them, every stage of a compilation must use the same
+table. Each `CompilerOptions` has a table of its own, so the stages of a compilation are given the
+same compiler options, and IDs do not depend on what other compilations have interned before.
+`SemanticInfo.get_symbol` interns the names of tokens lexed with other options again.
+"""
+
+
+class Interner:
+    """
+    Gives each distinct name a small integer ID, in the order names are first seen.
+
+        interner = Interner()
+        interner.intern("foo")  # 0
+        interner.intern("bar")  # 1
+        interner.intern("foo")  # 0
+        interner.get_name(1)  # "bar"
+
+    The table is just a list of names, so it is cheap to serialize and to send to another process,
+    where `Interner(names)` recreates it with the same IDs.
+    """
+
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+
+        for name in names:
+            self.intern(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __repr__(self):
+        return f"Interner({self.names})"
+
+    def intern(self, name):
+        """
+        Returns the ID of name, giving it a new ID if it has none yet.
+        """
+        symbol = self.ids.get(name)
+
+        if symbol is None:
+            symbol = self.ids[name] = len(self.names)
+            self.names.append(name)
+
+        return symbol
+
+    def get_name(self, symbol):
+        """
+        Returns the name with the ID *symbol*.
+        """
+        return self.names[symbol]
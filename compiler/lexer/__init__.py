@@ -1,2 +1,6 @@
 from .lexer import Lexer
 from .lexer import TokenKind
+from .stream import TokenStream
+from .buffer import TokenBuffer
+from .incremental import IncrementalLexer
+from .parallel import ParallelLexer
@@ -0,0 +1,168 @@
+"""
+A compact, column-oriented store for the tokens of a source code.
+"""
+
+import re
+from array import array
+from compiler.lexer.lexer import Token, TokenKind
+
+
+NEWLINE_PATTERN = re.compile(r"\r\n?|\n")
+
+TOKEN_KINDS = tuple(TokenKind)
+
+STRING_KINDS = frozenset(
+    (
+        TokenKind.STRING.value,
+        TokenKind.BYTE_STRING.value,
+        TokenKind.PREFIXED_STRING.value,
+    )
+)
+
+
+class TokenBuffer:
+    """
+    Holds tokens in `array` columns instead of a list of `Token` objects.
+
+    Each token takes a kind byte, a row, a column, a symbol ID or -1 if it is not an identifier,
+    and the start and end offsets of its data in the source code. Token data is sliced from the
+    source code when it is accessed. The few tokens whose data cannot be sliced from the source
+    code, like an imaginary number `5im` or the `*` inserted in a coefficient expression `2x`,
+    keep their data in `overrides`.
+
+    Indexing a buffer creates a `Token`, so `tokens[i].data` style access still works for the
+    `Parser`.
+
+    The source code can also be UTF-8 encoded bytes, like a memory-mapped file. The offsets are
+    then byte offsets given by the lexer through `append_span` and token data gets decoded when it
+    is accessed.
+    """
+
+    def __init__(self, code):
+        self.code = code
+        self.kinds = array("B")
+        self.rows = array("I")
+        self.columns = array("i")
+        self.symbols = array("i")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.overrides = {}
+        self.is_bytes = not isinstance(code, str)
+        self.line_starts = (
+            None
+            if self.is_bytes
+            else [0] + [match.end() for match in NEWLINE_PATTERN.finditer(code)]
+        )
+
+    @staticmethod
+    def from_tokens(code, tokens):
+        """
+        Creates a buffer from tokens lexed from code. `tokens` can be any iterable of tokens, like
+        `Lexer.iter_tokens()`, which means the `Token` objects do not have to be in memory at the
+        same time.
+        """
+
+        buffer = TokenBuffer(code)
+        append = buffer.append
+
+        for token in tokens:
+            append(token)
+
+        return buffer
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if type(index) == slice:
+            return [self[i] for i in range(*index.indices(len(self.kinds)))]
+
+        if index < 0:
+            index += len(self.kinds)
+
+        symbol = self.symbols[index]
+
+        return Token(
+            self.get_data(index),
+            TOKEN_KINDS[self.kinds[index]],
+            self.rows[index],
+            self.columns[index],
+            symbol if symbol > -1 else None,
+        )
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"TokenBuffer({list(self)})"
+
+    def append(self, token):
+        """
+        Adds a token to the buffer.
+
+        The token's end offset is derived from its row and column, since column is the position of
+        the token's last character. String tokens do not include their closing quotes, so their
+        data is looked for right before the quotes.
+        """
+
+        code = self.code
+        data = token.data
+        kind = token.kind.value
+        length = len(data)
+        end = self.line_starts[token.row] + token.column + 1
+        start = end - length
+
+        if kind in STRING_KINDS and not code.startswith(data, start, end):
+            # Skip the closing quotes of a short or long string.
+            for quote_length in (1, 3):
+                if code.startswith(data, start - quote_length, end - quote_length):
+                    start, end = start - quote_length, end - quote_length
+                    break
+
+        if start < 0 or not code.startswith(data, start, end):
+            self.overrides[len(self.kinds)] = data
+            start = end = max(end, 0)
+
+        self.append_columns(token, start, end)
+
+    def append_span(self, token, start, end):
+        """
+        Adds a token whose data is known to be at offsets *start* to *end* of the source code,
+        unless it is an override.
+        """
+
+        data = token.data
+        source = self.code[start:end]
+
+        if (source.decode("utf-8") if self.is_bytes else source) != data:
+            self.overrides[len(self.kinds)] = data
+            start = end
+
+        self.append_columns(token, start, end)
+
+    def append_columns(self, token, start, end):
+        self.kinds.append(token.kind.value)
+        self.rows.append(token.row)
+        self.columns.append(token.column)
+        self.symbols.append(-1 if token.symbol is None else token.symbol)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def get_data(self, index):
+        """
+        Returns the data of the token at index.
+        """
+
+        data = self.overrides.get(index)
+
+        if data is None:
+            data = self.code[self.starts[index] : self.ends[index]]
+
+            if self.is_bytes:
+                return data.decode("utf-8")
+
+        return data
@@ -0,0 +1,318 @@
+"""
+A lexer engine that works directly on UTF-8 encoded bytes, like a memory-mapped source file.
+
+It matches tokens with a bytes version of the regex engine's master pattern, so the source code
+never has to be decoded as a whole. Only the data of the tokens it produces is decoded. Anything
+the pattern does not match, like floats, non-ASCII identifiers and operators or invalid
+characters, is lexed by a `Lexer` over a decoded slice of the current line.
+
+Rows and columns are the same as the ones `Lexer` gives for the decoded code. Since the bytes are
+not read through Python's universal newlines mode, `\r\n` and `\r` line endings in long strings
+are turned into `\n` here, as reading the file as text did.
+"""
+
+import re
+from compiler.lexer.lexer import Lexer, Token, TokenKind
+from compiler.lexer.regex_lexer import (
+    MASTER_PATTERN,
+    COEFFICIENT_PREV_CHARS,
+    DELIMITER_OPERATORS,
+)
+from compiler.lexer.valid import is_keyword
+
+
+# Non-ASCII operators are left to the fallback so that every match ends at a character boundary.
+# Long strings may have `\r` line endings, which are translated when the token is made.
+BYTE_MASTER_PATTERN = re.compile(
+    MASTER_PATTERN.pattern.replace("²√", "")
+    .replace(r"[^'\\\r]|'(?!'')", r"[^'\\]|'(?!'')")
+    .replace(r'[^"\\\r]|"(?!"")', r'[^"\\]|"(?!"")')
+    .encode("ascii"),
+    re.VERBOSE,
+)
+
+# The most characters `Lexer` peeks at after its cursor.
+LOOKAHEAD_LENGTH = 5
+
+
+def translate_newlines(text):
+    """
+    Returns text with its `\r\n` and `\r` line endings turned into `\n`, like Python's universal
+    newlines mode does when a file is read as text.
+    """
+    if "\r" in text:
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    return text
+
+
+class ByteLexer(Lexer):
+    """
+    Tokenizes UTF-8 encoded bytes like `Lexer` tokenizes a string.
+
+    `Lexer.create` selects it when the code is not a `str`. The cursor is a byte offset into the
+    code, while row and column count characters.
+    """
+
+    def eat_char(self):
+        """
+        Same as `Lexer.eat_char`. Only used for ASCII characters by the `Lexer` methods shared with
+        this lexer.
+        """
+        if self.cursor + 1 < self.code_length:
+            self.cursor += 1
+            self.column += 1
+            char = chr(self.code[self.cursor])
+
+            # Register row if character is a newline
+            if char == "\r":
+                if self.code[self.cursor + 1 : self.cursor + 2] == b"\n":
+                    self.cursor += 1
+                self.column = -1
+                self.row += 1
+
+            elif char == "\n":
+                self.column = -1
+                self.row += 1
+
+            return char
+
+        return None
+
+    def peek_char(self, offset=1):
+        """
+        Peeks at the next byte in code as a character. A non-ASCII byte is never equal to the ASCII
+        characters that the shared `Lexer` methods compare it with.
+        """
+        if -1 < self.cursor + offset < self.code_length:
+            return chr(self.code[self.cursor + offset])
+
+        return None
+
+    def lex_buffer(self):
+        """ Breaks code into tokens stored in a `TokenBuffer` with byte offsets """
+        from compiler.lexer.buffer import TokenBuffer
+
+        buffer = TokenBuffer(self.code)
+        append_span = buffer.append_span
+
+        for token, start, end in self.iter_token_spans():
+            append_span(token, start, end)
+
+        return buffer
+
+    def iter_tokens(self):
+        for token, start, end in self.iter_token_spans():
+            yield token
+
+    def iter_token_spans(self):
+        """
+        Breaks code into tokens, yielding each token with the start and end byte offsets of the
+        source it was lexed from.
+        """
+        code = self.code
+        code_length = self.code_length
+        match = BYTE_MASTER_PATTERN.match
+        tokens = []
+        spans = []
+        append = tokens.append
+        intern = self.interner.intern
+        cursor, row, column = self.cursor, self.row, self.column
+
+        while cursor + 1 < code_length:
+            position = cursor + 1
+            start, end = position, None
+            result = match(code, position)
+            group = result.lastgroup if result else None
+
+            if group == "name":
+                """
+                ========= IDENTIFIER | KEYWORD | OPERATOR | IMAGINARY =========
+                """
+                token = result.group().decode("ascii")
+                cursor = result.end() - 1
+                token_kind = TokenKind.KEYWORD if is_keyword(token) else TokenKind.IDENTIFIER
+                prev_char = chr(code[position - 1]) if position > 0 else None
+
+                if prev_char in COEFFICIENT_PREV_CHARS:
+                    self.cursor, self.row, self.column = cursor, row, cursor - position + column + 1
+                    token, token_kind = self.lex_coefficient(
+                        token, token_kind, prev_char, (row, column), tokens
+                    )
+
+                column += cursor - position + 1
+                symbol = intern(token) if token_kind == TokenKind.IDENTIFIER else None
+                append(Token(token, token_kind, row, column, symbol))
+
+            elif group == "space":
+                cursor = result.end() - 1
+                column += cursor - position + 1
+
+            elif group == "comment":
+                comment = result.group()
+                cursor = result.end() - 1
+                column += len(comment) if comment.isascii() else len(comment.decode("utf-8"))
+
+            elif group == "operator":
+                token = result.group().decode("ascii")
+                cursor = result.end() - 1
+                column += cursor - position + 1
+                token_kind = (
+                    TokenKind.DELIMITER if token in DELIMITER_OPERATORS else TokenKind.OPERATOR
+                )
+                append(Token(token, token_kind, row, column))
+
+            elif group == "delimiter":
+                cursor = position
+                column += 1
+                append(Token(chr(code[position]), TokenKind.DELIMITER, row, column))
+
+            elif group == "newline":
+                """
+                ========= NEWLINE | INDENT | DEDENT =========
+                """
+                indentation = result.group().lstrip(b"\r\n").decode("ascii")
+                space_count = len(indentation)
+                prev_space = indentation[-1:]
+
+                cursor = result.end() - 1
+                row += 1
+                column = space_count - 1
+                start = end = cursor + 1
+
+                self.cursor, self.row, self.column = cursor, row, column
+                self.lex_indentation(
+                    space_count, indentation != prev_space * space_count, prev_space, tokens
+                )
+
+            elif group == "bracket":
+                self.cursor, self.row, self.column = position, row, column + 1
+                self.lex_delimiter(chr(code[position]), tokens)
+                cursor, row, column = self.cursor, self.row, self.column
+
+            elif group == "integer":
+                token = result.group().decode("ascii")
+                cursor = result.end() - 1
+                column += cursor - position + 1
+                append(Token(token, TokenKind.DEC_INTEGER, row, column))
+
+            elif group == "string":
+                token = result.group()[1:-1].decode("utf-8")
+                cursor = result.end() - 1
+                column += len(token) + 2
+                start, end = position + 1, cursor
+                append(Token(token, TokenKind.STRING, row, column))
+
+            elif group == "long_string":
+                token = translate_newlines(result.group()[3:-3].decode("utf-8"))
+                cursor = result.end() - 1
+                last_newline = token.rfind("\n")
+
+                if last_newline < 0:
+                    column += len(token) + 6
+                else:
+                    row += token.count("\n")
+                    column = len(token) - last_newline + 1
+
+                start, end = position + 3, cursor - 2
+                append(Token(token, TokenKind.STRING, row, column))
+
+            else:
+                cursor, row, column = self.lex_decoded(position, row, column, tokens)
+
+            # Tokens added in this iteration get the span of the bytes consumed, without the
+            # quotes of strings.
+            if end is None:
+                end = cursor + 1
+
+            if len(spans) < len(tokens):
+                spans.extend([(start, end)] * (len(tokens) - len(spans)))
+
+            # Release all tokens except the last one which can still be mutated.
+            if len(tokens) > 1:
+                last_token, last_span = tokens.pop(), spans.pop()
+
+                for token, (start, end) in zip(tokens, spans):
+                    yield token, start, end
+
+                tokens.clear()
+                spans.clear()
+                append(last_token)
+                spans.append(last_span)
+
+        self.cursor, self.row, self.column = cursor, row, column
+
+        # Checking possible dedents at the end of code
+        prev_indent = self.indentations[-1].indentation_count
+        if prev_indent > 0:
+            for i in range(prev_indent // self.indent_factor):
+                tokens.append(Token('', TokenKind.DEDENT, *self.get_line_info()))
+                spans.append((code_length, code_length))
+
+        for token, (start, end) in zip(tokens, spans):
+            yield token, start, end
+
+    def lex_decoded(self, position, row, column, tokens):
+        """
+        Lexes the token at byte *position* with a `Lexer` over the decoded rest of the line and the
+        next line, and returns the new cursor, row and column.
+
+        The decoded slice starts two characters before the token because `Lexer` looks back at
+        previous characters. `Lexer` also peeks a few characters ahead, so if it gets close to the
+        end of the slice or fails, the token may continue further and it is lexed again over a
+        slice twice as long. Line endings of the slice are translated, so strings get the same
+        data as when the file is read as text.
+        """
+        code = self.code
+        code_length = self.code_length
+        start = position
+
+        for i in range(2):
+            if start > 0:
+                start -= 1
+
+                while start > 0 and 0x80 <= code[start] < 0xC0:
+                    start -= 1
+
+        prefix_length = len(translate_newlines(code[start:position].decode("utf-8")))
+        end = code.find(b"\n", position)
+        end = code_length if end < 0 else code.find(b"\n", end + 1) + 1 or code_length
+
+        while True:
+            decoded = code[start:end].decode("utf-8")
+            text = translate_newlines(decoded)
+            lexer = Lexer(text, self.compiler_opts)
+            lexer.cursor = prefix_length - 1
+            lexer.row, lexer.column = row, column
+            lexer.indentations = self.indentations
+            lexer.indent_factor = self.indent_factor
+            lexer.is_in_brackets = self.is_in_brackets
+            lexer.indent_space_type = self.indent_space_type
+            new_tokens = tokens[-1:]
+
+            try:
+                lexer.lex_char(lexer.eat_char(), new_tokens)
+            except Exception:
+                if end >= code_length:
+                    raise
+            else:
+                if end >= code_length or lexer.cursor + LOOKAHEAD_LENGTH < len(text):
+                    break
+
+            end = code.find(b"\n", min(end + 2 * (end - position), code_length)) + 1 or code_length
+
+        tokens[-1:] = new_tokens
+        self.indent_factor = lexer.indent_factor
+        self.is_in_brackets = lexer.is_in_brackets
+        self.indent_space_type = lexer.indent_space_type
+        # Each `\r\n` before the cursor is one character longer in the decoded slice.
+        length = lexer.cursor + 1
+        crlf_position = decoded.find("\r\n") if text is not decoded else -1
+
+        while -1 < crlf_position < length:
+            length += 1
+            crlf_position = decoded.find("\r\n", crlf_position + 2)
+
+        cursor = start + len(decoded[:length].encode("utf-8")) - 1
+
+        return cursor, lexer.row, lexer.column
@@ -0,0 +1,107 @@
+"""
+Generates `compiler/lexer/unicode_ranges.py`, the non-ASCII identifier ranges `valid` bisects, from
+the Unicode version of `unicodedata`.
+
+Run `python -m compiler.lexer.generate_unicode_ranges` after upgrading to a Python with a newer
+Unicode version.
+"""
+
+import unicodedata
+from pathlib import Path
+import click
+
+# https://unicode.org/reports/tr31/#Default_Identifier_Syntax
+IDENTIFIER_START_CATEGORIES = frozenset(("Lu", "Ll", "Lt", "Lm", "Lo", "Nl"))
+
+IDENTIFIER_CONTINUATION_CATEGORIES = IDENTIFIER_START_CATEGORIES | {"Mn", "Mc", "Nd", "Pc"}
+
+
+def add_to_ranges(codepoint, ranges):
+    """
+    Adds a codepoint to sorted start and end codepoints of ranges, extending the last range if
+    the codepoint follows it.
+    """
+
+    starts, ends = ranges
+
+    if ends and ends[-1] == codepoint - 1:
+        ends[-1] = codepoint
+    else:
+        starts.append(codepoint)
+        ends.append(codepoint)
+
+
+def create_unicode_identifier_ranges():
+    """
+    Returns the sorted start and end codepoints of the non-ASCII identifier start ranges and
+    identifier continuation ranges of the Unicode version of `unicodedata`.
+    """
+
+    start_ranges = ([], [])
+    continuation_ranges = ([], [])
+
+    for codepoint in range(128, 0x110000):
+        category = unicodedata.category(chr(codepoint))
+
+        if category in IDENTIFIER_CONTINUATION_CATEGORIES:
+            add_to_ranges(codepoint, continuation_ranges)
+
+            if category in IDENTIFIER_START_CATEGORIES:
+                add_to_ranges(codepoint, start_ranges)
+
+    return start_ranges, continuation_ranges
+
+
+def generate_unicode_ranges_module():
+    """
+    Returns the code of `compiler/lexer/unicode_ranges.py`.
+    """
+
+    start_ranges, continuation_ranges = create_unicode_identifier_ranges()
+    lines = [
+        '"""',
+        "Sorted start and end codepoints of the non-ASCII identifier ranges, generated by",
+        "`python -m compiler.lexer.generate_unicode_ranges` from `unicodedata`. Do not edit.",
+        '"""',
+        "",
+        f'UNICODE_VERSION = "{unicodedata.unidata_version}"',
+    ]
+
+    for name, ranges in (
+        ("IDENTIFIER_START_RANGES", start_ranges),
+        ("IDENTIFIER_CONTINUATION_RANGES", continuation_ranges),
+    ):
+        lines += ["", f"{name} = ("]
+
+        for codepoints in ranges:
+            lines.append("    (")
+            line = "       "
+
+            for codepoint in codepoints:
+                item = f" {codepoint:#x},"
+
+                if len(line) + len(item) > 100:
+                    lines.append(line)
+                    line = "       "
+
+                line += item
+
+            lines += [line, "    ),"]
+
+        lines.append(")")
+
+    return "\n".join(lines) + "\n"
+
+
+@click.command()
+def main():
+    """
+    Writes the Unicode identifier ranges of the Unicode version of `unicodedata` to
+    `compiler/lexer/unicode_ranges.py`.
+    """
+
+    Path(__file__).with_name("unicode_ranges.py").write_text(generate_unicode_ranges_module())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Incremental lexing of code that changes a little at a time, like code in an editor.
+
+`IncrementalLexer` remembers a checkpoint of the lexer state at the start of every top-level line.
+When code is edited, it resumes lexing from the last checkpoint before the edit and stops as soon
+as it reaches a checkpoint after the edit whose state matches the one recorded for the old code.
+From there the rest of the old tokens are reused with their rows shifted.
+"""
+
+from compiler.errors import LexerError
+from compiler.options import CompilerOptions
+from compiler.lexer.lexer import Lexer, Token, TokenKind, Indentation
+
+
+class Checkpoint:
+    """
+    The state of the lexer right after the newline and indentation at the start of a top-level
+    line have been lexed.
+
+    Outside brackets, the lexer state is fully described by the cursor position, the indentation
+    count of the current line, the indent factor and indent space kind. `token_index` is the number
+    of tokens lexed before the line's content.
+    """
+
+    def __init__(
+        self, token_index, cursor, row, column, indentation_count, indent_factor, indent_space_type
+    ):
+        self.token_index = token_index
+        self.cursor = cursor
+        self.row = row
+        self.column = column
+        self.indentation_count = indentation_count
+        self.indent_factor = indent_factor
+        self.indent_space_type = indent_space_type
+
+    def __repr__(self):
+        return (
+            f"Checkpoint(token_index={self.token_index}, cursor={self.cursor}, row={self.row}"
+            f", column={self.column}, indentation_count={self.indentation_count}"
+            f", indent_factor={self.indent_factor}, indent_space_type={self.indent_space_type})"
+        )
+
+    @staticmethod
+    def from_lexer(lexer, token_index):
+        return Checkpoint(
+            token_index,
+            lexer.cursor,
+            lexer.row,
+            lexer.column,
+            lexer.indentations[-1].indentation_count,
+            lexer.indent_factor,
+            lexer.indent_space_type,
+        )
+
+    def has_same_state(self, other):
+        """
+        Checks if lexing the same code from both checkpoints gives the same tokens.
+        """
+        return (
+            self.column == other.column
+            and self.indentation_count == other.indentation_count
+            and self.indent_factor == other.indent_factor
+            and self.indent_space_type == other.indent_space_type
+        )
+
+    def shift(self, token_delta, cursor_delta, row_delta):
+        return Checkpoint(
+            self.token_index + token_delta,
+            self.cursor + cursor_delta,
+            self.row + row_delta,
+            self.column,
+            self.indentation_count,
+            self.indent_factor,
+            self.indent_space_type,
+        )
+
+    def restore(self, lexer):
+        """
+        Puts lexer in the state of this checkpoint.
+        """
+        lexer.cursor = self.cursor
+        lexer.row = self.row
+        lexer.column = self.column
+        lexer.indentations = [Indentation(start_indentation_count=self.indentation_count)]
+        lexer.indent_factor = self.indent_factor
+        lexer.is_in_brackets = False
+        lexer.indent_space_type = self.indent_space_type
+
+
+class IncrementalLexer:
+    """
+    Keeps the tokens of a code up to date as the code gets edited.
+
+        lexer = IncrementalLexer(code)
+        tokens = lexer.lex()
+        tokens = lexer.edit(offset, removed_length, inserted_text)
+
+    The tokens are the same as the ones `Lexer` gives for the edited code. If lexing the edited
+    code fails, the `LexerError` is raised and the next edit lexes the whole code again.
+    """
+
+    def __init__(self, code, compiler_opts=None):
+        compiler_opts = compiler_opts or CompilerOptions()
+        self.code = code
+        self.compiler_opts = compiler_opts
+        self.tokens = []
+        self.checkpoints = []
+
+    def lex(self):
+        """
+        Lexes the whole code.
+        """
+        self.tokens, self.checkpoints = [], []
+        self.tokens, self.checkpoints = self.relex(self.code, None, 0, 0, 0)
+
+        return self.tokens
+
+    def edit(self, offset, removed_length, inserted_text):
+        """
+        Replaces `removed_length` characters at `offset` in code with `inserted_text` and returns
+        the tokens of the new code.
+        """
+        code = self.code[:offset] + inserted_text + self.code[offset + removed_length :]
+        self.code = code
+
+        # The state at a checkpoint depends on the character after its cursor as well.
+        index = self.find_checkpoint(offset - 1)
+        checkpoint = self.checkpoints[index] if index > -1 else None
+
+        try:
+            self.tokens, self.checkpoints = self.relex(
+                code,
+                checkpoint,
+                index + 1,
+                offset + len(inserted_text),
+                len(inserted_text) - removed_length,
+            )
+        except LexerError:
+            self.tokens, self.checkpoints = [], []
+            raise
+
+        return self.tokens
+
+    def find_checkpoint(self, cursor):
+        """
+        Returns the index of the last checkpoint before *cursor* or -1 if there is none.
+        """
+        checkpoints = self.checkpoints
+        low, high = 0, len(checkpoints)
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if checkpoints[middle].cursor < cursor:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low - 1
+
+    def relex(self, code, checkpoint, checkpoint_count, edit_end, cursor_delta):
+        """
+        Lexes *code* from *checkpoint*, or from the start if it is None, and returns the new tokens
+        and checkpoints.
+
+        Once the lexer goes past *edit_end*, every new checkpoint is compared with the old
+        checkpoint at the same position in the old code. If they match, the remaining old tokens
+        are reused.
+        """
+        lexer = Lexer(code, self.compiler_opts)
+        old_tokens, old_checkpoints = self.tokens, self.checkpoints
+        old_index = checkpoint_count
+        checkpoints = old_checkpoints[:checkpoint_count]
+
+        if checkpoint:
+            tokens = old_tokens[: checkpoint.token_index]
+            checkpoint.restore(lexer)
+        else:
+            tokens = []
+
+        char = lexer.eat_char()
+
+        while char:
+            lexer.lex_char(char, tokens)
+
+            if (char == "\r" or char == "\n") and not lexer.is_in_brackets:
+                new_checkpoint = Checkpoint.from_lexer(lexer, len(tokens))
+
+                # The rest of the code is the same as the old code after the edit.
+                if lexer.cursor + 1 >= edit_end:
+                    old_cursor = lexer.cursor - cursor_delta
+
+                    while (
+                        old_index < len(old_checkpoints)
+                        and old_checkpoints[old_index].cursor < old_cursor
+                    ):
+                        old_index += 1
+
+                    if old_index < len(old_checkpoints):
+                        old_checkpoint = old_checkpoints[old_index]
+
+                        if old_checkpoint.cursor == old_cursor and old_checkpoint.has_same_state(
+                            new_checkpoint
+                        ):
+                            return self.sync(
+                                tokens, checkpoints, new_checkpoint, old_index, cursor_delta
+                            )
+
+                checkpoints.append(new_checkpoint)
+
+            char = lexer.eat_char()
+
+        # Checking possible dedents at the end of code
+        prev_indent = lexer.indentations[-1].indentation_count
+        if prev_indent > 0:
+            for i in range(prev_indent // lexer.indent_factor):
+                tokens.append(Token('', TokenKind.DEDENT, *lexer.get_line_info()))
+
+        return tokens, checkpoints
+
+    def sync(self, tokens, checkpoints, new_checkpoint, old_index, cursor_delta):
+        """
+        Appends the old tokens and checkpoints after the old checkpoint at *old_index* that matches
+        *new_checkpoint*.
+        """
+        old_checkpoint = self.checkpoints[old_index]
+        token_delta = new_checkpoint.token_index - old_checkpoint.token_index
+        row_delta = new_checkpoint.row - old_checkpoint.row
+        old_tokens = self.tokens[old_checkpoint.token_index :]
+
+        if row_delta:
+            old_tokens = [
+                Token(token.data, token.kind, token.row + row_delta, token.column, token.symbol)
+                for token in old_tokens
+            ]
+
+        tokens.extend(old_tokens)
+        checkpoints.append(new_checkpoint)
+        checkpoints.extend(
+            [
+                checkpoint.shift(token_delta, cursor_delta, row_delta)
+                for checkpoint in self.checkpoints[old_index + 1 :]
+            ]
+        )
+
+        return tokens, checkpoints
@@ -4,13 +4,12 @@ An implementation of Raccoon's tokenizer.
 Check `compiler/lexer/lexer.grammar` for the language's lexer grammar specification.
 
 NOTE:
-    May turn lex function into a generator in the future to support generating tokens on demand.
+    `Lexer.iter_tokens` generates tokens on demand and `TokenStream` lets the parser pull them
+    lazily, so parsing can start before lexing ends.
 
     As noted¹ by some, certain lexer errors may be caused by invalid syntax, but the lexer error
-    shows first because it comes before the parser.
-
-    In addition to lex function becoming a generator, may also change Parser.code to an generator
-    to be gotten on demand.
+    shows first because it comes before the parser. With a `TokenStream` the lexer error only
+    shows when the parser reaches it.
 
     This has the benefit of not keeping everything in memory in case lexer / parser fails early
 
@@ -23,8 +22,9 @@ GUIDELINES:
     - ...
 """
 
+import re
 import json
-from copy import deepcopy
+import unicodedata
 from enum import Enum
 from compiler.errors import LexerError
 from compiler.options import CompilerOptions
@@ -40,6 +40,24 @@ from compiler.lexer.valid import (
     is_identifier_start,
     is_identifier_continuation,
     is_keyword,
+    normalize_identifier,
+    SIMPLE_ESCAPES,
+)
+
+
+# Match the body of a string up to its closing delimiter, a newline in a short string or the end
+# of code. A backslash escapes the character after it, even in raw strings.
+STRING_BODY_PATTERNS = {
+    "'": re.compile(r"[^'\\\r\n]*(?:\\(?:\r\n|[\s\S])[^'\\\r\n]*)*"),
+    '"': re.compile(r'[^"\\\r\n]*(?:\\(?:\r\n|[\s\S])[^"\\\r\n]*)*'),
+    "'''": re.compile(r"[^'\\]*(?:(?:\\[\s\S]|'(?!''))[^'\\]*)*"),
+    '"""': re.compile(r'[^"\\]*(?:(?:\\[\s\S]|"(?!""))[^"\\]*)*'),
+}
+
+# Matches an escape sequence, or a `\r\n` newline which strings keep as `\r`.
+ESCAPE_PATTERN = re.compile(
+    r"\\(\r\n|[0-7]{1,3}|x[0-9A-Fa-f]{0,2}|u[0-9A-Fa-f]{0,4}|U[0-9A-Fa-f]{0,8}"
+    r"|N\{[^}\r\n]*\}|[\s\S])|\r\n"
 )
 
 
@@ -88,16 +106,27 @@ class Block:
 
 
 class Token:
-    """ Token is a unit extracted """
+    """
+    Token is a unit extracted
+
+    Identifier tokens also have the `symbol` ID of their name in the compilation's `Interner`.
+    The ID is only meaningful within that table, so it is not written out.
+    """
 
-    def __init__(self, data, kind, row, column):
+    symbol = None
+
+    def __init__(self, data, kind, row, column, symbol=None):
         self.data = data
         self.kind = kind
         self.row = row
         self.column = column
 
+        if symbol is not None:
+            self.symbol = symbol
+
     def __repr__(self):
-        fields = deepcopy(vars(self))
+        fields = dict(vars(self))
+        fields.pop('symbol', None)
         fields['kind'] = repr(self.kind)
         string = ", ".join([f"{repr(key)}: {repr(val)}" for key, val in fields.items()])
         return "{" + string + "}"
@@ -147,12 +176,14 @@ class Lexer:
     """
     Takes a UTF-8 encoded file and tries to tokenize it following Raccoon's grammmar.
 
-    TODO: Normalize (using NFKC normalization form) the codepoints
+    Identifiers are normalized using NFKC normalization form.
+
     TODO: only 2 and 4 space indentation support
     TODO: only 1 tab indentation support
     """
 
-    def __init__(self, code, compiler_opts=CompilerOptions()):
+    def __init__(self, code, compiler_opts=None):
+        compiler_opts = compiler_opts or CompilerOptions()
         self.code = code
         self.code_length = len(code)
         self.cursor = -1
@@ -163,6 +194,34 @@ class Lexer:
         self.is_in_brackets = False
         self.indent_space_type = IndentSpaceKind.UNKNOWN
         self.compiler_opts = compiler_opts
+        self.interner = compiler_opts.interner
+
+    @staticmethod
+    def create(code, compiler_opts=None):
+        """
+        Creates a lexer using the lexer engine selected in `compiler_opts.lexer_engine`, or a
+        `ByteLexer` if code is UTF-8 encoded bytes. If `compiler_opts.lexer_jobs` is not 1, the
+        lexer is a `ParallelLexer` that uses that engine in each process.
+        """
+
+        compiler_opts = compiler_opts or CompilerOptions()
+
+        if compiler_opts.lexer_jobs != 1:
+            from compiler.lexer.parallel import ParallelLexer
+
+            return ParallelLexer(code, compiler_opts)
+
+        if not isinstance(code, str):
+            from compiler.lexer.byte_lexer import ByteLexer
+
+            return ByteLexer(code, compiler_opts)
+
+        if compiler_opts.lexer_engine == "regex":
+            from compiler.lexer.regex_lexer import RegexLexer
+
+            return RegexLexer(code, compiler_opts)
+
+        return Lexer(code, compiler_opts)
 
     def vomit_char(self):
         """
@@ -216,6 +275,28 @@ class Lexer:
 
         return None
 
+    def advance_cursor(self, index):
+        """
+        Moves the cursor forward to *index* at once, updating the row and column like `eat_char`
+        would for each character passed.
+        """
+        code = self.code
+        start = self.cursor + 1
+        end = index + 1
+        last_newline = max(code.rfind("\n", start, end), code.rfind("\r", start, end))
+
+        if last_newline < 0:
+            self.column += index - self.cursor
+        else:
+            self.row += (
+                code.count("\n", start, end)
+                + code.count("\r", start, end)
+                - code.count("\r\n", start, end)
+            )
+            self.column = index - last_newline - 1
+
+        self.cursor = index
+
     def peek_char(self, offset=1):
         """ Peeks at the next character in code """
         if -1 < self.cursor + offset < self.code_length:
@@ -251,6 +332,22 @@ class Lexer:
 
     def lex(self):
         """ Breaks code string into tokens that the parser can digest """
+        return list(self.iter_tokens())
+
+    def lex_buffer(self):
+        """ Breaks code string into tokens stored in a compact `TokenBuffer` """
+        from compiler.lexer.buffer import TokenBuffer
+
+        return TokenBuffer.from_tokens(self.code, self.iter_tokens())
+
+    def iter_tokens(self):
+        """
+        Breaks code string into tokens, yielding each token as soon as it can no longer change.
+
+        NOTE:
+            The last lexed token is held back for one iteration because a coefficient literal like
+            `2im` mutates it and `2x` needs to know its kind.
+        """
         char = self.eat_char()
         tokens = []
 
@@ -258,286 +355,194 @@ class Lexer:
         # NOTE: An if branch or a lexer function must not consume more than its production, i.e.
         # it must not consume a char meant for the next lexing iteration
         while char:
-            # We check each character in the code and categorize it
-            if char == "\r" or char == "\n":
-                """
-                ========= NEWLINE | INDENT | DEDENT =========
-
-                NOTE: '\r\n' is handled by eat_char method.
-                """
-
-                # Checking for indentation.
-                space_count = 0
-                has_mixed_space_types = False
-                prev_space = ''
-
-                # Consume all spaces.
-                while is_horizontal_space(self.peek_char()):
-                    cur_space = self.eat_char()
-
-                    # Checking if different space types were mixed.
-                    if space_count > 0 and (prev_space != cur_space):
-                        has_mixed_space_types = True
-
-                    prev_space = cur_space
-                    space_count += 1
-
-                peek_char = self.peek_char()
-
-                # If not followed by another newline, then it is a valid indentation.
-                if not (peek_char == "\r" or peek_char == "\n"):
-                    if has_mixed_space_types:
-                        raise LexerError(
-                            "Unexpected mix of different types of spaces in indentation",
-                            *self.get_line_info()
-                        )
+            self.lex_char(char, tokens)
 
-                    indent_space_type = self.indent_space_type
+            # Release all tokens except the last one which can still be mutated.
+            if len(tokens) > 1:
+                last_token = tokens.pop()
+                yield from tokens
+                tokens = [last_token]
 
-                    if prev_space and (
-                        (indent_space_type == IndentSpaceKind.SPACE and prev_space != ' ')
-                        or (indent_space_type == IndentSpaceKind.TAB and prev_space != '\t')
-                    ):
-                        raise LexerError(
-                            "Unexpected mix of different types of spaces in indentation",
-                            *self.get_line_info()
-                        )
+            # Consume the next character in code.
+            char = self.eat_char()
 
-                    indentation = self.indentations[-1]
-                    block = indentation.block
-
-                    # Skip indentations when inside brackets except for blocks.
-                    if indentation.block or not self.is_in_brackets:
-                        # Get difference in indentation.
-                        indent_diff = space_count - indentation.indentation_count
-
-                        if indent_diff > 0:  # If there is an indent.
-                            if self.indent_factor < 1:
-                                """ First indent in code """
-                                self.indent_factor = indent_diff
-                                self.indent_space_type = (
-                                    IndentSpaceKind.SPACE if prev_space == ' ' else
-                                    IndentSpaceKind.TAB
-                                )
-                            else:
-                                # Check if there is a consistent single indent.
-                                if indent_diff != self.indent_factor:
-                                    raise LexerError(
-                                        f"Expected an indent of {self.indent_factor} spaces",
-                                        *self.get_line_info()
-                                    )
-
-                            tokens.append(Token('', TokenKind.INDENT, *self.get_line_info()))
-
-                        elif indent_diff < 0:  # If there is an dedent.
-                            positive_indent_diff = abs(indent_diff)
-
-                            # If we are in a block, check if we have reached the end of block
-                            if block and space_count <= indentation.block.start_indentation_count:
-                                positive_indent_diff = abs(
-                                    indentation.indentation_count
-                                    - indentation.block.start_indentation_count
-                                )
-                                indentation.block = None
-                            else:
-                                # Ensure dedent is a multiple of the indent_factor.
-                                if positive_indent_diff % self.indent_factor:
-                                    raise LexerError(
-                                        "Unexpected number of spaces in dedent",
-                                        *self.get_line_info()
-                                    )
-
-                            for i in range(positive_indent_diff // self.indent_factor):
-                                tokens.append(Token('', TokenKind.DEDENT, *self.get_line_info()))
-
-                        else:  # Samedent
-                            tokens.append(Token("", TokenKind.NEWLINE, *self.get_line_info()))
-
-                    # Update indentation count.
-                    self.indentations[-1].indentation_count = space_count
-
-                else:  # Not indentation
-                    # Skip indenntations and newlines when inside brackets.
-                    if not self.is_in_brackets:
-                        tokens.append(Token("", TokenKind.NEWLINE, *self.get_line_info()))
-
-            elif char == "#":
-                """
-                ========= COMMENT =========
-                """
-                # Skip comments
-                char = self.peek_char()
+        # Checking possible dedents at the end of code
+        prev_indent = self.indentations[-1].indentation_count
+        if prev_indent > 0:
+            for i in range(prev_indent // self.indent_factor):
+                tokens.append(Token('', TokenKind.DEDENT, *self.get_line_info()))
 
-                while char and not (char == "\r" or char == "\n"):
-                    self.eat_char()
-                    char = self.peek_char()
-
-            elif is_horizontal_space(char):
-                """
-                Ignore spaces that aren't at the start of the line.
-                """
-                while is_horizontal_space(self.peek_char()):
-                    self.eat_char()
-
-            elif char == "\\":
-                """
-                ========= EXPLICIT LINE JOIN  =========
-                """
-                char = self.peek_char()
+        yield from tokens
 
-                # If next character is not a newline, not a valid line continuation
-                if not (char == "\r" or char == "\n"):
-                    raise LexerError(
-                        f"Unexpected character after line continuation character: {repr(char)}",
-                        *self.get_line_info(),
-                    )
+    def lex_char(self, char, tokens):
+        """
+        Lexes the token that starts with the already consumed *char* and adds it to *tokens*.
 
-                # Consume newline
-                self.eat_char()
+        NOTE: An if branch or a lexer function must not consume more than its production, i.e.
+        it must not consume a char meant for the next lexing iteration
+        """
+        # We check each character in the code and categorize it
+        if char == "\r" or char == "\n":
+            """
+            ========= NEWLINE | INDENT | DEDENT =========
 
-            elif char == "'":
-                """
-                ========= SHORT STRING | LONG STRING =========
-                """
+            NOTE: '\r\n' is handled by eat_char method.
+            """
 
-                if self.peek_token(1, 3) == "''":
-                    string = self.lex_string(char + self.eat_token("''"))
-                else:
-                    string = self.lex_string(char)
+            # Checking for indentation.
+            space_count = 0
+            has_mixed_space_types = False
+            prev_space = ''
 
-                tokens.append(Token(string, TokenKind.STRING, *self.get_line_info()))
+            # Consume all spaces.
+            while is_horizontal_space(self.peek_char()):
+                cur_space = self.eat_char()
 
-            elif char == '"':
-                """
-                ========= SHORT STRING | LONG STRING =========
-                """
+                # Checking if different space types were mixed.
+                if space_count > 0 and (prev_space != cur_space):
+                    has_mixed_space_types = True
 
-                if self.peek_token(1, 3) == '""':
-                    string = self.lex_string(char + self.eat_token('""'))
-                else:
-                    string = self.lex_string(char)
+                prev_space = cur_space
+                space_count += 1
 
-                tokens.append(Token(string, TokenKind.STRING, *self.get_line_info()))
+            self.lex_indentation(space_count, has_mixed_space_types, prev_space, tokens)
 
-            elif char == ".":
-                """
-                ========= DELIMITER | FLOAT =========
-                """
+        elif char == "#":
+            """
+            ========= COMMENT =========
+            """
+            # Skip comments
+            char = self.peek_char()
+
+            while char and not (char == "\r" or char == "\n"):
+                self.eat_char()
                 char = self.peek_char()
-                codepoint = ord(char) if char else -1
-                token = "."
-                token_kind = TokenKind.DELIMITER
 
-                # "." digits exponent?
-                if is_dec_digit(codepoint):
-                    token_kind = TokenKind.DEC_FLOAT
+        elif is_horizontal_space(char):
+            """
+            Ignore spaces that aren't at the start of the line.
+            """
+            while is_horizontal_space(self.peek_char()):
+                self.eat_char()
 
-                    token = "0." + self.lex_digit_part(
-                        is_dec_digit, "floating point"
-                    )
+        elif char == "\\":
+            """
+            ========= EXPLICIT LINE JOIN  =========
+            """
+            char = self.peek_char()
 
-                    # Check for exponent section
-                    peek_token = self.peek_slice(1, 3)
-                    peek_e = peek_token[0:1]
-                    peek_sign_or_digit = peek_token[1:2]
-                    codepoint = ord(peek_sign_or_digit) if peek_sign_or_digit else -1
-
-                    if peek_e == "e" and (
-                        is_dec_digit(codepoint)
-                        or peek_sign_or_digit == "+"
-                        or peek_sign_or_digit == "-"
-                    ):
-                        token += self.lex_exponent_part()
-
-                tokens.append(Token(token, token_kind, *self.get_line_info()))
-
-            elif char == "0":
-                """
-                ========= INTEGER | FLOAT =========
-
-                TODO: validate representable integer and float
-                """
-                token = ""
-                token_kind = TokenKind.DEC_INTEGER
-                char = self.peek_char()
+            # If next character is not a newline, not a valid line continuation
+            if not (char == "\r" or char == "\n"):
+                raise LexerError(
+                    f"Unexpected character after line continuation character: {repr(char)}",
+                    *self.get_line_info(),
+                )
 
-                if char == "x":
-                    # HEXADECIMAL
-                    self.eat_char()  # Consume the x
-                    token = self.lex_digit_part(is_hex_digit)
-                    token_kind = TokenKind.HEX_INTEGER
+            # Consume newline
+            self.eat_char()
 
-                elif char == "b":
-                    # BINARY
-                    self.eat_char()  # Consume the b
-                    token = self.lex_digit_part(is_bin_digit)
-                    token_kind = TokenKind.BIN_INTEGER
+        elif char == "'":
+            """
+            ========= SHORT STRING | LONG STRING =========
+            """
 
-                elif char == "o":
-                    # OCTAL
-                    self.eat_char()  # Consume the o
-                    token = self.lex_digit_part(is_oct_digit)
-                    token_kind = TokenKind.OCT_INTEGER
+            if self.peek_token(1, 3) == "''":
+                string = self.lex_string(char + self.eat_token("''"))
+            else:
+                string = self.lex_string(char)
 
-                else:
-                    # DECIMAL
-                    token = self.lex_digit_part(
-                        is_dec_digit, raise_if_empty=False
-                    )
-                    token = "0" + token
-
-                    # Check for potential floating point value
-                    # digits '.' digits? exponent? | digits exponent
-                    peek_token = self.peek_slice(1, 4)
-                    peek0 = peek_token[0:1]  # . || e
-                    peek1 = peek_token[1:2]  # digit or e || + or - or digit
-                    peek2 = peek_token[2:3]  # + or - or digit
-                    codepoint0 = ord(peek1) if peek1 else -1
-                    codepoint1 = ord(peek2) if peek2 else -1
-
-                    if peek0 == "." and (
-                        is_dec_digit(codepoint0)
-                        or (
-                            peek1 == "e"
-                            and (
-                                is_dec_digit(codepoint1)
-                                or peek2 == "+"
-                                or peek2 == "-"
-                            )
-                        )
-                    ):
-                        token += self.lex_fraction_exponent_part()
-                        token_kind = TokenKind.DEC_FLOAT
+            tokens.append(Token(string, TokenKind.STRING, *self.get_line_info()))
 
-                    elif peek0 == "e" and (
-                        is_dec_digit(codepoint0) or peek1 == "+" or peek1 == "-"
-                    ):
-                        token += self.lex_exponent_part()
-                        token_kind = TokenKind.DEC_FLOAT
+        elif char == '"':
+            """
+            ========= SHORT STRING | LONG STRING =========
+            """
 
-                tokens.append(Token(token, token_kind, *self.get_line_info()))
+            if self.peek_token(1, 3) == '""':
+                string = self.lex_string(char + self.eat_token('""'))
+            else:
+                string = self.lex_string(char)
 
-            elif 47 < ord(char) < 58:
-                """
-                ========= INTEGER | FLOAT =========
+            tokens.append(Token(string, TokenKind.STRING, *self.get_line_info()))
+
+        elif char == ".":
+            """
+            ========= DELIMITER | FLOAT =========
+            """
+            char = self.peek_char()
+            codepoint = ord(char) if char else -1
+            token = "."
+            token_kind = TokenKind.DELIMITER
+
+            # "." digits exponent?
+            if is_dec_digit(codepoint):
+                token_kind = TokenKind.DEC_FLOAT
+
+                token = "0." + self.lex_digit_part(
+                    is_dec_digit, "floating point"
+                )
+
+                # Check for exponent section
+                peek_token = self.peek_slice(1, 3)
+                peek_e = peek_token[0:1]
+                peek_sign_or_digit = peek_token[1:2]
+                codepoint = ord(peek_sign_or_digit) if peek_sign_or_digit else -1
+
+                if peek_e == "e" and (
+                    is_dec_digit(codepoint)
+                    or peek_sign_or_digit == "+"
+                    or peek_sign_or_digit == "-"
+                ):
+                    token += self.lex_exponent_part()
+
+            tokens.append(Token(token, token_kind, *self.get_line_info()))
+
+        elif char == "0":
+            """
+            ========= INTEGER | FLOAT =========
+
+            TODO: validate representable integer and float
+            """
+            token = ""
+            token_kind = TokenKind.DEC_INTEGER
+            char = self.peek_char()
 
-                TODO: Validate representable integer and float
-                """
-                token = char + self.lex_digit_part(is_dec_digit, raise_if_empty=False)
-                token_kind = TokenKind.DEC_INTEGER
+            if char == "x":
+                # HEXADECIMAL
+                self.eat_char()  # Consume the x
+                token = self.lex_digit_part(is_hex_digit)
+                token_kind = TokenKind.HEX_INTEGER
+
+            elif char == "b":
+                # BINARY
+                self.eat_char()  # Consume the b
+                token = self.lex_digit_part(is_bin_digit)
+                token_kind = TokenKind.BIN_INTEGER
+
+            elif char == "o":
+                # OCTAL
+                self.eat_char()  # Consume the o
+                token = self.lex_digit_part(is_oct_digit)
+                token_kind = TokenKind.OCT_INTEGER
+
+            else:
+                # DECIMAL
+                token = self.lex_digit_part(
+                    is_dec_digit, raise_if_empty=False
+                )
+                token = "0" + token
 
                 # Check for potential floating point value
                 # digits '.' digits? exponent? | digits exponent
                 peek_token = self.peek_slice(1, 4)
-                peek0 = peek_token[0:1]  # | . |  e
-                peek1 = peek_token[1:2]  # | ε | digit | e |  (+ | - | digit)
-                peek2 = peek_token[2:3]  # | (+ | - | digit)
+                peek0 = peek_token[0:1]  # . || e
+                peek1 = peek_token[1:2]  # digit or e || + or - or digit
+                peek2 = peek_token[2:3]  # + or - or digit
                 codepoint0 = ord(peek1) if peek1 else -1
                 codepoint1 = ord(peek2) if peek2 else -1
 
                 if peek0 == "." and (
                     is_dec_digit(codepoint0)
-                    or (is_space(peek1) or peek1 == "")
                     or (
                         peek1 == "e"
                         and (
@@ -556,349 +561,543 @@ class Lexer:
                     token += self.lex_exponent_part()
                     token_kind = TokenKind.DEC_FLOAT
 
-                tokens.append(Token(token, token_kind, *self.get_line_info()))
-
-            elif char == "!":
-                """
-                ========= OPERATOR =========
-                """
-                token = char
-                peek_char = self.peek_char()
-
-                if peek_char != "=":
-                    raise LexerError(
-                        f"Encountered unexpected character: {repr(char)}",
-                        *self.get_line_info(),
+            tokens.append(Token(token, token_kind, *self.get_line_info()))
+
+        elif 47 < ord(char) < 58:
+            """
+            ========= INTEGER | FLOAT =========
+
+            TODO: Validate representable integer and float
+            """
+            token = char + self.lex_digit_part(is_dec_digit, raise_if_empty=False)
+            token_kind = TokenKind.DEC_INTEGER
+
+            # Check for potential floating point value
+            # digits '.' digits? exponent? | digits exponent
+            peek_token = self.peek_slice(1, 4)
+            peek0 = peek_token[0:1]  # | . |  e
+            peek1 = peek_token[1:2]  # | ε | digit | e |  (+ | - | digit)
+            peek2 = peek_token[2:3]  # | (+ | - | digit)
+            codepoint0 = ord(peek1) if peek1 else -1
+            codepoint1 = ord(peek2) if peek2 else -1
+
+            if peek0 == "." and (
+                is_dec_digit(codepoint0)
+                or (is_space(peek1) or peek1 == "")
+                or (
+                    peek1 == "e"
+                    and (
+                        is_dec_digit(codepoint1)
+                        or peek2 == "+"
+                        or peek2 == "-"
                     )
-                else:
-                    token += self.eat_char()
-
-                tokens.append(Token(token, TokenKind.OPERATOR, *self.get_line_info()))
+                )
+            ):
+                token += self.lex_fraction_exponent_part()
+                token_kind = TokenKind.DEC_FLOAT
 
-            elif is_single_char_operator(char):
-                """
-                ========= OPERATOR | DELIMITER =========
-                """
-                token = char
-                token_kind = TokenKind.OPERATOR
-                peek_char0 = self.peek_char()
-                peek_char1 = self.peek_char(2)
+            elif peek0 == "e" and (
+                is_dec_digit(codepoint0) or peek1 == "+" or peek1 == "-"
+            ):
+                token += self.lex_exponent_part()
+                token_kind = TokenKind.DEC_FLOAT
 
-                if (
-                    peek_char0
-                    and peek_char1
-                    and (
-                        (char == "/" and peek_char0 == "/" and peek_char1 == "=")
-                        or (char == ">" and peek_char0 == ">" and peek_char1 == "=")
-                        or (char == "<" and peek_char0 == "<" and peek_char1 == "=")
-                        or (char == "|" and peek_char0 == "|" and peek_char1 == "=")
-                    )
-                ):
-                    token += self.eat_char() + self.eat_char()
-                    token_kind = TokenKind.DELIMITER
-                elif peek_char0 and (
-                    (char == ">" and (peek_char0 == "=" or peek_char0 == ">"))
-                    or (char == "<" and (peek_char0 == "=" or peek_char0 == "<"))
-                    or (char == "/" and peek_char0 == "/")
-                    or (char == "|" and peek_char0 == "|")
-                    or (char == "*" and peek_char0 == "*")
-                ):
-                    token += self.eat_char()
-                elif peek_char0 and (
-                    (char == "-" and peek_char0 == ">")
-                    or (char == "+" and peek_char0 == "=")
-                    or (char == "-" and peek_char0 == "=")
-                    or (char == "*" and peek_char0 == "=")
-                    or (char == "/" and peek_char0 == "=")
-                    or (char == "%" and peek_char0 == "=")
-                    or (char == "&" and peek_char0 == "=")
-                    or (char == "|" and peek_char0 == "=")
-                    or (char == "^" and peek_char0 == "=")
-                ):
-                    token += self.eat_char()
-                    token_kind = TokenKind.DELIMITER
+            tokens.append(Token(token, token_kind, *self.get_line_info()))
 
-                tokens.append(Token(token, token_kind, *self.get_line_info()))
+        elif char == "!":
+            """
+            ========= OPERATOR =========
+            """
+            token = char
+            peek_char = self.peek_char()
 
-            elif is_single_char_delimiter(char):
-                """
-                ========= DELIMITER | OPERATOR | INDENTATION =========
-                """
-                token = char
+            if peek_char != "=":
+                raise LexerError(
+                    f"Encountered unexpected character: {repr(char)}",
+                    *self.get_line_info(),
+                )
+            else:
+                token += self.eat_char()
+
+            tokens.append(Token(token, TokenKind.OPERATOR, *self.get_line_info()))
+
+        elif is_single_char_operator(char):
+            """
+            ========= OPERATOR | DELIMITER =========
+            """
+            token = char
+            token_kind = TokenKind.OPERATOR
+            peek_char0 = self.peek_char()
+            peek_char1 = self.peek_char(2)
+
+            if (
+                peek_char0
+                and peek_char1
+                and (
+                    (char == "/" and peek_char0 == "/" and peek_char1 == "=")
+                    or (char == ">" and peek_char0 == ">" and peek_char1 == "=")
+                    or (char == "<" and peek_char0 == "<" and peek_char1 == "=")
+                    or (char == "|" and peek_char0 == "|" and peek_char1 == "=")
+                )
+            ):
+                token += self.eat_char() + self.eat_char()
+                token_kind = TokenKind.DELIMITER
+            elif peek_char0 and (
+                (char == ">" and (peek_char0 == "=" or peek_char0 == ">"))
+                or (char == "<" and (peek_char0 == "=" or peek_char0 == "<"))
+                or (char == "/" and peek_char0 == "/")
+                or (char == "|" and peek_char0 == "|")
+                or (char == "*" and peek_char0 == "*")
+            ):
+                token += self.eat_char()
+            elif peek_char0 and (
+                (char == "-" and peek_char0 == ">")
+                or (char == "+" and peek_char0 == "=")
+                or (char == "-" and peek_char0 == "=")
+                or (char == "*" and peek_char0 == "=")
+                or (char == "/" and peek_char0 == "=")
+                or (char == "%" and peek_char0 == "=")
+                or (char == "&" and peek_char0 == "=")
+                or (char == "|" and peek_char0 == "=")
+                or (char == "^" and peek_char0 == "=")
+            ):
+                token += self.eat_char()
                 token_kind = TokenKind.DELIMITER
-                peek_char = self.peek_char()
-                nested_indentation_num = len(self.indentations)
-                indentation = self.indentations[-1]
-
-                # Check if there is an open bracket.
-                if char == "(" or char == "[" or char == "{":
-                    self.indentations.append(
-                        Indentation(
-                            open_bracket=char,
-                            start_indentation_count=indentation.indentation_count
-                        )
-                    )
 
-                    self.is_in_brackets = True
+            tokens.append(Token(token, token_kind, *self.get_line_info()))
+
+        elif is_single_char_delimiter(char):
+            """
+            ========= DELIMITER | OPERATOR | INDENTATION =========
+            """
+            self.lex_delimiter(char, tokens)
+
+        elif is_identifier_start(char):
+            """
+            ========= IDENTIFIER | OPERATOR | BYTE STRING | IMAGINARY =========
+            ========= PREFIXED STRING | INDENTATION | KEYWORD =========
+            """
+            line_info = self.get_line_info()
+            line_info_before_identifier_lexing = (line_info[0], line_info[1] - 1)
+
+            token = char
+            peek_token = self.peek_slice(0, 3)
+            two_letter_prefix = peek_token[:2]
+            two_letter_prefix_delim = peek_token[2:3]
+            one_letter_prefix = peek_token[:1]
+            one_letter_prefix_delim = peek_token[1:2]
+
+            if (two_letter_prefix == "rb" or two_letter_prefix == "rf") and (
+                two_letter_prefix_delim == '"' or two_letter_prefix_delim == "'"
+            ):
+                # TWO LETTER STRING PREFIX
+                peek_triple_quote_delimiter = self.peek_slice(2, 5)
 
-                # Check if there is an close bracket.
-                if char == indentation.close_bracket:
-                    if nested_indentation_num == 2:
-                        self.is_in_brackets = False
+                token, token_kind = self.lex_prefixed_string(
+                    two_letter_prefix,
+                    peek_triple_quote_delimiter,
+                    two_letter_prefix == "rb",
+                )
 
-                    if nested_indentation_num > 1:
-                        # If we are in a block and block hasn't been dedented
-                        if indentation.block and (
-                            indentation.indentation_count
-                            > indentation.block.start_indentation_count
-                        ):
-                            positive_indent_diff = abs(
-                                indentation.indentation_count
-                                - indentation.block.start_indentation_count
-                            )
+            elif (
+                one_letter_prefix == "f"
+                or one_letter_prefix == "b"
+                or one_letter_prefix == "r"
+                or one_letter_prefix == "u"
+            ) and (
+                one_letter_prefix_delim == "'" or one_letter_prefix_delim == '"'
+            ):
+                # ONE LETTER STRING PREFIX
+                peek_triple_quote_delimiter = self.peek_slice(1, 4)
 
-                            for i in range(positive_indent_diff // self.indent_factor):
-                                tokens.append(Token('', TokenKind.DEDENT, *self.get_line_info()))
-
-                        self.indentations.pop()
-
-                # Detecting a top-level block in brackets
-                # How would the following handled?
-                #   foo(array[1:
-                #       20])
-                # It is a syntax error, even in Python.
-                if self.is_in_brackets and not indentation.block and char == ':':
-                    offset = 0
-                    is_block = False
-
-                    # Skip all spaces until we find a newline
-                    while True:
-                        offset += 1
-                        peek_char = self.peek_char(offset)
-
-                        if is_horizontal_space(peek_char):
-                            continue
-                        elif peek_char == '\n' or peek_char == '\r':
-                            is_block = True
-                            break
-                        else:
-                            break
-
-                    if is_block:
-                        indentation.block = Block(indentation.indentation_count)
-
-                if char == "=" and peek_char == "=":
-                    token += self.eat_char()
-                    token_kind = TokenKind.OPERATOR
-                elif char == "@" and peek_char == "=":
-                    token += self.eat_char()
-                    token_kind = TokenKind.OPERATOR
-                elif char == ":" and peek_char == "=":
+                token, token_kind = self.lex_prefixed_string(
+                    one_letter_prefix,
+                    peek_triple_quote_delimiter,
+                    one_letter_prefix == "b",
+                )
+
+            else:
+                # IDENTIFIER
+                next_char = self.peek_char()
+                prev_char = self.peek_char(-1)
+                while next_char and is_identifier_continuation(next_char):
                     token += self.eat_char()
-                    token_kind = TokenKind.OPERATOR
 
-                tokens.append(Token(token, token_kind, *self.get_line_info()))
+                    # Peek at the next character in code.
+                    next_char = self.peek_char()
 
-            elif is_identifier_start(char):
-                """
-                ========= IDENTIFIER | OPERATOR | BYTE STRING | IMAGINARY =========
-                ========= PREFIXED STRING | INDENTATION | KEYWORD =========
+                token = normalize_identifier(token)
+                token_kind = (
+                    TokenKind.KEYWORD
+                    if is_keyword(token)
+                    else TokenKind.IDENTIFIER
+                )
 
-                TODO: is_identifier_start must check for ASCII first
-                """
-                line_info = self.get_line_info()
-                line_info_before_identifier_lexing = (line_info[0], line_info[1] - 1)
+                token, token_kind = self.lex_coefficient(
+                    token, token_kind, prev_char, line_info_before_identifier_lexing, tokens
+                )
 
-                token = char
-                peek_token = self.peek_slice(0, 3)
-                two_letter_prefix = peek_token[:2]
-                two_letter_prefix_delim = peek_token[2:3]
-                one_letter_prefix = peek_token[:1]
-                one_letter_prefix_delim = peek_token[1:2]
+            symbol = self.interner.intern(token) if token_kind == TokenKind.IDENTIFIER else None
+            tokens.append(Token(token, token_kind, *self.get_line_info(), symbol))
 
-                if (two_letter_prefix == "rb" or two_letter_prefix == "rf") and (
-                    two_letter_prefix_delim == '"' or two_letter_prefix_delim == "'"
-                ):
-                    # TWO LETTER STRING PREFIX
-                    peek_triple_quote_delimiter = self.peek_token(2, 5)
+        else:
+            raise LexerError(
+                f"Encountered unexpected character: {repr(char)}",
+                *self.get_line_info(),
+            )
 
-                    token, token_kind = self.lex_prefixed_string(
-                        two_letter_prefix,
-                        peek_triple_quote_delimiter,
-                        two_letter_prefix == "rb",
-                    )
+    def lex_indentation(self, space_count, has_mixed_space_types, prev_space, tokens):
+        """
+        Adds the NEWLINE, INDENT or DEDENT tokens for a line whose leading spaces have already been
+        consumed.
+        """
+        peek_char = self.peek_char()
 
-                elif (
-                    one_letter_prefix == "f"
-                    or one_letter_prefix == "b"
-                    or one_letter_prefix == "r"
-                    or one_letter_prefix == "u"
-                ) and (
-                    one_letter_prefix_delim == "'" or one_letter_prefix_delim == '"'
-                ):
-                    # ONE LETTER STRING PREFIX
-                    peek_triple_quote_delimiter = self.peek_token(1, 4)
+        # If not followed by another newline, then it is a valid indentation.
+        if not (peek_char == "\r" or peek_char == "\n"):
+            if has_mixed_space_types:
+                raise LexerError(
+                    "Unexpected mix of different types of spaces in indentation",
+                    *self.get_line_info()
+                )
 
-                    token, token_kind = self.lex_prefixed_string(
-                        one_letter_prefix,
-                        peek_triple_quote_delimiter,
-                        one_letter_prefix == "b",
-                    )
+            indent_space_type = self.indent_space_type
 
-                else:
-                    # IDENTIFIER
-                    next_char = self.peek_char()
-                    prev_char = self.peek_char(-1)
-                    prev_codepoint = ord(prev_char) if prev_char else -1
-                    while next_char and is_identifier_continuation(next_char):
-                        token += self.eat_char()
-
-                        # Peek at the next character in code.
-                        next_char = self.peek_char()
-
-                    token_kind = (
-                        TokenKind.KEYWORD
-                        if is_keyword(token)
-                        else TokenKind.IDENTIFIER
-                    )
+            if prev_space and (
+                (indent_space_type == IndentSpaceKind.SPACE and prev_space != ' ')
+                or (indent_space_type == IndentSpaceKind.TAB and prev_space != '\t')
+            ):
+                raise LexerError(
+                    "Unexpected mix of different types of spaces in indentation",
+                    *self.get_line_info()
+                )
 
-                    # OPERATOR
-                    # If this is a coefficient expression like 2_000fahr or (0b100)num,
-                    # insert a `*` operator between the operands.
-                    if (
-                        prev_char
-                        and not is_space(prev_char)
-                        and (is_hex_digit(prev_codepoint) or prev_char == ")")
-                    ):
-                        kind, prev_token = tokens[-1].kind, tokens[-1].data
-
-                        # Bin, Oct and Hex integer literals are not allowed to be used in
-                        # coefficient literal
-                        if (
-                            kind == TokenKind.BIN_INTEGER
-                            or kind == TokenKind.OCT_INTEGER
-                            or kind == TokenKind.HEX_INTEGER
-                        ):
+            indentation = self.indentations[-1]
+            block = indentation.block
+
+            # Skip indentations when inside brackets except for blocks.
+            if indentation.block or not self.is_in_brackets:
+                # Get difference in indentation.
+                indent_diff = space_count - indentation.indentation_count
+
+                if indent_diff > 0:  # If there is an indent.
+                    if self.indent_factor < 1:
+                        """ First indent in code """
+                        self.indent_factor = indent_diff
+                        self.indent_space_type = (
+                            IndentSpaceKind.SPACE if prev_space == ' ' else
+                            IndentSpaceKind.TAB
+                        )
+                    else:
+                        # Check if there is a consistent single indent.
+                        if indent_diff != self.indent_factor:
                             raise LexerError(
-                                f"Encountered invalid coefficient literal: "
-                                f"{repr(self.get_numeric_prefix(kind)+ prev_token + token)}",
-                                *self.get_line_info(),
+                                f"Expected an indent of {self.indent_factor} spaces",
+                                *self.get_line_info()
                             )
 
-                        if token == "im":  # Mutate previous token
-                            prev_token = tokens.pop()
-                            token = prev_token.data
-                            token_kind = (
-                                TokenKind.DEC_INTEGER_IMAG
-                                if prev_token.kind == TokenKind.DEC_INTEGER
-                                else TokenKind.DEC_FLOAT_IMAG
-                            )
+                    tokens.append(Token('', TokenKind.INDENT, *self.get_line_info()))
+
+                elif indent_diff < 0:  # If there is an dedent.
+                    positive_indent_diff = abs(indent_diff)
 
-                        else:
-                            tokens.append(
-                                Token(
-                                    "*",
-                                    TokenKind.OPERATOR,
-                                    *line_info_before_identifier_lexing,
-                                )
+                    # If we are in a block, check if we have reached the end of block
+                    if block and space_count <= indentation.block.start_indentation_count:
+                        positive_indent_diff = abs(
+                            indentation.indentation_count
+                            - indentation.block.start_indentation_count
+                        )
+                        indentation.block = None
+                    else:
+                        # Ensure dedent is a multiple of the indent_factor.
+                        if positive_indent_diff % self.indent_factor:
+                            raise LexerError(
+                                "Unexpected number of spaces in dedent",
+                                *self.get_line_info()
                             )
 
-                tokens.append(Token(token, token_kind, *self.get_line_info()))
+                    for i in range(positive_indent_diff // self.indent_factor):
+                        tokens.append(Token('', TokenKind.DEDENT, *self.get_line_info()))
 
-            else:
+                else:  # Samedent
+                    tokens.append(Token("", TokenKind.NEWLINE, *self.get_line_info()))
+
+            # Update indentation count.
+            self.indentations[-1].indentation_count = space_count
+
+        else:  # Not indentation
+            # Skip indenntations and newlines when inside brackets.
+            if not self.is_in_brackets:
+                tokens.append(Token("", TokenKind.NEWLINE, *self.get_line_info()))
+
+    def lex_delimiter(self, char, tokens):
+        """
+        Adds the token of a delimiter that starts with the already consumed *char* and keeps track
+        of the brackets and blocks it opens or closes.
+        """
+        token = char
+        token_kind = TokenKind.DELIMITER
+        peek_char = self.peek_char()
+        nested_indentation_num = len(self.indentations)
+        indentation = self.indentations[-1]
+
+        # Check if there is an open bracket.
+        if char == "(" or char == "[" or char == "{":
+            self.indentations.append(
+                Indentation(
+                    open_bracket=char,
+                    start_indentation_count=indentation.indentation_count
+                )
+            )
+
+            self.is_in_brackets = True
+
+        # Check if there is an close bracket.
+        if char == indentation.close_bracket:
+            if nested_indentation_num == 2:
+                self.is_in_brackets = False
+
+            if nested_indentation_num > 1:
+                # If we are in a block and block hasn't been dedented
+                if indentation.block and (
+                    indentation.indentation_count
+                    > indentation.block.start_indentation_count
+                ):
+                    positive_indent_diff = abs(
+                        indentation.indentation_count
+                        - indentation.block.start_indentation_count
+                    )
+
+                    for i in range(positive_indent_diff // self.indent_factor):
+                        tokens.append(Token('', TokenKind.DEDENT, *self.get_line_info()))
+
+                self.indentations.pop()
+
+        # Detecting a top-level block in brackets
+        # How would the following handled?
+        #   foo(array[1:
+        #       20])
+        # It is a syntax error, even in Python.
+        if self.is_in_brackets and not indentation.block and char == ':':
+            offset = 0
+            is_block = False
+
+            # Skip all spaces until we find a newline
+            while True:
+                offset += 1
+                peek_char = self.peek_char(offset)
+
+                if is_horizontal_space(peek_char):
+                    continue
+                elif peek_char == '\n' or peek_char == '\r':
+                    is_block = True
+                    break
+                else:
+                    break
+
+            if is_block:
+                indentation.block = Block(indentation.indentation_count)
+
+        if char == "=" and peek_char == "=":
+            token += self.eat_char()
+            token_kind = TokenKind.OPERATOR
+        elif char == "@" and peek_char == "=":
+            token += self.eat_char()
+            token_kind = TokenKind.OPERATOR
+        elif char == ":" and peek_char == "=":
+            token += self.eat_char()
+            token_kind = TokenKind.OPERATOR
+
+        tokens.append(Token(token, token_kind, *self.get_line_info()))
+
+    def lex_coefficient(
+        self, token, token_kind, prev_char, line_info_before_identifier_lexing, tokens
+    ):
+        """
+        Checks if the just lexed identifier *token* is the coefficient part of a literal like
+        `2_000fahr` or `5im` and returns the token and token kind to add.
+        """
+        prev_codepoint = ord(prev_char) if prev_char else -1
+
+        # OPERATOR
+        # If this is a coefficient expression like 2_000fahr or (0b100)num,
+        # insert a `*` operator between the operands.
+        if (
+            prev_char
+            and not is_space(prev_char)
+            and (is_hex_digit(prev_codepoint) or prev_char == ")")
+        ):
+            kind, prev_token = tokens[-1].kind, tokens[-1].data
+
+            # Bin, Oct and Hex integer literals are not allowed to be used in
+            # coefficient literal
+            if (
+                kind == TokenKind.BIN_INTEGER
+                or kind == TokenKind.OCT_INTEGER
+                or kind == TokenKind.HEX_INTEGER
+            ):
                 raise LexerError(
-                    f"Encountered unexpected character: {repr(char)}",
+                    f"Encountered invalid coefficient literal: "
+                    f"{repr(self.get_numeric_prefix(kind)+ prev_token + token)}",
                     *self.get_line_info(),
                 )
 
-            # Consume the next character in code.
-            char = self.eat_char()
+            if token == "im":  # Mutate previous token
+                prev_token = tokens.pop()
+                token = prev_token.data
+                token_kind = (
+                    TokenKind.DEC_INTEGER_IMAG
+                    if prev_token.kind == TokenKind.DEC_INTEGER
+                    else TokenKind.DEC_FLOAT_IMAG
+                )
 
-        # Checking possible dedents at the end of code
-        prev_indent = self.indentations[-1].indentation_count
-        if prev_indent > 0:
-            for i in range(prev_indent // self.indent_factor):
-                tokens.append(Token('', TokenKind.DEDENT, *self.get_line_info()))
+            else:
+                tokens.append(
+                    Token(
+                        "*",
+                        TokenKind.OPERATOR,
+                        *line_info_before_identifier_lexing,
+                    )
+                )
 
-        return tokens
+        return token, token_kind
 
     def lex_prefixed_string(self, prefix, triple_quote_delimiter, is_byte_string):
         """
         Checks if the next set of bytes starts a prefixed string
 
-        TODO: Handle escape sequence.
         TODO: Handle string formatting.
         """
         token = ""
         token_kind = TokenKind.PREFIXED_STRING
         single_quote_delimiter = triple_quote_delimiter[:1]
+        is_raw_string = "r" in prefix
 
         if triple_quote_delimiter == '"""' or triple_quote_delimiter == "'''":
             self.eat_token(prefix[1:] + triple_quote_delimiter)
-            token = self.lex_string(
-                triple_quote_delimiter, is_byte_string=is_byte_string
-            )
+            token = self.lex_string(triple_quote_delimiter, is_byte_string, is_raw_string)
 
         elif single_quote_delimiter == '"' or single_quote_delimiter == "'":
             self.eat_token(prefix[1:] + single_quote_delimiter)
-            token = self.lex_string(
-                single_quote_delimiter, is_byte_string=is_byte_string
-            )
+            token = self.lex_string(single_quote_delimiter, is_byte_string, is_raw_string)
 
         if is_byte_string:
             token_kind = TokenKind.BYTE_STRING
 
         return token, token_kind
 
-    def lex_string(self, delimiter, is_byte_string=False):
+    def lex_string(self, delimiter, is_byte_string=False, is_raw_string=False):
         """
         Using provided delimiter, returns the sequence of UTF8 codepoints between
         those delimiters
 
-        TODO: Handle escape sequence.
+        The closing delimiter is found with one of `STRING_BODY_PATTERNS`, so the string is taken
+        from code as a single slice instead of one character at a time. Escape sequences are then
+        decoded, except in raw strings.
         """
-        is_long_string = delimiter == "'''" or delimiter == '"""'
-        token = ""
+        code = self.code
+        start = self.cursor + 1
+        end = STRING_BODY_PATTERNS[delimiter].match(code, start).end()
+        token = code[start:end]
 
-        # Iterate over next sequence of codepoints and make sanity checks
-        while True:
-            row, column = self.row, self.column
-            char = self.eat_char()
+        # If string is expected to be a byte string, check if its characters are ASCII
+        if is_byte_string and not token.isascii():
+            index = next(i for i, char in enumerate(token) if not char.isascii())
+            self.advance_cursor(start + index - 1)
+            raise LexerError(
+                f"Encountered unexpected non-ASCII character: {repr(token[index])}",
+                *self.get_line_info(),
+            )
 
-            # Make some necessary sanity checks on codepoint
-            if char is None:
-                # Check if code abruptly ends
-                raise LexerError(
-                    "Unexpected end of string. Closing delimiter not found", row, column
-                )
-            elif is_byte_string and not (-1 < ord(char) < 128):
-                # If string is expected to be a byte string, check if character is ASCII
-                raise LexerError(
-                    f"Encountered unexpected non-ASCII character: {repr(char)}",
-                    row,
-                    column,
-                )
-            elif not is_long_string and (char == "\n" or char == "\r"):
-                # If string is a short string, check if character isn't a newline character
-                # TODO: Handle all ASCII and UTF-8 characters.
-                raise LexerError(
-                    "Encountered unexpected newline character", row, column
-                )
+        # Check for closing delimiter
+        if not code.startswith(delimiter, end):
+            if end < self.code_length and (code[end] == "\n" or code[end] == "\r"):
+                # A short string cannot have a newline character
+                self.advance_cursor(end - 1)
+                raise LexerError("Encountered unexpected newline character", *self.get_line_info())
 
-            # Check for closing long_string delimiter
-            if is_long_string and (
-                char == delimiter[0] and self.eat_token(delimiter[1:])
-            ):
-                break
+            # Check if code abruptly ends
+            self.advance_cursor(self.code_length - 1)
+            raise LexerError(
+                "Unexpected end of string. Closing delimiter not found", *self.get_line_info()
+            )
 
-            # Check for closing short_string delimiter
-            if not is_long_string and char == delimiter:
-                break
+        if not is_raw_string and "\\" in token:
+            token = self.decode_escapes(token, start, is_byte_string)
+        elif "\r" in token:
+            token = token.replace("\r\n", "\r")
 
-            token += char
+        self.advance_cursor(end + len(delimiter) - 1)
 
         return token
 
+    def decode_escapes(self, token, start, is_byte_string):
+        """
+        Decodes the escape sequences of a string that starts at *start* in code, in a single pass
+        over the string.
+
+        Like in Python, `\\u`, `\\U` and `\\N` are not escape sequences in byte strings, and
+        unknown escape sequences are left as they are.
+        """
+
+        def raise_error(match, message):
+            self.advance_cursor(start + match.start())
+            raise LexerError(message, *self.get_line_info())
+
+        def decode(match):
+            escape = match.group(1)
+
+            # A `\r\n` newline is kept as `\r`, the character `eat_char` returns for it.
+            if escape is None:
+                return "\r"
+
+            char = SIMPLE_ESCAPES.get(escape)
+
+            if char is not None:
+                return char
+
+            kind = escape[0]
+
+            if is_oct_digit(ord(kind)):
+                codepoint = int(escape, 8)
+
+                if is_byte_string and codepoint > 0xFF:
+                    raise_error(match, f"Invalid octal escape sequence: \\{escape}")
+
+                return chr(codepoint)
+
+            if kind == "x":
+                if len(escape) < 3:
+                    raise_error(match, "Truncated \\xXX escape sequence")
+
+                return chr(int(escape[1:], 16))
+
+            if is_byte_string:
+                return match.group()
+
+            if kind == "u" or kind == "U":
+                digit_count = 4 if kind == "u" else 8
+
+                if len(escape) < digit_count + 1:
+                    raise_error(match, f"Truncated \\{kind}{'X' * digit_count} escape sequence")
+
+                codepoint = int(escape[1:], 16)
+
+                if codepoint > 0x10FFFF:
+                    raise_error(match, f"Invalid Unicode codepoint in escape sequence: \\{escape}")
+
+                return chr(codepoint)
+
+            if kind == "N":
+                try:
+                    return unicodedata.lookup(escape[2:-1])
+                except KeyError:
+                    raise_error(match, f"Unknown Unicode character name: \\{escape}")
+
+            return match.group()
+
+        return ESCAPE_PATTERN.sub(decode, token)
+
     def lex_digit_part(self, digit_check, number_type="integer", raise_if_empty=True):
         """
         Consume digits
@@ -0,0 +1,305 @@
+"""
+Parallel lexing of large code split at top-level lines.
+
+The lexer state at the start of a line that begins at column 0 outside brackets and strings only
+depends on the indent factor and indent space kind, which never change once the first indent of
+the code sets them. So the code can be split at those lines into chunks that are lexed
+independently in a process pool and then joined back together.
+
+Every chunk after the first one is lexed along with the newline that comes before it, so that the
+lexer sees the same characters around the chunk start as it would in the whole code, and with its
+row set to the row of the newline, so that its tokens and errors have the same rows. The NEWLINE
+token of that extra newline is dropped. The end of a chunk gives the same DEDENT tokens as the
+next line at column 0 would.
+
+A chunk is lexed again in the main process with the right indent factor and indent space kind if
+it was lexed without them and they could have made a difference. If lexing a chunk fails, the code
+from the start of that chunk to the end is lexed in the main process, since the error can come
+from a token that goes on in the next chunks, like an unclosed long string. This way the tokens and
+errors are always the same as the ones the lexer gives for the whole code.
+"""
+
+import os
+import re
+from array import array
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor
+from compiler.errors import LexerError
+from compiler.interner import Interner
+from compiler.options import CompilerOptions
+from compiler.lexer.lexer import Lexer, Token, TokenKind, IndentSpaceKind
+
+
+# Matches the parts of code that can hide the start of a top-level line, and newlines followed by
+# a character at column 0.
+SPLIT_PATTERN = r"""
+    (?P<long_string>'''(?:[^'\\]|\\.|'(?!''))*'''|\"\"\"(?:[^"\\]|\\.|"(?!""))*\"\"\")
+    | (?P<string>'(?:[^'\\\r\n]|\\(?:\r\n|.))*'|"(?:[^"\\\r\n]|\\(?:\r\n|.))*")
+    | (?P<comment>\#[^\r\n]*)
+    | (?P<open_bracket>[(\[{])
+    | (?P<close_bracket>[)\]}])
+    | (?P<line_join>\\(?:\r\n?|\n))
+    | (?P<newline>(?:\r\n?|\n)(?=[^ \t\r\n]))
+"""
+
+STR_SPLIT_PATTERN = re.compile(SPLIT_PATTERN, re.VERBOSE | re.DOTALL)
+
+BYTES_SPLIT_PATTERN = re.compile(SPLIT_PATTERN.encode("ascii"), re.VERBOSE | re.DOTALL)
+
+TOKEN_KINDS = tuple(TokenKind)
+
+CLOSE_BRACKETS = {"(": ")", "[": "]", "{": "}", b"(": b")", b"[": b"]", b"{": b"}"}
+
+# Code shorter than this is not worth sending to other processes.
+MIN_CHUNK_LENGTH = 1 << 16
+
+# Chunks per process, so that processes that finish early can take more chunks.
+CHUNKS_PER_JOB = 4
+
+
+def find_split_points(code, chunk_count):
+    """
+    Returns the offsets of up to `chunk_count - 1` top-level line starts that split code into
+    chunks of about the same length.
+
+    Brackets are tracked the way the lexer tracks them: a closing bracket only closes the last
+    open bracket if it matches it.
+    """
+    pattern = STR_SPLIT_PATTERN if isinstance(code, str) else BYTES_SPLIT_PATTERN
+    code_length = len(code)
+    target_length = code_length // chunk_count
+    next_target = target_length
+    close_brackets = []
+    split_points = []
+
+    for match in pattern.finditer(code):
+        group = match.lastgroup
+
+        if group == "open_bracket":
+            close_brackets.append(CLOSE_BRACKETS[match.group()])
+
+        elif group == "close_bracket":
+            if close_brackets and close_brackets[-1] == match.group():
+                close_brackets.pop()
+
+        elif group == "newline" and not close_brackets and match.end() >= next_target:
+            split_points.append(match.end())
+            next_target = match.end() + target_length
+
+            if len(split_points) == chunk_count - 1:
+                break
+
+    return split_points
+
+
+def count_newlines(chunk):
+    """
+    Returns the number of newlines in chunk, with `\\r\\n` counted once like the lexer does.
+    """
+    if isinstance(chunk, str):
+        return chunk.count("\n") + chunk.count("\r") - chunk.count("\r\n")
+
+    return chunk.count(b"\n") + chunk.count(b"\r") - chunk.count(b"\r\n")
+
+
+def has_leading_spaces(chunk):
+    """
+    Checks if a line of chunk starts with a space or tab, since only those lines are checked
+    against the indent space kind.
+    """
+    if isinstance(chunk, str):
+        return re.search(r"[\r\n][ \t]", chunk) is not None
+
+    return re.search(rb"[\r\n][ \t]", chunk) is not None
+
+
+def lex_chunk(chunk, row, compiler_opts, indent_factor=-1, indent_space_type=None):
+    """
+    Lexes a chunk that starts at *row* and returns its tokens, and the final indent factor and
+    indent space kind of the lexer.
+
+    Chunks after the first one start with the newline before their first line, so their row is
+    more than 0 and the NEWLINE token of that newline is dropped.
+    """
+    lexer = Lexer.create(chunk, compiler_opts)
+    lexer.indent_factor = indent_factor
+    lexer.indent_space_type = indent_space_type or IndentSpaceKind.UNKNOWN
+
+    if row > 0:
+        lexer.row = row - 1
+        tokens = lexer.lex()[1:]
+    else:
+        tokens = lexer.lex()
+
+    return tokens, lexer.indent_factor, lexer.indent_space_type
+
+
+def lex_chunk_in_process(chunk, row, compiler_opts):
+    """
+    Same as `lex_chunk`, but returns the tokens as columns of their data, kinds, rows and
+    columns, which are a lot faster to send back from another process than `Token` objects. The
+    columns are None instead of raising a `LexerError`, which cannot be sent back.
+    """
+    try:
+        tokens, indent_factor, indent_space_type = lex_chunk(chunk, row, compiler_opts)
+    except LexerError:
+        return None, -1, IndentSpaceKind.UNKNOWN
+
+    columns = (
+        [token.data for token in tokens],
+        bytes([token.kind.value for token in tokens]),
+        array("I", [token.row for token in tokens]),
+        array("i", [token.column for token in tokens]),
+    )
+
+    return columns, indent_factor, indent_space_type
+
+
+def tokens_from_columns(columns, interner):
+    """
+    Recreates the tokens sent back by `lex_chunk_in_process`. Identifiers are interned again
+    since the symbol IDs given in another process are not the same.
+    """
+    data, kinds, rows, columns = columns
+    identifier = TokenKind.IDENTIFIER.value
+    intern = interner.intern
+
+    return [
+        Token(
+            token_data,
+            TOKEN_KINDS[kind],
+            row,
+            column,
+            intern(token_data) if kind == identifier else None,
+        )
+        for token_data, kind, row, column in zip(data, kinds, rows, columns)
+    ]
+
+
+class ParallelLexer:
+    """
+    Lexes large code in a pool of processes and gives the same tokens as `Lexer`.
+
+        tokens = ParallelLexer(code, jobs=4).lex()
+
+    `Lexer.create` selects it when `CompilerOptions.lexer_jobs` is not 1. Each process uses
+    the lexer engine selected in the compiler options. Code shorter than `MIN_CHUNK_LENGTH` per
+    process is lexed in the current process.
+    """
+
+    def __init__(self, code, compiler_opts=None, jobs=None):
+        compiler_opts = compiler_opts or CompilerOptions()
+        self.code = code
+        self.compiler_opts = compiler_opts
+        self.jobs = jobs or compiler_opts.lexer_jobs or os.cpu_count() or 1
+
+        # Options for the lexers of the chunks, which must not be parallel lexers themselves.
+        self.chunk_opts = copy(compiler_opts)
+        self.chunk_opts.lexer_jobs = 1
+
+        # The intern table is not sent to other processes, their tokens are interned again.
+        self.process_opts = copy(self.chunk_opts)
+        self.process_opts.interner = Interner()
+
+    def lex(self):
+        """ Breaks code into tokens that the parser can digest """
+        return list(self.iter_tokens())
+
+    def lex_buffer(self):
+        """ Breaks code into tokens stored in a compact `TokenBuffer` """
+        from compiler.lexer.buffer import TokenBuffer
+
+        code = self.code
+
+        # Only `ByteLexer` knows the byte offsets of tokens, so they are found in decoded code.
+        if not isinstance(code, str):
+            code = str(code, "utf-8")
+
+        return TokenBuffer.from_tokens(
+            code, ParallelLexer(code, self.compiler_opts, self.jobs).iter_tokens()
+        )
+
+    def split(self):
+        """
+        Returns the chunks of code with the newline before each of them, and their start rows and
+        start offsets. Returns only the whole code if it is not worth splitting.
+        """
+        code = self.code
+        chunk_count = min(self.jobs * CHUNKS_PER_JOB, len(code) // MIN_CHUNK_LENGTH)
+
+        if self.jobs < 2 or chunk_count < 2:
+            return [code], [0], [0]
+
+        split_points = find_split_points(code, chunk_count)
+        starts = [0] + [split_point - 1 for split_point in split_points]
+        ends = split_points + [len(code)]
+        chunks = [code[start:end] for start, end in zip(starts, ends)]
+        rows = [0]
+
+        for index, chunk in enumerate(chunks[:-1]):
+            # The newline at the start of a chunk is counted by the chunk before it.
+            rows.append(rows[-1] + count_newlines(chunk) - (index > 0))
+
+        return chunks, rows, starts
+
+    def lex_rest(self, start, row, indent_factor, indent_space_type):
+        """
+        Lexes the code from the start of a chunk to the end in the current process and returns its
+        tokens, or raises the error the lexer gives for the whole code.
+        """
+        return lex_chunk(
+            self.code[start:], row, self.chunk_opts, indent_factor, indent_space_type
+        )[0]
+
+    def iter_tokens(self):
+        """
+        Breaks code into tokens, yielding the tokens of each chunk once all chunks before it
+        have been lexed.
+        """
+        chunks, rows, starts = self.split()
+
+        if len(chunks) == 1:
+            yield from Lexer.create(self.code, self.chunk_opts).iter_tokens()
+            return
+
+        indent_factor, indent_space_type = -1, IndentSpaceKind.UNKNOWN
+
+        with ProcessPoolExecutor(min(self.jobs, len(chunks))) as executor:
+            results = executor.map(
+                lex_chunk_in_process, chunks, rows, [self.process_opts] * len(chunks)
+            )
+
+            for chunk, row, start, (columns, chunk_indent_factor, chunk_indent_space_type) in zip(
+                chunks, rows, starts, results
+            ):
+                # Lex the rest of the code if the chunk failed, so that the error is the one the
+                # lexer gives for the whole code.
+                if columns is None:
+                    yield from self.lex_rest(start, row, indent_factor, indent_space_type)
+                    return
+
+                # Lex the chunk again if it was lexed without the indent factor and indent space
+                # kind set by the chunks before it and they can affect it.
+                if (
+                    indent_factor > 0
+                    and (
+                        chunk_indent_factor != indent_factor
+                        or chunk_indent_space_type != indent_space_type
+                    )
+                    and (chunk_indent_factor > 0 or has_leading_spaces(chunk))
+                ):
+                    try:
+                        tokens, chunk_indent_factor, chunk_indent_space_type = lex_chunk(
+                            chunk, row, self.chunk_opts, indent_factor, indent_space_type
+                        )
+                    except LexerError:
+                        yield from self.lex_rest(start, row, indent_factor, indent_space_type)
+                        return
+                else:
+                    tokens = tokens_from_columns(columns, self.chunk_opts.interner)
+
+                if chunk_indent_factor > 0:
+                    indent_factor = chunk_indent_factor
+                    indent_space_type = chunk_indent_space_type
+
+                yield from tokens
@@ -0,0 +1,196 @@
+"""
+A lexer engine built on one compiled master regular expression.
+
+It produces exactly the same tokens as `Lexer`. The master pattern matches the common tokens in a
+single step (names, plain integers, plain strings, operators, delimiters, spaces, comments and the
+start of each line), while indentation, bracket and block tracking reuse `Lexer`'s methods once per
+matched line or bracket.
+
+Anything the master pattern does not match, like floats, prefixed strings, strings with `\r` or
+escape sequences in them, non-ASCII identifiers, line continuations or invalid characters, falls
+back to `Lexer.lex_char`. This way rare and erroneous constructs are lexed and reported exactly
+like they are in `Lexer`.
+"""
+
+import re
+from compiler.lexer.lexer import Lexer, Token, TokenKind
+from compiler.lexer.valid import is_keyword
+
+
+MASTER_PATTERN = re.compile(
+    r"""
+      (?P<space>[ \t]+)
+    | (?P<newline>(?:\r\n|\r|\n)[ \t]*)
+    | (?P<comment>\#[^\r\n]*)
+    | (?P<prefixed_string>(?:rb|rf|[fbru])['"])
+    | (?P<name>[A-Za-z_][A-Za-z0-9_]*(?![A-Za-z0-9_]|[^\x00-\x7f]))
+    | (?P<integer>[1-9][0-9]*(?![0-9_.e])|0(?![0-9_.ebox]))
+    | (?P<string>'(?!'')[^'\\\r\n]*'|"(?!"")[^"\\\r\n]*")
+    | (?P<long_string>'{3}(?:[^'\\\r]|'(?!''))*'{3}|"{3}(?:[^"\\\r]|"(?!""))*"{3})
+    | (?P<operator>
+        //=|>>=|<<=|\|\|=
+        |->|\+=|-=|\*=|/=|%=|&=|\|=|\^=
+        |>=|>>|<=|<<|//|\|\||\*\*|==|@=|!=
+        |[-+*/%&|^~<>²√]
+    )
+    | (?P<delimiter>[,;@=]|\.(?![0-9]))
+    | (?P<bracket>[()\[\]{}:])
+    """,
+    re.VERBOSE,
+)
+
+# Characters that can come right before the coefficient part of a literal like `2x` or `(2)x`.
+COEFFICIENT_PREV_CHARS = frozenset("0123456789abcdefABCDEF)")
+
+DELIMITER_OPERATORS = {
+    "//=",
+    ">>=",
+    "<<=",
+    "||=",
+    "->",
+    "+=",
+    "-=",
+    "*=",
+    "/=",
+    "%=",
+    "&=",
+    "|=",
+    "^=",
+}
+
+
+class RegexLexer(Lexer):
+    """
+    Tokenizes code like `Lexer`, but matches a whole token at a time with `MASTER_PATTERN` instead
+    of walking the code one character at a time.
+
+    Select it with `CompilerOptions.lexer_engine = "regex"` and `Lexer.create`.
+    """
+
+    def iter_tokens(self):
+        """
+        Breaks code string into tokens, yielding each token as soon as it can no longer change.
+
+        NOTE:
+            The cursor, row and column are kept in local variables while matching and are only
+            synced with the lexer's fields around calls to `Lexer` methods.
+        """
+        code = self.code
+        code_length = self.code_length
+        match = MASTER_PATTERN.match
+        tokens = []
+        append = tokens.append
+        intern = self.interner.intern
+        cursor, row, column = self.cursor, self.row, self.column
+
+        while cursor + 1 < code_length:
+            position = cursor + 1
+            result = match(code, position)
+            group = result.lastgroup if result else None
+
+            if group == "name":
+                """
+                ========= IDENTIFIER | KEYWORD | OPERATOR | IMAGINARY =========
+                """
+                token = result.group()
+                cursor = result.end() - 1
+                token_kind = TokenKind.KEYWORD if is_keyword(token) else TokenKind.IDENTIFIER
+                prev_char = code[position - 1] if position > 0 else None
+
+                if prev_char in COEFFICIENT_PREV_CHARS:
+                    self.cursor, self.row, self.column = cursor, row, cursor - position + column + 1
+                    token, token_kind = self.lex_coefficient(
+                        token, token_kind, prev_char, (row, column), tokens
+                    )
+
+                column += cursor - position + 1
+                symbol = intern(token) if token_kind == TokenKind.IDENTIFIER else None
+                append(Token(token, token_kind, row, column, symbol))
+
+            elif group == "space" or group == "comment":
+                cursor = result.end() - 1
+                column += cursor - position + 1
+
+            elif group == "operator":
+                token = result.group()
+                cursor = result.end() - 1
+                column += cursor - position + 1
+                token_kind = (
+                    TokenKind.DELIMITER if token in DELIMITER_OPERATORS else TokenKind.OPERATOR
+                )
+                append(Token(token, token_kind, row, column))
+
+            elif group == "delimiter":
+                cursor = position
+                column += 1
+                append(Token(code[position], TokenKind.DELIMITER, row, column))
+
+            elif group == "newline":
+                """
+                ========= NEWLINE | INDENT | DEDENT =========
+                """
+                indentation = result.group().lstrip("\r\n")
+                space_count = len(indentation)
+                prev_space = indentation[-1:]
+
+                cursor = result.end() - 1
+                row += 1
+                column = space_count - 1
+
+                self.cursor, self.row, self.column = cursor, row, column
+                self.lex_indentation(
+                    space_count, indentation != prev_space * space_count, prev_space, tokens
+                )
+
+            elif group == "bracket":
+                self.cursor, self.row, self.column = position, row, column + 1
+                self.lex_delimiter(code[position], tokens)
+                cursor, row, column = self.cursor, self.row, self.column
+
+            elif group == "integer":
+                token = result.group()
+                cursor = result.end() - 1
+                column += cursor - position + 1
+                append(Token(token, TokenKind.DEC_INTEGER, row, column))
+
+            elif group == "string":
+                token = result.group()
+                cursor = result.end() - 1
+                column += cursor - position + 1
+                append(Token(token[1:-1], TokenKind.STRING, row, column))
+
+            elif group == "long_string":
+                token = result.group()
+                cursor = result.end() - 1
+                last_newline = code.rfind("\n", position, cursor)
+
+                if last_newline < 0:
+                    column += cursor - position + 1
+                else:
+                    row += token.count("\n")
+                    column = cursor - last_newline - 1
+
+                append(Token(token[3:-3], TokenKind.STRING, row, column))
+
+            else:
+                # Fall back to lexing the token character by character.
+                self.cursor, self.row, self.column = cursor, row, column
+                self.lex_char(self.eat_char(), tokens)
+                cursor, row, column = self.cursor, self.row, self.column
+
+            # Release all tokens except the last one which can still be mutated.
+            if len(tokens) > 1:
+                last_token = tokens.pop()
+                yield from tokens
+                tokens.clear()
+                append(last_token)
+
+        self.cursor, self.row, self.column = cursor, row, column
+
+        # Checking possible dedents at the end of code
+        prev_indent = self.indentations[-1].indentation_count
+        if prev_indent > 0:
+            for i in range(prev_indent // self.indent_factor):
+                tokens.append(Token('', TokenKind.DEDENT, *self.get_line_info()))
+
+        yield from tokens
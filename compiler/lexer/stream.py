@@ -0,0 +1,54 @@
+"""
+A token source that the parser can pull tokens from on demand.
+"""
+
+
+class TokenStream(list):
+    """
+    A list of tokens that is filled lazily from a token iterator like `Lexer.iter_tokens()`.
+
+    It subclasses list so that already pulled tokens can still be indexed directly by the parser.
+    Tokens are only pulled from the iterator when the parser asks for an index it has not seen yet.
+    """
+
+    def __init__(self, token_iterator):
+        super().__init__()
+        self.token_iterator = token_iterator
+
+    def __repr__(self):
+        return f"TokenStream({list.__repr__(self)})"
+
+    def fill(self, index):
+        """
+        Pulls tokens from the iterator until the token at `index` is available.
+        Returns False if the iterator gets exhausted before that.
+        """
+
+        if index < len(self):
+            return True
+
+        if self.token_iterator is None:
+            return False
+
+        append = self.append
+
+        for token in self.token_iterator:
+            append(token)
+
+            if index < len(self):
+                return True
+
+        self.token_iterator = None
+
+        return index < len(self)
+
+    def exhaust(self):
+        """
+        Pulls all the remaining tokens from the iterator.
+        """
+
+        if self.token_iterator is not None:
+            self.extend(self.token_iterator)
+            self.token_iterator = None
+
+        return self
@@ -1,63 +1,137 @@
 """
 Contains some of the legal characters, tokens and keywords allowed by the
 Lexer
+
+The predicates here run on almost every character of the code, so they look characters up in
+precomputed tables instead of comparing them one by one:
+    - ASCII characters are classified with `ASCII_CLASSES`, a 128-entry table of class flags.
+    - Non-ASCII identifier characters are found by bisecting the sorted Unicode ranges in
+      `compiler/lexer/unicode_ranges.py`, which are generated from `unicodedata` ahead of time
+      since going through all Unicode codepoints takes a while.
+    - Keywords, operators, delimiters and spaces are frozensets.
 """
 
+import unicodedata
+from bisect import bisect_right
+from compiler.lexer.unicode_ranges import (
+    IDENTIFIER_START_RANGES,
+    IDENTIFIER_CONTINUATION_RANGES,
+)
+
+
+KEYWORDS = frozenset(
+    (
+        "False",
+        "None",
+        "True",
+        "and",
+        "as",
+        "assert",
+        "async",
+        "await",
+        "break",
+        "class",
+        "continue",
+        "def",
+        "del",
+        "elif",
+        "else",
+        "except",
+        "finally",
+        "for",
+        "from",
+        "global",
+        "if",
+        "import",
+        "in",
+        "is",
+        "lambda",
+        "nonlocal",
+        "not",
+        "or",
+        "pass",
+        "raise",
+        "return",
+        "try",
+        "while",
+        "with",
+        "yield",
+        "const",
+        "ref",
+        "ptr",
+        "val",
+        "match",
+        "let",
+        "var",
+        "enum",
+        "interface",
+        "where",
+        "macro",
+        "typealias",
+    )
+)
+
+SINGLE_CHAR_OPERATORS = frozenset("+-*/%&|^~<>²√")
+
+SINGLE_CHAR_DELIMITERS = frozenset("()[]{},:.;@=")
+
+HORIZONTAL_SPACES = frozenset(" \t")
+
+SPACES = frozenset(" \t\n\r")
+
+# Escape sequences that stand for a single character, or none for an escaped newline.
+SIMPLE_ESCAPES = {
+    "\\": "\\",
+    "'": "'",
+    '"': '"',
+    "a": "\a",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+    "\n": "",
+    "\r": "",
+    "\r\n": "",
+}
+
+# Class flags of ASCII characters.
+IDENTIFIER_START = 1
+IDENTIFIER_CONTINUATION = 2
+HEX_DIGIT = 4
+
+
+def create_ascii_classes():
+    classes = [0] * 128
+
+    for char in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_":
+        classes[ord(char)] |= IDENTIFIER_START | IDENTIFIER_CONTINUATION
+
+    for char in "0123456789":
+        classes[ord(char)] |= IDENTIFIER_CONTINUATION | HEX_DIGIT
+
+    for char in "ABCDEFabcdef":
+        classes[ord(char)] |= HEX_DIGIT
+
+    return tuple(classes)
+
+
+ASCII_CLASSES = create_ascii_classes()
+
+
+def is_in_ranges(codepoint, ranges):
+    starts, ends = ranges
+    index = bisect_right(starts, codepoint) - 1
+    return index > -1 and codepoint <= ends[index]
+
 
 def is_keyword(token):
-    return (
-        token == "False"
-        or token == "None"
-        or token == "True"
-        or token == "and"
-        or token == "as"
-        or token == "assert"
-        or token == "async"
-        or token == "await"
-        or token == "break"
-        or token == "class"
-        or token == "continue"
-        or token == "def"
-        or token == "del"
-        or token == "elif"
-        or token == "else"
-        or token == "except"
-        or token == "finally"
-        or token == "for"
-        or token == "from"
-        or token == "global"
-        or token == "if"
-        or token == "import"
-        or token == "in"
-        or token == "is"
-        or token == "lambda"
-        or token == "nonlocal"
-        or token == "not"
-        or token == "or"
-        or token == "pass"
-        or token == "raise"
-        or token == "return"
-        or token == "try"
-        or token == "while"
-        or token == "with"
-        or token == "yield"
-        or token == "const"
-        or token == "ref"
-        or token == "ptr"
-        or token == "val"
-        or token == "match"
-        or token == "let"
-        or token == "var"
-        or token == "enum"
-        or token == "interface"
-        or token == "where"
-        or token == "macro"
-        or token == "typealias"
-    )
+    return token in KEYWORDS
 
 
 def is_hex_digit(codepoint):
-    return 47 < codepoint < 58 or 64 < codepoint < 71 or 96 < codepoint < 103
+    return -1 < codepoint < 128 and ASCII_CLASSES[codepoint] & HEX_DIGIT != 0
 
 
 def is_bin_digit(codepoint):
@@ -82,7 +156,7 @@ def is_horizontal_space(char):
 
     https://en.wikipedia.org/wiki/Template:Whitespace_(Unicode)
     """
-    return char == " " or char == "\t"
+    return char in HORIZONTAL_SPACES
 
 
 def is_space(char):
@@ -91,63 +165,55 @@ def is_space(char):
 
     https://en.wikipedia.org/wiki/Template:Whitespace_(Unicode)
     """
-    return char == " " or char == "\t" or char == "\n" or char == "\r"
+    return char in SPACES
 
 
 def is_identifier_start(char):
     """
-    TODO: Check if a character is of the following Unicode categories:
-        Lu, Ll, Lt, Lm, Lo, Nl, _
+    Checks if a character is `_` or of the following Unicode categories:
+        Lu, Ll, Lt, Lm, Lo, Nl
 
     https://unicode.org/reports/tr15/#Introduction
     """
     codepoint = ord(char)
-    # Currently [A-Za-z_]
-    return (64 < codepoint < 91) or (char == "_") or (96 < codepoint < 123)
+
+    if codepoint < 128:
+        return ASCII_CLASSES[codepoint] & IDENTIFIER_START != 0
+
+    return is_in_ranges(codepoint, IDENTIFIER_START_RANGES)
 
 
 def is_identifier_continuation(char):
     """
-    TODO: Check if a character is of the following Unicode categories:
-        Lu, Ll, Lt, Lm, Lo, Nl, Mn, Mc, Nd, Pc, _
+    Checks if a character is `_` or of the following Unicode categories:
+        Lu, Ll, Lt, Lm, Lo, Nl, Mn, Mc, Nd, Pc
 
     https://unicode.org/reports/tr15/#Introduction
     """
     codepoint = ord(char)
-    # Currently [A-Za-z0-9_]
-    return is_identifier_start(char) or (47 < codepoint < 58)
+
+    if codepoint < 128:
+        return ASCII_CLASSES[codepoint] & IDENTIFIER_CONTINUATION != 0
+
+    return is_in_ranges(codepoint, IDENTIFIER_CONTINUATION_RANGES)
+
+
+def normalize_identifier(token):
+    """
+    Normalizes an identifier using NFKC normalization form, so that identifiers that look the same
+    are the same. ASCII identifiers are already normalized.
+
+    https://unicode.org/reports/tr15/#Norm_Forms
+    """
+    if token.isascii():
+        return token
+
+    return unicodedata.normalize("NFKC", token)
 
 
 def is_single_char_operator(char):
-    return (
-        char == "+"
-        or char == "-"
-        or char == "*"
-        or char == "/"
-        or char == "%"
-        or char == "&"
-        or char == "|"
-        or char == "^"
-        or char == "~"
-        or char == "<"
-        or char == ">"
-        or char == "²"
-        or char == "√"
-    )
+    return char in SINGLE_CHAR_OPERATORS
 
 
 def is_single_char_delimiter(char):
-    return (
-        char == "("
-        or char == ")"
-        or char == "["
-        or char == "]"
-        or char == "{"
-        or char == "}"
-        or char == ","
-        or char == ":"
-        or char == "."
-        or char == ";"
-        or char == "@"
-        or char == "="
-    )
+    return char in SINGLE_CHAR_DELIMITERS
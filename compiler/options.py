@@ -1,11 +1,24 @@
 from copy import deepcopy
+from compiler.interner import Interner
 
 class CompilerOptions:
     def __init__(self, target_code=None):
         self.verbose = False
         self.target_code = target_code
+        self.lexer_engine = "character"  # "character" | "regex"
+        self.lexer_jobs = 1  # Processes used to lex large code. 0 uses all cores.
+        self.interner = Interner()  # Gives identifiers their symbol IDs in this compilation.
+        # Token positions the parser memoizes before cutting its memo at a top-level statement.
+        # None never cuts.
+        self.parser_memo_budget = 4096
+        # Names of the parser rules that are not memoized. None uses the parser's default profile.
+        self.unmemoized_rules = None
+        self.parser_stats = False  # Records calls, memo hits and backtracks of each parser rule.
+        self.parser_jobs = 1  # Processes used to parse large code. 0 uses all cores.
+        self.ast_cache = False  # Reads and writes the .ram AST cache files of source files.
 
     def __repr__(self):
-        fields = deepcopy(vars(self))
+        # The intern table is not an option. Symbol IDs are written out as their names instead.
+        fields = deepcopy({key: val for key, val in vars(self).items() if key != "interner"})
         string = ", ".join([f"{repr(key)}: {repr(val)}" for key, val in fields.items()])
         return "{" + string + "}"
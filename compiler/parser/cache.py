@@ -0,0 +1,269 @@
+"""
+Binary AST cache files (.ram, Raccoon Metadata) of parsed modules.
+
+The cache file of a module is `.ram/<file name>.ram` in the folder of the module. It holds the
+tokens and the AST of the module and is keyed by the hash of the source code and the compiler
+version, so that a module that has not changed skips the lexer and the parser on rebuild.
+
+A cache file starts with `RAM_MAGIC`, followed by:
+    - The size of the header as a 4-byte little-endian integer.
+    - The header, a marshalled tuple of the key, the offsets after the token data and after each
+      top-level statement, and the CRC-32 checksums of the token data and of each statement.
+    - The token data, a marshalled tuple of the data, kinds, rows and columns of the tokens.
+    - The top-level statements, each marshalled on its own so that it is only decoded when it is
+      first accessed.
+
+The token data and the statements are compressed with zlib, which makes the files about four
+times smaller and takes much less time to undo than decoding them. The checksums are checked when
+the file is loaded, so a damaged file is parsed again instead of failing when a statement is first
+accessed.
+
+An AST node is encoded as a tuple of its class ID and its fields in `__slots__` order. A tuple
+field starts with `TUPLE_TAG` and an enum field is `(ENUM_TAG, enum ID, value)`. marshal reads
+and writes these tuples in C, which is much faster than building the nodes from a byte format
+decoded in Python.
+"""
+
+import hashlib
+import marshal
+import mmap
+import os
+import zlib
+from enum import Enum
+from itertools import accumulate
+from pathlib import Path
+from compiler import __version__
+from compiler.ast.ast import (
+    AST_CLASSES,
+    AST_CLASS_IDS,
+    AST_ENUM_CLASSES,
+    ENUM_CLASS_IDS,
+    LazyList,
+    Program,
+)
+from compiler.lexer import Lexer
+from compiler.lexer.lexer import Token, TokenKind
+from compiler.options import CompilerOptions
+from compiler.parser.parser import Parser
+
+RAM_MAGIC = b"RAM\x02"
+
+TUPLE_TAG = -1
+ENUM_TAG = -2
+
+TOKEN_KINDS = tuple(TokenKind)
+
+# The fastest zlib level, since files are read far more often than they are written.
+COMPRESSION_LEVEL = 1
+
+# Changes to the AST classes change the key too, so that older files are not decoded into the
+# wrong nodes.
+AST_LAYOUT_HASH = hashlib.sha256(
+    repr([(node_class.__name__, node_class.__slots__) for node_class in AST_CLASSES]).encode()
+).hexdigest()[:16]
+
+
+def get_cache_path(source_path):
+    """
+    Returns the path of the cache file of a source file.
+    """
+
+    source_path = Path(source_path)
+    return source_path.parent / ".ram" / f"{source_path.name}.ram"
+
+
+def get_key(code):
+    """
+    Returns the key of the cache file of code, which can be a string or UTF-8 encoded bytes.
+    """
+
+    if isinstance(code, str):
+        code = code.encode("utf-8")
+
+    return f"{__version__}:{AST_LAYOUT_HASH}:{hashlib.sha256(code).hexdigest()}"
+
+
+def encode(value):
+    """
+    Encodes an AST, or a field of one, into tuples, lists and scalars that marshal can write.
+    """
+
+    value_type = type(value)
+
+    if (class_id := AST_CLASS_IDS.get(value_type)) is not None:
+        return (class_id, *[encode(getattr(value, field)) for field in value_type.__slots__])
+
+    if value_type == list or isinstance(value, LazyList):
+        return [encode(item) for item in value]
+
+    if value_type == tuple:
+        return (TUPLE_TAG, *[encode(item) for item in value])
+
+    if isinstance(value, Enum):
+        return (ENUM_TAG, ENUM_CLASS_IDS[value_type], value.value)
+
+    return value
+
+
+def decode(value):
+    """
+    Rebuilds an AST, or a field of one, from the value `encode` gives.
+    """
+
+    value_type = type(value)
+
+    if value_type == tuple:
+        tag = value[0]
+
+        if tag >= 0:
+            node_class = AST_CLASSES[tag]
+            node = node_class.__new__(node_class)
+
+            for field, item in zip(node_class.__slots__, value[1:]):
+                setattr(node, field, decode(item))
+
+            return node
+
+        if tag == TUPLE_TAG:
+            return tuple(decode(item) for item in value[1:])
+
+        return AST_ENUM_CLASSES[value[1]](value[2])
+
+    if value_type == list:
+        return [decode(item) for item in value]
+
+    return value
+
+
+class LazyStatements(LazyList):
+    """
+    The top-level statements of a memory-mapped cache file, decoded when they are first accessed.
+    """
+
+    def __init__(self, data, offsets):
+        super().__init__(len(offsets) - 1)
+        self.data = data
+        self.offsets = offsets
+
+    def load_item(self, index):
+        data = self.data[self.offsets[index] : self.offsets[index + 1]]
+        return decode(marshal.loads(zlib.decompress(data)))
+
+
+def dump_program(program, tokens, code, file):
+    """
+    Writes the cache of a program parsed from the tokens of code to a binary file.
+    """
+
+    token_data = (
+        [token.data for token in tokens],
+        bytes(token.kind.value for token in tokens),
+        [token.row for token in tokens],
+        [token.column for token in tokens],
+    )
+    blobs = [
+        zlib.compress(marshal.dumps(value), COMPRESSION_LEVEL)
+        for value in (token_data, *map(encode, program.statements))
+    ]
+    header = marshal.dumps(
+        (
+            get_key(code),
+            list(accumulate(len(blob) for blob in blobs)),
+            [zlib.crc32(blob) for blob in blobs],
+        )
+    )
+
+    file.write(RAM_MAGIC)
+    file.write(len(header).to_bytes(4, "little"))
+    file.write(header)
+
+    for blob in blobs:
+        file.write(blob)
+
+
+def load_program(path, code, compiler_opts=None):
+    """
+    Returns the program and the tokens in the cache file at path, or None if there is no cache
+    file, it is not the one of code for this compiler or it is damaged.
+
+    The file is memory-mapped and only the tokens are decoded, the statements of the program are
+    decoded when they are first accessed. Identifiers are interned in `compiler_opts.interner`.
+    """
+
+    compiler_opts = compiler_opts or CompilerOptions()
+
+    try:
+        with open(path, "rb") as file:
+            if file.read(len(RAM_MAGIC)) != RAM_MAGIC:
+                return None
+
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError:
+        return None
+
+    start = len(RAM_MAGIC) + 4
+    header_end = start + int.from_bytes(data[len(RAM_MAGIC) : start], "little")
+
+    try:
+        key, offsets, checksums = marshal.loads(data[start:header_end])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+    if key != get_key(code):
+        return None
+
+    offsets = [header_end, *[header_end + offset for offset in offsets]]
+
+    if len(checksums) != len(offsets) - 1 or offsets[-1] != len(data) or any(
+        zlib.crc32(data[blob_start:blob_end]) != checksum
+        for blob_start, blob_end, checksum in zip(offsets, offsets[1:], checksums)
+    ):
+        return None
+
+    try:
+        datas, kinds, rows, columns = marshal.loads(zlib.decompress(data[offsets[0] : offsets[1]]))
+    except (zlib.error, EOFError, ValueError, TypeError):
+        return None
+
+    intern = compiler_opts.interner.intern
+    identifier = TokenKind.IDENTIFIER.value
+    tokens = [
+        Token(
+            token_data,
+            TOKEN_KINDS[kind],
+            row,
+            column,
+            intern(token_data) if kind == identifier else None,
+        )
+        for token_data, kind, row, column in zip(datas, kinds, rows, columns)
+    ]
+
+    return Program(LazyStatements(data, offsets[1:])), tokens
+
+
+def parse_module(source_path, code, compiler_opts=None):
+    """
+    Returns the program and the tokens of the code of a source file, from its cache file if it is
+    the one of code. Otherwise the code is lexed and parsed, and the cache file is written.
+    """
+
+    compiler_opts = compiler_opts or CompilerOptions()
+
+    cache_path = get_cache_path(source_path)
+
+    if (cached := load_program(cache_path, code, compiler_opts)) is not None:
+        return cached
+
+    tokens = Lexer.create(code, compiler_opts).lex_buffer()
+    program = Parser(tokens, compiler_opts).parse()
+
+    # The file is written next to the cache file and moved over it, so that a build running at
+    # the same time never reads a file that is half written.
+    cache_path.parent.mkdir(exist_ok=True)
+    temporary_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}")
+
+    with open(temporary_path, "wb") as file:
+        dump_program(program, tokens, code, file)
+
+    os.replace(temporary_path, cache_path)
+    return program, tokens
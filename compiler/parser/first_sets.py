@@ -0,0 +1,254 @@
+"""
+FIRST sets of the rules in `compiler/parser/parser.grammar`, and dispatch tables built from them.
+
+The FIRST set of a rule holds the tokens that it can start with. A token is in it as its data,
+like `'def'` or `'('`, or as its `TokenKind` for the rules that match a kind of token, like
+`identifier`. A rule that can match without consuming a token, or that the grammar does not
+define, has `ANY_TOKEN` in its FIRST set, so that it is tried before any token.
+
+A `DispatchTable` uses the FIRST sets of the alternatives of a rule to only try the alternatives
+that can start with the next token, in their original order.
+"""
+
+import re
+from pathlib import Path
+from compiler.lexer import TokenKind
+
+
+GRAMMAR_PATH = Path(__file__).with_name("parser.grammar")
+
+# Marks that a rule can start with any token.
+ANY_TOKEN = "<any token>"
+
+# The token kinds matched by the rules that match a single token.
+LEXICAL_RULES = {
+    "identifier": TokenKind.IDENTIFIER,
+    "newline": TokenKind.NEWLINE,
+    "indent": TokenKind.INDENT,
+    "dedent": TokenKind.DEDENT,
+    "dec_integer": TokenKind.DEC_INTEGER,
+    "bin_integer": TokenKind.BIN_INTEGER,
+    "oct_integer": TokenKind.OCT_INTEGER,
+    "hex_integer": TokenKind.HEX_INTEGER,
+    "dec_float": TokenKind.DEC_FLOAT,
+    "imag_integer": TokenKind.DEC_INTEGER_IMAG,
+    "imag_float": TokenKind.DEC_FLOAT_IMAG,
+    "string": TokenKind.STRING,
+    "byte_string": TokenKind.BYTE_STRING,
+    "prefixed_string": TokenKind.PREFIXED_STRING,
+}
+
+GRAMMAR_TOKEN_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"|[A-Za-z_]\w*|[()|?*+]")
+
+
+def read_grammar(path=GRAMMAR_PATH):
+    """
+    Returns the alternatives of each rule of a grammar file, with each alternative as a list of
+    grammar tokens: quoted terminals, rule names, parentheses, `|`, `?`, `*` and `+`.
+    """
+
+    grammar = {}
+    alternatives = None
+
+    for line in Path(path).read_text().splitlines():
+        line = line.split(" #", 1)[0].rstrip()
+
+        if not line:
+            continue
+
+        if not line[0].isspace():
+            alternatives = grammar[re.match(r"\w+", line).group()] = []
+        elif line.lstrip().startswith("|") and alternatives is not None:
+            alternatives.append(GRAMMAR_TOKEN_PATTERN.findall(line.lstrip()[1:]))
+
+    return grammar
+
+
+class FirstSets:
+    """
+    Computes the FIRST sets of the rules of a grammar.
+
+    *extra_first_tokens* adds tokens to the FIRST sets of some rules, for rules that the parser
+    implements more leniently than the grammar describes.
+    """
+
+    def __init__(self, grammar, extra_first_tokens=None):
+        extra_first_tokens = extra_first_tokens or {}
+        self.grammar = grammar
+        self.first_sets = {name: set(extra_first_tokens.get(name, ())) for name in grammar}
+        self.nullable = set()
+
+        # The FIRST sets of recursive rules depend on each other, so they are grown until they
+        # stop changing.
+        changed = True
+
+        while changed:
+            changed = False
+
+            for name, alternatives in grammar.items():
+                if name in LEXICAL_RULES:
+                    continue
+
+                first_set = self.first_sets[name]
+                size = len(first_set)
+                nullable = False
+
+                for alternative in alternatives:
+                    nullable |= self.add_sequence_first(alternative, first_set)
+
+                if len(first_set) != size or (nullable and name not in self.nullable):
+                    changed = True
+
+                    if nullable:
+                        self.nullable.add(name)
+
+    def get_rule_first(self, name):
+        """
+        Returns the FIRST set of a rule name and whether the rule is nullable.
+        """
+
+        if name in LEXICAL_RULES:
+            return {LEXICAL_RULES[name]}, False
+
+        if name not in self.grammar:
+            return {ANY_TOKEN}, True
+
+        return self.first_sets[name], name in self.nullable
+
+    def add_sequence_first(self, tokens, first_set):
+        """
+        Adds the FIRST set of a sequence of grammar tokens to *first_set*, and returns whether the
+        sequence is nullable.
+        """
+
+        index = 0
+
+        while index < len(tokens):
+            token = tokens[index]
+
+            if token == "(":
+                end = self.find_group_end(tokens, index)
+                item_first = set()
+                item_nullable = False
+
+                for alternative in self.split_group(tokens[index + 1 : end]):
+                    item_nullable |= self.add_sequence_first(alternative, item_first)
+
+                index = end + 1
+            elif token[0] in "'\"":
+                item_first, item_nullable = {token[1:-1]}, False
+                index += 1
+            else:
+                item_first, item_nullable = self.get_rule_first(token)
+                index += 1
+
+            # `?` and `*` make an item optional.
+            if index < len(tokens) and tokens[index] in "?*+":
+                item_nullable |= tokens[index] != "+"
+                index += 1
+
+            first_set |= item_first
+
+            if not item_nullable:
+                return False
+
+        return True
+
+    @staticmethod
+    def find_group_end(tokens, start):
+        depth = 0
+
+        for index in range(start, len(tokens)):
+            if tokens[index] == "(":
+                depth += 1
+            elif tokens[index] == ")":
+                depth -= 1
+
+                if depth == 0:
+                    return index
+
+        return len(tokens)
+
+    @staticmethod
+    def split_group(tokens):
+        """
+        Splits the tokens inside a group at its top-level `|`s.
+        """
+
+        alternatives = [[]]
+        depth = 0
+
+        for token in tokens:
+            if token == "|" and depth == 0:
+                alternatives.append([])
+                continue
+
+            depth += (token == "(") - (token == ")")
+            alternatives[-1].append(token)
+
+        return alternatives
+
+    def get_alternative_firsts(self, name):
+        """
+        Returns the FIRST set of each alternative of a rule, with `ANY_TOKEN` in it if the
+        alternative is nullable.
+        """
+
+        firsts = []
+
+        for alternative in self.grammar[name]:
+            first_set = set()
+
+            if self.add_sequence_first(alternative, first_set):
+                first_set.add(ANY_TOKEN)
+
+            firsts.append(frozenset(first_set))
+
+        return firsts
+
+
+class DispatchTable:
+    """
+    Maps the next token to the alternatives of a rule that can start with it, in their original
+    order, so that the parser does not try the ones that cannot.
+
+    Since `consume_string` only compares token data, a token can start an alternative because of
+    its data, like any keyword or delimiter, or because of its kind. The alternatives for each
+    pair of terminal data and kind are worked out once and cached.
+    """
+
+    def __init__(self, alternatives, first_sets):
+        if len(alternatives) != len(first_sets):
+            raise ValueError("Each alternative needs a FIRST set")
+
+        self.alternatives = tuple(alternatives)
+        self.first_sets = first_sets
+        self.terminals = frozenset(
+            token for first_set in first_sets for token in first_set if type(token) == str
+        )
+        self.end_alternatives = self.select(lambda first_set: ANY_TOKEN in first_set)
+        self.cache = {}
+
+    def select(self, predicate):
+        return tuple(
+            alternative
+            for alternative, first_set in zip(self.alternatives, self.first_sets)
+            if predicate(first_set)
+        )
+
+    def get(self, token):
+        """
+        Returns the alternatives that can start with *token*.
+        """
+
+        data = token.data if token.data in self.terminals else None
+        key = (data, token.kind)
+        alternatives = self.cache.get(key)
+
+        if alternatives is None:
+            kind = token.kind
+            alternatives = self.cache[key] = self.select(
+                lambda first_set: ANY_TOKEN in first_set or data in first_set or kind in first_set
+            )
+
+        return alternatives
@@ -0,0 +1,450 @@
+"""
+A PEG parser generator that writes parser functions like the ones of `Parser` from the rules of
+`compiler/parser/parser.grammar`.
+
+The grammar has no semantic actions, so the AST node built by an alternative is given as an
+action: a format string of the values of its items, numbered from 0. A terminal's value is the
+index of its token, which is what `Operator` takes. Without an action, an alternative returns the
+value of its only rule item, or a list of the values of its rule items.
+
+    generator = ParserGenerator(actions={"global_statement": ["Globals([{1}] + {2})"]})
+    print(generator.generate(["global_statement"]))
+
+The generated functions are optimized like the hand-written ones:
+    - Rules that match a single token, like `identifier` and `integer`, are inlined as a `consume`
+      of their token kinds, and rules that match one of a few terminals as a
+      `consume_any_string`.
+    - Rules that only rename another rule are inlined as that rule.
+    - Only the rules that are not in *unmemoized_rules* are memoized.
+
+Groups with more than one alternative, and groups that are optional or repeated, become helper
+functions named after their rule, like `global_statement_group_1`.
+
+Run `python -m compiler.parser.generator RULE...` to print the functions of some rules, for
+example to start the parser function of a new rule.
+"""
+
+import builtins
+import keyword
+import click
+from compiler.parser.first_sets import LEXICAL_RULES, FirstSets, read_grammar
+from compiler.parser import parser as parser_module
+from compiler.parser.parser import Parser, DEFAULT_UNMEMOIZED_RULES
+
+
+ORDINALS = (
+    "FIRST",
+    "SECOND",
+    "THIRD",
+    "FOURTH",
+    "FIFTH",
+    "SIXTH",
+    "SEVENTH",
+    "EIGHTH",
+    "NINTH",
+    "TENTH",
+    "ELEVENTH",
+    "TWELFTH",
+)
+
+MAX_LINE_LENGTH = 100
+
+# Names that generated values must not shadow.
+RESERVED_NAMES = frozenset(("self", "cursor", "row", "column"))
+
+
+def parse_items(tokens):
+    """
+    Returns the items of a sequence of grammar tokens as `(kind, value, suffix)` tuples, where
+    kind is "terminal", "rule" or "group", and the value of a group is the items of each of its
+    alternatives.
+    """
+
+    items = []
+    index = 0
+
+    while index < len(tokens):
+        token = tokens[index]
+
+        if token == "(":
+            end = FirstSets.find_group_end(tokens, index)
+            alternatives = FirstSets.split_group(tokens[index + 1 : end])
+            item = ["group", [parse_items(alternative) for alternative in alternatives]]
+            index = end + 1
+        elif token[0] in "'\"":
+            item = ["terminal", token[1:-1]]
+            index += 1
+        else:
+            item = ["rule", token]
+            index += 1
+
+        suffix = ""
+
+        if index < len(tokens) and tokens[index] in ("?", "*", "+"):
+            suffix = tokens[index]
+            index += 1
+
+        items.append((*item, suffix))
+
+    return items
+
+
+def format_items(items):
+    """
+    Returns the grammar text of items.
+    """
+
+    parts = []
+
+    for kind, value, suffix in items:
+        if kind == "terminal":
+            part = f"'{value}'"
+        elif kind == "rule":
+            part = value
+        else:
+            part = f"({' | '.join(format_items(alternative) for alternative in value)})"
+
+        parts.append(part + suffix)
+
+    return " ".join(parts)
+
+
+def format_strings(strings):
+    """
+    Returns the code of a tuple of strings.
+    """
+
+    code = ", ".join(f'"{string}"' for string in strings)
+    return f"({code},)" if len(strings) == 1 else f"({code})"
+
+
+def split_arguments(code):
+    """
+    Splits the arguments of a call at its top-level commas.
+    """
+
+    arguments = [""]
+    depth = 0
+
+    for char in code:
+        if char == "," and depth == 0:
+            arguments.append("")
+            continue
+
+        depth += (char in "([{") - (char in ")]}")
+        arguments[-1] += char
+
+    return [argument.strip() for argument in arguments]
+
+
+def format_call(head, code, tail, indent):
+    """
+    Returns the lines of `head + code + tail`, with the arguments of the call or the items of the
+    list in code on their own lines if it does not fit on one line.
+    """
+
+    line = f"{indent}{head}{code}{tail}"
+
+    if len(line) <= MAX_LINE_LENGTH or code[-1] not in ")]" or code[-2:] in ("()", "[]"):
+        return [line]
+
+    start = code.index("(" if code[-1] == ")" else "[")
+
+    return [
+        f"{indent}{head}{code[: start + 1]}",
+        *(f"{indent}    {argument}," for argument in split_arguments(code[start + 1 : -1])),
+        f"{indent}{code[-1]}{tail}",
+    ]
+
+
+def format_condition(head, condition, tail, indent):
+    """
+    Returns the lines of a condition, which is code or a `(name, code)` tuple that is checked
+    with `(name := code) is not None`.
+    """
+
+    if type(condition) == str:
+        return format_call(head, condition, tail, indent)
+
+    name, code = condition
+    line = f"{indent}{head}({name} := {code}) is not None{tail}"
+
+    if len(line) <= MAX_LINE_LENGTH:
+        return [line]
+
+    return [
+        f"{indent}{head}(",
+        *format_call(f"{name} := ", code, "", indent + "    "),
+        f"{indent}) is not None{tail}",
+    ]
+
+
+def get_class_name(rule):
+    """
+    Returns the name of the AST class of a token rule, like `ImagFloat` for `imag_float`.
+    """
+
+    return "".join(word.capitalize() for word in rule.split("_"))
+
+
+class ParserGenerator:
+    """
+    Generates parser functions from the rules of a grammar, as read by `read_grammar`.
+
+    *actions* maps rule names to the action of each of their alternatives, or None for an
+    alternative that has no action.
+    """
+
+    def __init__(self, grammar=None, actions=None, unmemoized_rules=DEFAULT_UNMEMOIZED_RULES):
+        self.grammar = read_grammar() if grammar is None else grammar
+        self.actions = actions or {}
+        self.unmemoized_rules = frozenset(unmemoized_rules)
+        self.rules = {
+            name: [parse_items(alternative) for alternative in alternatives]
+            for name, alternatives in self.grammar.items()
+        }
+
+    def get_inline_code(self, rule, inlining=()):
+        """
+        Returns the code that a reference to a rule is inlined as, or None if the rule is called.
+        """
+
+        if rule in LEXICAL_RULES:
+            token_kind = LEXICAL_RULES[rule].name
+            return f"self.consume(TokenKind.{token_kind}, result_type={get_class_name(rule)})"
+
+        alternatives = self.rules.get(rule)
+
+        if not alternatives or rule in inlining:
+            return None
+
+        if not all(len(items) == 1 and not items[0][2] for items in alternatives):
+            return None
+
+        kinds = {kind for items in alternatives for kind, _, _ in items}
+
+        if kinds == {"terminal"}:
+            strings = [items[0][1] for items in alternatives]
+            return f"self.consume_any_string({format_strings(strings)})"
+
+        if kinds != {"rule"}:
+            return None
+
+        names = [items[0][1] for items in alternatives]
+
+        # Token rules are merged into one `consume` if they build the same AST node.
+        if all(name in LEXICAL_RULES for name in names) and hasattr(
+            parser_module, get_class_name(rule)
+        ):
+            token_kinds = ", ".join(f"TokenKind.{LEXICAL_RULES[name].name}" for name in names)
+            return f"self.consume({token_kinds}, result_type={get_class_name(rule)})"
+
+        if len(names) == 1:
+            return self.get_inline_code(names[0], (*inlining, rule)) or f"self.{names[0]}()"
+
+        return None
+
+    def generate(self, rules):
+        """
+        Returns the code of the parser functions of rules and their helper functions, indented
+        to go in the body of `Parser`.
+        """
+
+        return "\n".join(self.generate_rule(rule) for rule in rules)
+
+    def generate_rule(self, rule, alternatives=None, is_helper=False):
+        """
+        Returns the code of the parser function of a rule, followed by its helper functions.
+        """
+
+        alternatives = self.rules[rule] if alternatives is None else alternatives
+        actions = self.actions.get(rule) or [None] * len(alternatives)
+        helpers = []
+        lines = ["    @backtrackable"]
+
+        if not is_helper and rule not in self.unmemoized_rules:
+            lines.append("    @memoize")
+
+        lines.extend([f"    def {rule}(self):", '        """'])
+
+        if len(alternatives) == 1:
+            lines.append(f"        rule = {format_items(alternatives[0])}")
+        else:
+            lines.append("        rule =")
+            lines.extend(f"            | {format_items(items)}" for items in alternatives)
+
+        lines.extend(['        """', ""])
+
+        inline_code = not is_helper and self.get_inline_code(rule)
+
+        if inline_code:
+            lines.extend([*format_call("return ", inline_code, "", "        "), ""])
+            return "\n".join(lines)
+
+        if len(alternatives) > 1:
+            lines.extend(["        cursor, row, column = self.cursor, *self.get_line_info()", ""])
+
+        for index, (items, action) in enumerate(zip(alternatives, actions)):
+            if len(alternatives) > 1:
+                ordinal = ORDINALS[index] if index < len(ORDINALS) else f"#{index + 1}"
+                lines.append(f"        # {ordinal} ALTERNATIVE")
+
+                if index > 0:
+                    lines.append("        self.revert(cursor, row, column)")
+
+            lines.extend(self.generate_alternative(rule, items, action, helpers))
+            lines.append("")
+
+        lines.extend(["        return None", ""])
+
+        for helper, helper_alternatives in helpers:
+            lines.append(self.generate_rule(helper, helper_alternatives, True))
+
+        return "\n".join(lines)
+
+    def generate_alternative(self, rule, items, action, helpers):
+        """
+        Returns the lines of an alternative, which return its result if it matches. Groups that
+        need helper functions are added to *helpers* as `(name, alternatives)`.
+        """
+
+        lines = []
+        conditions = []
+        names = set(RESERVED_NAMES)
+        values = []
+        rule_values = []
+        indent = "        "
+
+        def get_name(name):
+            if keyword.iskeyword(name) or hasattr(builtins, name):
+                name += "_"
+
+            unique_name, number = name, 1
+
+            while unique_name in names:
+                number += 1
+                unique_name = f"{name}_{number}"
+
+            names.add(unique_name)
+            return unique_name
+
+        def flush_conditions():
+            nonlocal indent
+
+            if len(conditions) == 1:
+                lines.extend(format_condition("if ", conditions[0], ":", indent))
+            elif conditions:
+                lines.append(f"{indent}if (")
+
+                for index, condition in enumerate(conditions):
+                    head = "and " if index else ""
+                    lines.extend(format_condition(head, condition, "", indent + "    "))
+
+                lines.append(f"{indent}):")
+
+            if conditions:
+                indent += "    "
+                conditions.clear()
+
+        # A group that is a plain sequence is the same as its items.
+        flat_items = []
+
+        for kind, value, suffix in items:
+            if kind == "group" and len(value) == 1 and not suffix:
+                flat_items.extend(value[0])
+            else:
+                flat_items.append((kind, value, suffix))
+
+        needs_terminal_values = action is not None or all(
+            kind == "terminal" for kind, _, _ in flat_items
+        )
+
+        for kind, value, suffix in flat_items:
+            if kind == "terminal":
+                code, name = f'self.consume_string("{value}")', "token"
+            elif kind == "rule":
+                code, name = self.get_inline_code(value) or f"self.{value}()", value
+            elif all(len(group) == 1 and group[0][0] == "terminal" for group in value):
+                strings = [group[0][1] for group in value]
+                code, name = f"self.consume_any_string({format_strings(strings)})", "token"
+                kind = "terminal"
+            else:
+                helper = f"{rule}_group_{len(helpers) + 1}"
+                helpers.append((helper, value))
+                code, name = f"self.{helper}()", "group"
+
+            # Inlined `consume`s advance even when they fail, so the functions are called instead
+            # of them where failing must not move the cursor.
+            if suffix and kind == "rule" and code.startswith("self.consume("):
+                code = f"self.{value}()"
+
+            if not suffix:
+                if kind == "terminal" and not needs_terminal_values:
+                    conditions.append(f"{code} is not None")
+                    values.append("None")
+                    continue
+
+                name = get_name(name)
+                conditions.append((name, code))
+            elif suffix == "?":
+                flush_conditions()
+                name = get_name(name)
+                lines.extend(format_call(f"{name} = ", code, "", indent))
+            else:
+                flush_conditions()
+                item_name = get_name(name)
+                name = get_name(f"{name}_list")
+                lines.append(f"{indent}{name} = []")
+                lines.extend(format_condition("while ", (item_name, code), ":", indent))
+                lines.append(f"{indent}    {name}.append({item_name})")
+                lines.append("")
+
+                if suffix == "+":
+                    conditions.append(name)
+
+            values.append(name)
+
+            if kind != "terminal":
+                rule_values.append(name)
+
+        flush_conditions()
+
+        if action is not None:
+            result = action.format(*values)
+        else:
+            result_values = rule_values or [value for value in values if value != "None"]
+            result = (
+                result_values[0]
+                if len(result_values) == 1
+                else f"[{', '.join(result_values)}]"
+            )
+
+        lines.append(f"{indent}return {result}")
+
+        return lines
+
+    def create_parser(self, rules, base=Parser):
+        """
+        Returns a subclass of *base* with the generated parser functions of rules, for trying
+        rules without adding them to `Parser`.
+        """
+
+        namespace = dict(vars(parser_module))
+        namespace.update(backtrackable=Parser.backtrackable, memoize=Parser.memoize, Base=base)
+        exec(f"class GeneratedParser(Base):\n{self.generate(rules)}", namespace)
+
+        return namespace["GeneratedParser"]
+
+
+@click.command()
+@click.argument("rules", nargs=-1, required=True)
+def main(rules):
+    """
+    Prints the generated parser functions of RULES.
+    """
+
+    click.echo(ParserGenerator().generate(rules))
+
+
+if __name__ == "__main__":
+    main()
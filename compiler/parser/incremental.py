@@ -0,0 +1,136 @@
+"""
+Incremental reparsing of a program after an edit, reusing the top-level statements that the edit
+did not change.
+
+A top-level statement is parsed the same way from the same tokens wherever it starts, since the
+memo is cut between top-level statements and nothing else is carried over from the statements
+before it. So after an edit:
+    - The statements that end before the edit are reused as they are.
+    - The statements from the one the edit starts in are parsed again from the new tokens, until
+      a statement ends past the edit exactly where an old statement started.
+    - The old statements from there on are reused with their token indices shifted by the
+      change in the number of tokens.
+
+The statement ends that `Parser.program` records in `Parser.statement_ends` tell where each
+top-level statement ends, with the newlines before a statement counted as part of it. They are
+kept next to the program rather than in it, since they are not part of the AST.
+
+    parser = Parser(tokens)
+    program, statement_ends = parser.program(), parser.statement_ends
+    program, statement_ends = reparse(program, statement_ends, tokens, new_tokens)
+
+If parsing the old tokens stopped before their end, like it does for code that is still being
+typed, the parser looked past its last statement for a longer one that failed. That statement is
+parsed again too, since the edit can complete that longer statement.
+"""
+
+from bisect import bisect_left
+from compiler import CompilerOptions
+from compiler.ast.ast import Program, shift_token_indices
+from compiler.lexer import TokenKind
+from compiler.parser.parser import Parser
+
+# Tokens past the end of a statement that its parser functions can look at, like the `else` an
+# `if` statement checks for after its body. An edit this close to a statement reparses it.
+LOOKAHEAD_TOKENS = 2
+
+
+def find_token_edit(old_tokens, new_tokens):
+    """
+    Returns the edit that turns old tokens into new tokens as `(start, old_end, new_end)`, where
+    `old_tokens[start:old_end]` is replaced by `new_tokens[start:new_end]`. Tokens are compared by
+    data and kind, since the rows and columns of the tokens after an edit can change.
+    """
+
+    length = min(len(old_tokens), len(new_tokens))
+    start = 0
+
+    while (
+        start < length
+        and old_tokens[start].data == new_tokens[start].data
+        and old_tokens[start].kind == new_tokens[start].kind
+    ):
+        start += 1
+
+    old_end, new_end = len(old_tokens), len(new_tokens)
+
+    while (
+        old_end > start
+        and new_end > start
+        and old_tokens[old_end - 1].data == new_tokens[new_end - 1].data
+        and old_tokens[old_end - 1].kind == new_tokens[new_end - 1].kind
+    ):
+        old_end -= 1
+        new_end -= 1
+
+    return start, old_end, new_end
+
+
+def is_parsed_to_end(tokens, statement_ends):
+    """
+    Checks if the statements of a program cover all of its tokens but the newlines and dedents at
+    the end.
+    """
+
+    position = statement_ends[-1] if statement_ends else 0
+
+    while position < len(tokens) and tokens[position].kind in (
+        TokenKind.NEWLINE,
+        TokenKind.DEDENT,
+    ):
+        position += 1
+
+    return position == len(tokens)
+
+
+def reparse(program, statement_ends, old_tokens, new_tokens, edit=None, compiler_opts=None):
+    """
+    Returns the program of new tokens, which are old tokens after an edit, and its statement
+    ends, reusing the statements of the program of the old tokens that the edit did not change.
+    The edit is found with `find_token_edit` if it is not given.
+
+    The statements of the old program are reused without being copied, so the old program
+    must not be used afterwards. It is parsed again from scratch if statement_ends is None.
+    """
+
+    compiler_opts = compiler_opts or CompilerOptions()
+
+    if statement_ends is None:
+        parser = Parser(new_tokens, compiler_opts)
+        return parser.program(), parser.statement_ends
+
+    start, old_end, new_end = edit or find_token_edit(old_tokens, new_tokens)
+    offset = new_end - old_end
+    old_ends = statement_ends
+
+    # The first statement that ends too close to the edit to be reused.
+    first = bisect_left(old_ends, start - LOOKAHEAD_TOKENS + 1)
+
+    if not is_parsed_to_end(old_tokens, old_ends):
+        first = min(first, max(len(old_ends) - 1, 0))
+
+    statements = program.statements[:first]
+    ends = old_ends[:first]
+
+    parser = Parser(new_tokens, compiler_opts)
+    parser.seek(ends[-1] if ends else 0)
+
+    for statement in parser.iter_statements():
+        position = parser.cursor + 1
+        statements.append(statement)
+        ends.append(position)
+
+        # Past the edit, the rest is parsed like the rest of the old program if an old statement
+        # started here.
+        if position >= new_end:
+            old_index = bisect_left(old_ends, position - offset)
+
+            if old_index < len(old_ends) and old_ends[old_index] == position - offset:
+                for old_statement in program.statements[old_index + 1 :]:
+                    shift_token_indices(old_statement, offset)
+                    statements.append(old_statement)
+
+                ends.extend(end + offset for end in old_ends[old_index + 1 :])
+                break
+
+    return Program(statements), ends
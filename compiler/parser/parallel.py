@@ -0,0 +1,230 @@
+"""
+Parallel parsing of large programs split at top-level lines.
+
+A top-level statement is parsed the same way from the same tokens wherever it starts, since the
+memo is cut between top-level statements. So the tokens can be split at the lines that start at
+indentation level 0, like the `class` and `def` blocks that follow the DEDENT tokens of the ones
+before them, into chunks whose statements are parsed independently in a process pool. Their
+token indices are shifted to the indices of the whole token list before they are sent back.
+
+A chunk is parsed with the few tokens after it that its last statement can look at, and its
+statements are only used if they end at the end of the chunk, where the next chunk starts. A
+chunk whose statements do not line up, like one with a syntax error, is parsed again in the main
+process until a statement ends where another chunk starts. That way the statements are always
+the ones the parser gives for the whole program.
+"""
+
+import os
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor
+from compiler.ast.ast import Program, shift_token_indices
+from compiler.interner import Interner
+from compiler.lexer import TokenKind
+from compiler.options import CompilerOptions
+from compiler.parser.incremental import LOOKAHEAD_TOKENS
+from compiler.parser.parser import Parser
+
+# Programs with fewer tokens than this per process are not worth sending to other processes.
+MIN_CHUNK_TOKENS = 1 << 14
+
+# Chunks per process, so that processes that finish early can take more chunks.
+CHUNKS_PER_JOB = 4
+
+# Keywords that continue the compound statement before them at the same indentation level.
+CONTINUATION_KEYWORDS = frozenset(("elif", "else", "except", "finally"))
+
+
+def find_split_points(tokens, chunk_count):
+    """
+    Returns the indices of up to `chunk_count - 1` tokens that start lines at indentation level 0
+    and split tokens into chunks of about the same length.
+
+    Lines that continue a compound statement, like `else:`, and lines after decorators are
+    skipped, since they never start a statement.
+    """
+
+    target_length = len(tokens) // chunk_count
+    next_target = target_length
+    depth = 0
+    is_line_start = False
+    follows_decorator = False
+    split_points = []
+
+    for index, token in enumerate(tokens):
+        kind = token.kind
+
+        if kind == TokenKind.INDENT:
+            depth += 1
+        elif kind == TokenKind.DEDENT:
+            depth -= 1
+            is_line_start = True
+        elif kind == TokenKind.NEWLINE:
+            is_line_start = True
+        else:
+            if (
+                is_line_start
+                and depth == 0
+                and index >= next_target
+                and not follows_decorator
+                and token.data not in CONTINUATION_KEYWORDS
+            ):
+                split_points.append(index)
+                next_target = index + target_length
+
+                if len(split_points) == chunk_count - 1:
+                    break
+
+            if is_line_start:
+                follows_decorator = token.data == "@"
+
+            is_line_start = False
+
+    return split_points
+
+
+def parse_chunk(tokens, start, end, compiler_opts):
+    """
+    Parses the top-level statements of a chunk that starts at token *start*, from the tokens
+    between *start* and *end* and the ones after them that the last statement can look at.
+
+    Returns the statements that end before *end* and their ends, with their token indices
+    shifted by *start*.
+    """
+
+    parser = Parser(tokens, compiler_opts)
+    statements = []
+    ends = []
+
+    # The main process parses the chunk again if the parser fails on it, which it only does if
+    # the parser fails on the whole program too.
+    try:
+        for statement in parser.iter_statements():
+            if parser.cursor + 1 > end - start:
+                break
+
+            shift_token_indices(statement, start)
+            statements.append(statement)
+            ends.append(parser.cursor + 1 + start)
+    except Exception:
+        pass
+
+    return statements, ends
+
+
+class ParallelParser:
+    """
+    Parses a large program in a pool of processes and gives the same program as `Parser`.
+
+        program = ParallelParser(tokens, jobs=4).program()
+
+    `Parser.parse` uses it when `CompilerOptions.parser_jobs` is not 1. Programs with fewer than
+    `MIN_CHUNK_TOKENS` tokens per process are parsed in the current process.
+    """
+
+    def __init__(self, tokens, compiler_opts=None, jobs=None):
+        compiler_opts = compiler_opts or CompilerOptions()
+        self.tokens = tokens
+        self.compiler_opts = compiler_opts
+        self.jobs = jobs or compiler_opts.parser_jobs or os.cpu_count() or 1
+        self.statement_ends = []
+
+        # The intern table is not sent to other processes, the AST refers to tokens by index.
+        self.process_opts = copy(compiler_opts)
+        self.process_opts.parser_jobs = 1
+        self.process_opts.interner = Interner()
+
+    def skip_newlines(self, position):
+        """
+        Returns the position of the first token at or after position that is not a NEWLINE,
+        which is where the parser starts the next top-level statement.
+        """
+
+        tokens = self.tokens
+
+        while position < len(tokens) and tokens[position].kind == TokenKind.NEWLINE:
+            position += 1
+
+        return position
+
+    def is_complete(self, index, chunk_ends, ends):
+        """
+        Returns whether the statements of a chunk end at its end, with the NEWLINE or DEDENT
+        before it. A statement can end without one at the end of the tokens, which the chunks
+        before the last one do not have.
+        """
+
+        if index == len(ends) - 1:
+            return True
+
+        return (
+            bool(chunk_ends)
+            and self.skip_newlines(chunk_ends[-1]) == ends[index]
+            and self.tokens[ends[index] - 1].kind in (TokenKind.NEWLINE, TokenKind.DEDENT)
+        )
+
+    def program(self):
+        """
+        Parses the tokens into a `Program`, and records the ends of its statements in
+        `statement_ends` like `Parser.program` does.
+        """
+
+        tokens = self.tokens
+        chunk_count = min(self.jobs * CHUNKS_PER_JOB, len(tokens) // MIN_CHUNK_TOKENS)
+
+        if self.jobs < 2 or chunk_count < 2:
+            parser = Parser(tokens, self.compiler_opts)
+            program = parser.program()
+            self.statement_ends = parser.statement_ends
+            return program
+
+        starts = [0, *find_split_points(tokens, chunk_count)]
+        ends = [*starts[1:], len(tokens)]
+
+        with ProcessPoolExecutor(min(self.jobs, len(starts))) as executor:
+            results = list(
+                executor.map(
+                    parse_chunk,
+                    [tokens[start : end + LOOKAHEAD_TOKENS] for start, end in zip(starts, ends)],
+                    starts,
+                    ends,
+                    [self.process_opts] * len(starts),
+                )
+            )
+
+        chunk_indices = {start: index for index, start in enumerate(starts)}
+        statements = []
+        statement_ends = []
+        position = 0
+        index = 0
+
+        while index < len(starts):
+            chunk_statements, chunk_ends = results[index]
+
+            if self.skip_newlines(position) == self.skip_newlines(starts[index]) and (
+                self.is_complete(index, chunk_ends, ends)
+            ):
+                statements.extend(chunk_statements)
+                statement_ends.extend(chunk_ends)
+                position = chunk_ends[-1] if chunk_ends else position
+                index += 1
+                continue
+
+            # Otherwise parse in this process until a statement ends where another chunk starts.
+            parser = Parser(tokens, self.compiler_opts)
+            parser.seek(position)
+            index = None
+
+            for statement in parser.iter_statements():
+                statements.append(statement)
+                position = parser.cursor + 1
+                statement_ends.append(position)
+                index = chunk_indices.get(self.skip_newlines(position))
+
+                if index is not None:
+                    break
+
+            if index is None:
+                break
+
+        self.statement_ends = statement_ends
+        return Program(statements)
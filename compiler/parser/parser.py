@@ -5,6 +5,8 @@ Check `compiler/parser/parser.grammar` for the language's parser grammar specifi
 
 GUIDELINES:
     - Add/edit corresponding rule in grammar file if you are adding/editing a parser function.
+    - `python -m compiler.parser.generator RULE` prints a parser function generated from the
+      grammar rule, which is a good start for a new parser function.
     - Generally before adding/changing your parser function check if you can resuse the code of
       a similar implementation in the code.
     - AST constructors are called with positional arguments. Don't use named arguments, args or
@@ -13,9 +15,12 @@ GUIDELINES:
       convention and to prevent ocassional cases where they are needed and might lead to bugs.
 """
 
+from array import array
 from functools import wraps
-from compiler.lexer import TokenKind
+from compiler.lexer import TokenKind, TokenStream
 from compiler import CompilerOptions
+from compiler.parser.stats import RuleStats
+from compiler.parser.first_sets import FirstSets, DispatchTable, read_grammar
 from compiler.ast import (
     Null,
     Newline,
@@ -91,40 +96,207 @@ from compiler.ast import (
 )
 
 
+# Rule IDs that `Parser.memoize` gives memoized parser functions, keyed by function name, and the
+# names indexed by rule ID.
+RULE_IDS = {}
+RULE_NAMES = []
+
+# Marks a memo slot whose result is not known yet, since None is a valid result.
+NOT_MEMOIZED = object()
+
+# Binary operators of the expression levels from `or_test` to `mul_expr`, from the loosest to the
+# tightest binding level. A tuple is an operator with an optional second token, like `not in`.
+# `not_test` has no binary operators, just postfix `not`s.
+BINARY_OPERATOR_LEVELS = (
+    ("or",),
+    ("and",),
+    (),
+    ("<", ">", "==", ">=", "<=", "!=", "in", ("not", "in"), ("is", "not")),
+    ("|",),
+    ("||",),
+    ("&",),
+    ("<<", ">>"),
+    ("+", "-"),
+    ("*", "@", "/", "%", "//"),
+)
+
+(
+    OR_TEST_LEVEL,
+    AND_TEST_LEVEL,
+    NOT_TEST_LEVEL,
+    COMPARISON_EXPR_LEVEL,
+    OR_EXPR_LEVEL,
+    XOR_EXPR_LEVEL,
+    AND_EXPR_LEVEL,
+    SHIFT_EXPR_LEVEL,
+    SUM_EXPR_LEVEL,
+    MUL_EXPR_LEVEL,
+) = range(len(BINARY_OPERATOR_LEVELS))
+
+# The rule of each level in the grammar.
+BINARY_OPERATOR_LEVEL_RULES = (
+    "or_test",
+    "and_test",
+    "not_test",
+    "comparison_expr",
+    "or_expr",
+    "xor_expr",
+    "and_expr",
+    "shift_expr",
+    "sum_expr",
+    "mul_expr",
+)
+
+# The level and optional second token of each binary operator, keyed by its first token.
+BINARY_OPERATORS = {
+    operator[0] if type(operator) == tuple else operator: (
+        level,
+        operator[1] if type(operator) == tuple else None,
+    )
+    for level, operators in enumerate(BINARY_OPERATOR_LEVELS)
+    for operator in operators
+}
+
+# Rules that are not memoized unless `CompilerOptions.unmemoized_rules` says otherwise. These
+# rules had no memo hits on the benchmark corpus or on deeply nested code, so memoizing them only
+# costs time and memory. The rules that do get hits, like `test`, `identifier` and `lhs`, are what
+# keep the parser from backtracking exponentially on nested brackets.
+DEFAULT_UNMEMOIZED_RULES = frozenset(
+    (
+        "all_string",
+        "argument",
+        "arguments",
+        "assert_statement",
+        "assignment_annotation",
+        "assignment_op",
+        "assignment_statement",
+        "async_statement",
+        "atom",
+        "atom_expr",
+        "atom_trailer",
+        "break_statement",
+        "byte_string",
+        "class_def",
+        "compound_statement",
+        "comprehension_for",
+        "comprehension_if",
+        "continue_statement",
+        "decorated_statement",
+        "decorator_statement",
+        "decorators",
+        "dedent",
+        "dict_or_set",
+        "elif_clause",
+        "else_clause",
+        "expr",
+        "exprs",
+        "float",
+        "flow_statement",
+        "for_if_expr",
+        "for_lhs",
+        "for_statement",
+        "func_def",
+        "func_param",
+        "func_params",
+        "func_suite",
+        "generics_annotation",
+        "global_statement",
+        "identifiers",
+        "if_statement",
+        "import_from",
+        "import_main",
+        "import_statement",
+        "indent",
+        "indentable_expr",
+        "indentable_exprs",
+        "indentable_exprs_or_comprehension",
+        "integer",
+        "lambda_block_def",
+        "lambda_expr_def",
+        "lambda_param",
+        "lhs_argument",
+        "lhs_argument_trailer",
+        "lhs_arguments",
+        "named_expr",
+        "named_expr_or_test",
+        "newline",
+        "nonlocal_statement",
+        "pass_statement",
+        "power_expr",
+        "prefixed_string",
+        "program",
+        "raise_statement",
+        "rest_indentable_exprs",
+        "return_statement",
+        "simple_statement",
+        "small_statement",
+        "statement",
+        "statements",
+        "string",
+        "subscript",
+        "subscript_index",
+        "sync_comprehension_for",
+        "try_statement",
+        "unary_expr",
+        "while_statement",
+        "with_statement",
+        "yield_expr",
+    )
+)
+
+
 class Parser:
     """
     A recursive descent parser with memoizing feature basically making it a packrat parser.
 
     It is designed to have the following properties:
-    - Results of all paths taken are memoized.
+    - Results of all paths taken are memoized. Each memoized parser function has a rule ID and
+      its results are kept in an array indexed by token position, see `memoize`.
+    - Memo arrays are cut after top-level statements, so that the memo does not grow with the
+      size of the code, see `cut_memo`.
+    - Rules that are cheaper to parse again than to memoize are not memoized, see
+      `DEFAULT_UNMEMOIZED_RULES`. `CompilerOptions.parser_stats` records the per-rule statistics
+      that show which rules those are.
     - A parser function result should not hold values, but references to token elements.
-
-    TODO:
-        - Be sure to discard cache after getting program AST
+    - Tokens can be a list or a `TokenStream` which the parser pulls tokens from as it needs them.
+      A `TokenBuffer` also works since indexing it gives a `Token`.
     """
 
-    def __init__(self, tokens, compiler_opts=CompilerOptions()):
+    def __init__(self, tokens, compiler_opts=None):
+        compiler_opts = compiler_opts or CompilerOptions()
         self.tokens = tokens
         self.tokens_length = len(tokens)
         self.cursor = -1
         self.row = 0
         self.column = -1
-        self.cache = {}
+        self.memo = []
+        self.memo_start = 0
+        # Index after the last token of each top-level statement parsed by `program` or
+        # `iter_statements`, for incremental reparsing.
+        self.statement_ends = []
         self.compiler_opts = compiler_opts
+        self.unmemoized_rules = (
+            DEFAULT_UNMEMOIZED_RULES
+            if compiler_opts.unmemoized_rules is None
+            else frozenset(compiler_opts.unmemoized_rules)
+        )
+        self.stats = RuleStats() if compiler_opts.parser_stats else None
         self.revert_data = (self.cursor, *self.get_line_info())
 
     def __repr__(self):
         return f"{type(self).__name__}{vars(self)}"
 
     @staticmethod
-    def from_code(code, compiler_opts=CompilerOptions()):
+    def from_code(code, compiler_opts=None):
         """
-        Creates a parser from code.
+        Creates a parser from code. Tokens are lexed on demand as the parser needs them.
         """
 
+        compiler_opts = compiler_opts or CompilerOptions()
+
         from ..lexer.lexer import Lexer
 
-        tokens = Lexer(code, compiler_opts).lex()
+        tokens = TokenStream(Lexer.create(code, compiler_opts).iter_tokens())
 
         return Parser(tokens, compiler_opts)
 
@@ -135,11 +307,12 @@ class Parser:
 
         from ..lexer.lexer import Lexer
 
-        self.tokens = Lexer(code).lex()
+        self.tokens = TokenStream(Lexer.create(code, self.compiler_opts).iter_tokens())
+        self.tokens_length = 0
 
     def reset(self):
         """
-        Frees resources like cache and tokens and reset fields.
+        Frees resources like memo arrays and tokens and reset fields.
         """
 
         self.tokens = []
@@ -147,12 +320,105 @@ class Parser:
         self.cursor = -1
         self.row = 0
         self.column = -1
-        self.cache = {}
+        self.memo = []
+        self.memo_start = 0
+        self.statement_ends = []
         self.revert_data = (self.cursor, *self.get_line_info())
 
+    def seek(self, position):
+        """
+        Moves the parser to the token at `position` with an empty memo, so that `iter_statements`
+        parses the top-level statements from there. The tokens must be a list.
+        """
+
+        self.cursor = position - 1
+        self.memo = []
+        self.memo_start = position
+        self.statement_ends = []
+
+        if position > 0:
+            token = self.tokens[position - 1]
+            self.row, self.column = token.row, token.column
+        else:
+            self.row, self.column = 0, -1
+
+    def get_memoized_results(self):
+        """
+        Returns the memoized results as a dict of the results at each cursor position keyed by
+        parser function name, each with the cursor position after it.
+
+        This goes through every memo array, so it is only meant for tests and debugging.
+        """
+
+        memoized_results = {}
+
+        for rule, rule_memo in enumerate(self.memo):
+            if rule_memo is None:
+                continue
+
+            results, skips = rule_memo
+
+            for index, result in enumerate(results):
+                if result is not NOT_MEMOIZED:
+                    cursor = self.memo_start + index - 1
+                    memoized_results.setdefault(cursor, {})[RULE_NAMES[rule]] = (
+                        result,
+                        skips[index],
+                    )
+
+        return memoized_results
+
+    def cut_memo(self):
+        """
+        Drops the memoized results at cursor positions before the current one. It is called after
+        each top-level statement, since the parser never backtracks into a statement of the
+        program once it has been parsed.
+
+        The memo is only cut once the results to drop span more token positions than
+        `CompilerOptions.parser_memo_budget`, so that small code is not cut at all and large
+        code is not cut after every statement. A budget of None disables cuts.
+        """
+
+        budget = self.compiler_opts.parser_memo_budget
+        cut_length = self.cursor + 1 - self.memo_start
+
+        if budget is None or cut_length <= budget:
+            return
+
+        for rule_memo in self.memo:
+            if rule_memo is not None:
+                del rule_memo[0][:cut_length]
+                del rule_memo[1][:cut_length]
+
+        self.memo_start += cut_length
+
+    def add_rules(self):
+        """
+        Adds memo arrays for the rules that are new to the parser, or None for the rules it does
+        not memoize, and their statistics counters.
+        """
+
+        for name in RULE_NAMES[len(self.memo) :]:
+            self.memo.append(None if name in self.unmemoized_rules else ([], array("i")))
+
+        if self.stats is not None:
+            self.stats.add_rules(len(RULE_NAMES))
+
     def get_line_info(self):
         return self.row, self.column
 
+    def pull_tokens(self, index):
+        """
+        Pulls tokens from a `TokenStream` until the token at `index` is available.
+        Returns False if there is no token at `index`.
+        """
+
+        if type(self.tokens) == TokenStream and self.tokens.fill(index):
+            self.tokens_length = len(self.tokens)
+            return True
+
+        return False
+
     def revert(self, cursor, row, column):
         """
         Revert parser state
@@ -167,7 +433,7 @@ class Parser:
         Returns the next token and its index then advances the cursor position
         """
 
-        if self.cursor + 1 < self.tokens_length:
+        if self.cursor + 1 < self.tokens_length or self.pull_tokens(self.cursor + 1):
             self.cursor += 1
             token = self.tokens[self.cursor]
 
@@ -185,7 +451,7 @@ class Parser:
         Advances cursor only when next token matches string.
         """
 
-        if self.cursor + 1 < self.tokens_length:
+        if self.cursor + 1 < self.tokens_length or self.pull_tokens(self.cursor + 1):
             token = self.tokens[self.cursor + 1]
 
             if token.data == string:
@@ -197,6 +463,24 @@ class Parser:
 
         return None
 
+    def consume_any_string(self, strings):
+        """
+        Consumes and checks if next token holds the same data as one of `strings`.
+        Advances cursor only when next token matches one of them.
+        """
+
+        if self.cursor + 1 < self.tokens_length or self.pull_tokens(self.cursor + 1):
+            token = self.tokens[self.cursor + 1]
+
+            if token.data in strings:
+                self.cursor += 1
+                self.column = token.column
+                self.row = token.row
+
+                return self.cursor
+
+        return None
+
     def backtrackable(parser):
         """
         A decorator that changes the parser state to it's original state just before a parser
@@ -221,44 +505,95 @@ class Parser:
     def memoize(parser):
         """
         A decorator that memoizes the result of a recursive decent parser.
-        It also reuses cache if available before running the parser.
+        It also reuses a memoized result if available before running the parser.
+
+        The parser function gets the rule ID of its name, which indexes its memo arrays in
+        `Parser.memo`: the results at each token position and the cursor positions after them.
+        Index 0 is the position of cursor `memo_start - 1`. The arrays are filled with
+        `NOT_MEMOIZED`, grown as the parser gets further and cut by `cut_memo`. Rules that are
+        not memoized have None instead of memo arrays.
         """
 
+        rule = RULE_IDS.get(parser.__name__)
+
+        if rule is None:
+            rule = RULE_IDS[parser.__name__] = len(RULE_NAMES)
+            RULE_NAMES.append(parser.__name__)
+
         @wraps(parser)
         def wrapper(self, *args):
-            # Get info about parser function.
-            cursor = self.cursor
-            parser_name = parser.__name__
-
-            # Check cache if parser function result is already saved
-            cursor_key = self.cache.get(cursor)
-
-            if cursor_key:
-                # Catching KeyError here because, None is a valid result value.
-                try:
-                    result = cursor_key[parser_name]
-                    self.cursor = result[1]
-                    return result[0]
-                except KeyError:
-                    pass
+            memo = self.memo
 
-            # Otherwise go ahead and parse, then cache result
-            parser_result = parser(self, *args)
-            skip = self.cursor
+            if rule >= len(memo):
+                self.add_rules()
+
+            rule_memo = memo[rule]
+            stats = self.stats
+
+            if stats is not None:
+                stats.calls[rule] += 1
+
+            if rule_memo is None:
+                parser_result = parser(self, *args)
+
+                if stats is not None and parser_result is None:
+                    stats.backtracks[rule] += 1
+
+                return parser_result
+
+            results, skips = rule_memo
+            position = self.cursor + 1
+            index = position - self.memo_start
+
+            # Check memo array if parser function result is already saved
+            if 0 <= index < len(results):
+                result = results[index]
 
-            if not cursor_key:
-                self.cache[cursor] = {parser_name: (parser_result, skip)}
+                if result is not NOT_MEMOIZED:
+                    if stats is not None:
+                        stats.hits[rule] += 1
+                        stats.backtracks[rule] += result is None
+
+                    self.cursor = skips[index]
+                    return result
             else:
-                # Catching KeyError here because, None is a valid result value.
-                try:
-                    cursor_key[parser_name]
-                except KeyError:
-                    self.cache[cursor][parser_name] = (parser_result, skip)
+                # Grow geometrically, but not past the last position of the tokens pulled so far.
+                length = min(
+                    max(index + 1, 2 * len(results)), self.tokens_length + 1 - self.memo_start
+                )
+                results.extend([NOT_MEMOIZED] * (length - len(results)))
+                skips.extend(array("i", [-1]) * (length - len(skips)))
+
+            # Otherwise go ahead and parse, then memoize result
+            parser_result = parser(self, *args)
+
+            if stats is not None:
+                stats.misses[rule] += 1
+                stats.backtracks[rule] += parser_result is None
+
+            # The position is gone if the memo was cut or reset while parsing, as it is for the
+            # rules that parse the whole program.
+            index = position - self.memo_start
+
+            # Keep the result of a recursive call at the same position, if any.
+            if 0 <= index < len(results) and results[index] is NOT_MEMOIZED:
+                results[index] = parser_result
+                skips[index] = self.cursor
 
             return parser_result
 
         return wrapper
 
+    def get_alternatives(self, dispatch_table):
+        """
+        Returns the alternatives of a `DispatchTable` that can start with the next token.
+        """
+
+        if self.cursor + 1 < self.tokens_length or self.pull_tokens(self.cursor + 1):
+            return dispatch_table.get(self.tokens[self.cursor + 1])
+
+        return dispatch_table.end_alternatives
+
     def consume(self, *args, result_type):
         """
         Checks and consumes the next token if it is of the TokenKinds passed to the function
@@ -457,98 +792,103 @@ class Parser:
 
         return result
 
-    def binary_expr(self, operand_parser, operators):
+    def operator_expr(self, min_level):
         """
-        Helper function for parsing left-associative binary expressions.
-        NOTE:
-            Not bactrackable because it is called once by backtrackable functions
+        Parses the binary expressions of the levels in `BINARY_OPERATOR_LEVELS` from *min_level*
+        up, and the postfix `not`s of `not_test`, by precedence climbing. It gives the same
+        result as the cascade of rules from `or_test` down to `mul_expr`, where each rule parses
+        the next one as its operand, but only parses each operand with `unary_expr` once.
+
+        An operator can be taken if its level is from *min_level* up to `max_level`. Its right
+        operand is parsed at the next level, which takes the operators that bind tighter. Like
+        in the cascade:
+            - After an operator, only operators of its level or looser can follow, since the
+              tighter ones were taken by the right operand.
+            - When the right operand fails, the operator stays consumed and only looser
+              operators can follow. If there is no left operand either, the parser reverts to
+              the start, since the level fails.
+            - A missing left operand does not stop the operators from being taken.
         """
 
-        result = operand_parser()
+        start_state = (self.cursor, *self.get_line_info())
+        result = self.unary_expr()
+        max_level = MUL_EXPR_LEVEL
 
-        while True:
-            operator = None
-            rem_operator = None
-
-            for i in operators:
-                if type(i) == tuple:
-                    # Fetch the two elements in tuple.
-                    operator = self.consume_string(i[0])
-                    rem_operator = self.consume_string(i[1])
-                    if operator is not None or rem_operator is not None:
-                        break
+        while self.cursor + 1 < self.tokens_length or self.pull_tokens(self.cursor + 1):
+            data = self.tokens[self.cursor + 1].data
+            operator = BINARY_OPERATORS.get(data)
+
+            if operator is not None and min_level <= operator[0] <= max_level:
+                level, second_token = operator
+                operator_index = self.eat_token()[0]
+                rem_operator = self.consume_string(second_token) if second_token else None
+
+                if level == MUL_EXPR_LEVEL:
+                    rhs = self.unary_expr()
                 else:
-                    if (operator := self.consume_string(i)) is not None:
-                        break
+                    rhs = self.operator_expr(level + 1)
 
-            if operator is None:
-                break
+                if rhs is None:
+                    if result is None:
+                        self.revert(*start_state)
 
-            rhs = operand_parser()
+                    max_level = level - 1
+                    continue
 
-            if rhs is None:
-                break
+                result = BinaryExpr(result, Operator(operator_index, rem_operator), rhs)
+                max_level = level
 
-            result = BinaryExpr(result, Operator(operator, rem_operator), rhs)
+            elif data == "not" and min_level <= NOT_TEST_LEVEL <= max_level:
+                result = UnaryExpr(result, Operator(self.eat_token()[0]))
+                max_level = NOT_TEST_LEVEL
+
+            else:
+                break
 
         return result
 
-    @backtrackable
-    @memoize
     def mul_expr(self):
         """
         rule = unary_expr (('*' | '@' | '/' | '%' | '//') unary_expr)* [left associative]
         """
 
-        return self.binary_expr(self.unary_expr, ["*", "@", "/", "%", "//"])
+        return self.operator_expr(MUL_EXPR_LEVEL)
 
-    @backtrackable
-    @memoize
     def sum_expr(self):
         """
         rule = mul_expr (('+' | '-') mul_expr)* [left associative]
         """
 
-        return self.binary_expr(self.mul_expr, ["+", "-"])
+        return self.operator_expr(SUM_EXPR_LEVEL)
 
-    @backtrackable
-    @memoize
     def shift_expr(self):
         """
         rule = sum_expr (('<<' | '>>') sum_expr)* [left associative]
         """
 
-        return self.binary_expr(self.sum_expr, ["<<", ">>"])
+        return self.operator_expr(SHIFT_EXPR_LEVEL)
 
-    @backtrackable
-    @memoize
     def and_expr(self):
         """
         rule = shift_expr ('&' shift_expr)* [left associative]
         """
 
-        return self.binary_expr(self.shift_expr, ["&"])
+        return self.operator_expr(AND_EXPR_LEVEL)
 
-    @backtrackable
-    @memoize
     def xor_expr(self):
         """
         rule = and_expr ('||' and_expr)* [left associative]
         """
 
-        return self.binary_expr(self.and_expr, ["||"])
+        return self.operator_expr(XOR_EXPR_LEVEL)
 
-    @backtrackable
-    @memoize
     def or_expr(self):
         """
         rule = xor_expr ('|' xor_expr)* [left associative]
         """
 
-        return self.binary_expr(self.xor_expr, ["|"])
+        return self.operator_expr(OR_EXPR_LEVEL)
 
-    @backtrackable
-    @memoize
     def comparison_expr(self):
         """
         comparison_op =
@@ -557,56 +897,28 @@ class Parser:
         rule = or_expr (comparison_op or_expr)* [left associative]
         """
 
-        return self.binary_expr(
-            self.or_expr,
-            [
-                "<",
-                ">",
-                "==",
-                ">=",
-                "<=",
-                "!=",
-                "in",
-                ("not", "in"),
-                ("is", "not"),
-                "is",
-            ],
-        )
+        return self.operator_expr(COMPARISON_EXPR_LEVEL)
 
-    @backtrackable
-    @memoize
     def not_test(self):
         """
         rule = 'not'* comparison_expr [left associative]
         """
 
-        result = self.comparison_expr()
+        return self.operator_expr(NOT_TEST_LEVEL)
 
-        while True:
-            if (not_op := self.consume_string("not")) is None:
-                break
-
-            result = UnaryExpr(result, Operator(not_op))
-
-        return result
-
-    @backtrackable
-    @memoize
     def and_test(self):
         """
         rule = not_test ('and' not_test)* [left associative]
         """
 
-        return self.binary_expr(self.not_test, ["and"])
+        return self.operator_expr(AND_TEST_LEVEL)
 
-    @backtrackable
-    @memoize
     def or_test(self):
         """
         rule = and_test ('or' and_test)* [left associative]
         """
 
-        return self.binary_expr(self.and_test, ["or"])
+        return self.operator_expr(OR_TEST_LEVEL)
 
     @backtrackable
     @memoize
@@ -1325,6 +1637,7 @@ class Parser:
             | '{' dict_or_set? '}'
             | '[' indentable_exprs_or_comprehension? ']'
             | float
+            | integer
             | all_string+
             | 'None'
             | 'True'
@@ -1336,9 +1649,10 @@ class Parser:
         """
 
         cursor, row, column = self.cursor, *self.get_line_info()
+        alternatives = self.get_alternatives(ATOM_DISPATCH_TABLE)
 
         # FIRST ALTERNATIVE
-        if self.consume_string("(") is not None:
+        if 0 in alternatives and self.consume_string("(") is not None:
             exprs = self.indentable_exprs_or_comprehension()
             if self.consume_string(")") is not None:
                 result = exprs
@@ -1356,7 +1670,7 @@ class Parser:
 
         # SECOND ALTERNATIVE
         self.revert(cursor, row, column)
-        if self.consume_string("(") is not None:
+        if 1 in alternatives and self.consume_string("(") is not None:
             if (yield_expr := self.yield_expr()) is not None and self.consume_string(
                 ")"
             ) is not None:
@@ -1364,7 +1678,7 @@ class Parser:
 
         # THIRD ALTERNATIVE
         self.revert(cursor, row, column)
-        if self.consume_string("{") is not None:
+        if 2 in alternatives and self.consume_string("{") is not None:
             dict_or_set = self.dict_or_set()
             if self.consume_string("}") is not None:
                 # Check if this can be an empty set
@@ -1372,7 +1686,7 @@ class Parser:
 
         # FOURTH ALTERNATIVE
         self.revert(cursor, row, column)
-        if self.consume_string("[") is not None:
+        if 3 in alternatives and self.consume_string("[") is not None:
             expr = self.indentable_exprs_or_comprehension()
             if self.consume_string("]") is not None:
                 # Check if expression is a comprehension
@@ -1383,16 +1697,19 @@ class Parser:
                 # Check if this can be an empty list
                 return List(expr) if expr is not None else List()
 
+            # The next alternatives are not reverted to the start, so they begin after the `[`.
+            alternatives = self.get_alternatives(ATOM_DISPATCH_TABLE)
+
         # FIFTH ALTERNATIVE
-        if (float_ := self.float()) is not None:
+        if 4 in alternatives and (float_ := self.float()) is not None:
             return float_
 
         # SIXTH ALTERNATIVE
-        if (integer := self.integer()) is not None:
+        if 5 in alternatives and (integer := self.integer()) is not None:
             return integer
 
         # SEVENTH ALTERNATIVE
-        if (string := self.all_string()) is not None:
+        if 6 in alternatives and (string := self.all_string()) is not None:
             string_list = [string]
             while (more_string := self.string()) is not None:
                 string_list.append(more_string)
@@ -1401,20 +1718,20 @@ class Parser:
 
         # EIGHTH ALTERNATIVE
         self.revert(cursor, row, column)
-        if self.consume_string("None") is not None:
+        if 7 in alternatives and self.consume_string("None") is not None:
             return NoneLiteral()
 
         # NINETH ALTERNATIVE
-        if self.consume_string("True") is not None:
+        if 8 in alternatives and self.consume_string("True") is not None:
             return Bool(True)
 
         # TENTH ALTERNATIVE
-        if self.consume_string("False") is not None:
+        if 9 in alternatives and self.consume_string("False") is not None:
             return Bool(False)
 
         # ELEVENTH ALTERNATIVE
         self.revert(cursor, row, column)
-        if (identifier := self.identifier()) is not None:
+        if 10 in alternatives and (identifier := self.identifier()) is not None:
             return identifier
 
         return None
@@ -3029,18 +3346,9 @@ class Parser:
             | async_statement
         """
 
-        if (
-            (statement := self.if_statement()) is not None
-            or (statement := self.while_statement()) is not None
-            or (statement := self.for_statement()) is not None
-            or (statement := self.try_statement()) is not None
-            or (statement := self.with_statement()) is not None
-            or (statement := self.decorated_statement()) is not None
-            or (statement := self.func_def()) is not None
-            or (statement := self.class_def()) is not None
-            or (statement := self.async_statement()) is not None
-        ):
-            return statement
+        for alternative in self.get_alternatives(COMPOUND_STATEMENT_DISPATCH_TABLE):
+            if (statement := alternative(self)) is not None:
+                return statement
 
         return None
 
@@ -3059,17 +3367,9 @@ class Parser:
             | assert_statement
         """
 
-        if (
-            (statement := self.assignment_statement()) is not None
-            or (statement := self.indentable_exprs()) is not None
-            or (statement := self.pass_statement()) is not None
-            or (statement := self.flow_statement()) is not None
-            or (statement := self.import_statement()) is not None
-            or (statement := self.global_statement()) is not None
-            or (statement := self.nonlocal_statement()) is not None
-            or (statement := self.assert_statement()) is not None
-        ):
-            return statement
+        for alternative in self.get_alternatives(SMALL_STATEMENT_DISPATCH_TABLE):
+            if (statement := alternative(self)) is not None:
+                return statement
 
         return None
 
@@ -3107,10 +3407,9 @@ class Parser:
             | compound_statement
             | simple_statement
         """
-        if (statement := self.compound_statement()) is not None or (
-            statement := self.simple_statement()
-        ) is not None:
-            return statement
+        for alternative in self.get_alternatives(STATEMENT_DISPATCH_TABLE):
+            if (statement := alternative(self)) is not None:
+                return statement
 
         return None
 
@@ -3124,11 +3423,18 @@ class Parser:
         statements = []
         statement = None
 
+        # Only the statements of the program start at the beginning of the tokens.
+        is_top_level = self.cursor == -1
+
         while self.newline() is not None or (statement := self.statement()) is not None:
             if statement:
                 statements.append(statement)
                 statement = None
 
+                if is_top_level:
+                    self.statement_ends.append(self.cursor + 1)
+                    self.cut_memo()
+
         if statements:
             return statements
 
@@ -3146,13 +3452,93 @@ class Parser:
         else:
             return Program([])
 
+    def iter_statements(self):
+        """
+        Parses a program a statement at a time, yielding each top-level statement as soon as it
+        has been parsed. Yields the same statements as `program`, and stops where it stops.
+
+        With tokens from a `TokenStream`, like the ones of `Parser.from_code`, tokens are lexed
+        as the statements need them, so a lexer error is raised when the statement with it is
+        reached. The memo is cut after each statement, but the tokens are kept in `self.tokens`
+        since the AST refers to them by index.
+        """
+
+        while True:
+            while self.newline() is not None:
+                pass
+
+            if (statement := self.statement()) is None:
+                return
+
+            self.statement_ends.append(self.cursor + 1)
+            self.cut_memo()
+
+            yield statement
+
     @backtrackable
     @memoize
     def parse(self):
         """
-        Parses a program and resets the parser
+        Parses a program and resets the parser. The program is parsed by a `ParallelParser` if
+        `CompilerOptions.parser_jobs` is not 1, unless parser statistics are recorded.
         """
 
-        result = self.program()
+        if self.compiler_opts.parser_jobs != 1 and self.stats is None:
+            from compiler.parser.parallel import ParallelParser
+
+            if type(self.tokens) == TokenStream:
+                self.tokens.exhaust()
+
+            result = ParallelParser(self.tokens, self.compiler_opts).program()
+        else:
+            result = self.program()
+
         self.reset()
         return result
+
+
+# Any binary operator can start an expression, since a missing left operand is ignored.
+GRAMMAR_FIRST_SETS = FirstSets(
+    read_grammar(),
+    {
+        rule: [operator[0] if type(operator) == tuple else operator for operator in operators]
+        for rule, operators in zip(BINARY_OPERATOR_LEVEL_RULES, BINARY_OPERATOR_LEVELS)
+    },
+)
+
+STATEMENT_DISPATCH_TABLE = DispatchTable(
+    (Parser.compound_statement, Parser.simple_statement),
+    GRAMMAR_FIRST_SETS.get_alternative_firsts("statement"),
+)
+
+COMPOUND_STATEMENT_DISPATCH_TABLE = DispatchTable(
+    (
+        Parser.if_statement,
+        Parser.while_statement,
+        Parser.for_statement,
+        Parser.try_statement,
+        Parser.with_statement,
+        Parser.decorated_statement,
+        Parser.func_def,
+        Parser.class_def,
+        Parser.async_statement,
+    ),
+    GRAMMAR_FIRST_SETS.get_alternative_firsts("compound_statement"),
+)
+
+SMALL_STATEMENT_DISPATCH_TABLE = DispatchTable(
+    (
+        Parser.assignment_statement,
+        Parser.indentable_exprs,
+        Parser.pass_statement,
+        Parser.flow_statement,
+        Parser.import_statement,
+        Parser.global_statement,
+        Parser.nonlocal_statement,
+        Parser.assert_statement,
+    ),
+    GRAMMAR_FIRST_SETS.get_alternative_firsts("small_statement"),
+)
+
+# The alternatives of `atom` are numbered in the order of its grammar.
+ATOM_DISPATCH_TABLE = DispatchTable(range(11), GRAMMAR_FIRST_SETS.get_alternative_firsts("atom"))
@@ -0,0 +1,98 @@
+"""
+Per-rule statistics of the packrat parser, for finding the rules that are worth memoizing.
+"""
+
+# Calls a rule needs before its hit rate says anything about whether to memoize it.
+MIN_CALLS = 1000
+
+# Rules called once per program, which are never worth memoizing or unmemoizing.
+WHOLE_PROGRAM_RULES = frozenset(("parse", "program", "statements"))
+
+
+class RuleStats:
+    """
+    Counts the calls, memo hits, memo misses and backtracks of each memoized parser function,
+    indexed by rule ID.
+
+    A backtrack is a call that fails, after which the parser state is reverted. Calls of rules
+    that are not memoized are neither hits nor misses.
+
+        compiler_opts.parser_stats = True
+        parser = Parser(tokens, compiler_opts)
+        parser.program()
+        print(parser.stats.format(RULE_NAMES))
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.hits = []
+        self.misses = []
+        self.backtracks = []
+
+    def add_rules(self, rule_count):
+        """
+        Adds counters for rules up to *rule_count*.
+        """
+
+        for counters in (self.calls, self.hits, self.misses, self.backtracks):
+            counters.extend([0] * (rule_count - len(counters)))
+
+    def get_rows(self, rule_names):
+        """
+        Returns the counters and hit rate of each called rule, with the most called rules first.
+        """
+
+        rows = [
+            {
+                "rule": rule_names[rule],
+                "calls": calls,
+                "hits": self.hits[rule],
+                "misses": self.misses[rule],
+                "backtracks": self.backtracks[rule],
+                "hit_rate": self.hits[rule] / calls,
+            }
+            for rule, calls in enumerate(self.calls)
+            if calls
+        ]
+
+        return sorted(rows, key=lambda row: row["calls"], reverse=True)
+
+    def get_unprofitable_rules(self, rule_names, min_hit_rate=0.1, min_calls=MIN_CALLS):
+        """
+        Returns the names of the memoized rules with at least *min_calls* calls whose hit rate is
+        lower than *min_hit_rate*, which are usually cheaper to parse again than to memoize.
+
+        Rules that `DEFAULT_UNMEMOIZED_RULES` leaves memoized are never returned, since their hits
+        on nested code are what keep the parser from backtracking exponentially.
+        """
+
+        # Imported here since the parser module imports this module.
+        from compiler.parser.parser import DEFAULT_UNMEMOIZED_RULES
+
+        return [
+            row["rule"]
+            for row in self.get_rows(rule_names)
+            if row["rule"] in DEFAULT_UNMEMOIZED_RULES
+            and row["rule"] not in WHOLE_PROGRAM_RULES
+            and row["calls"] >= min_calls
+            and row["hits"] + row["misses"]
+            and row["hit_rate"] < min_hit_rate
+        ]
+
+    def format(self, rule_names):
+        """
+        Returns the statistics as a table.
+        """
+
+        lines = [
+            f"{'rule':<32} {'calls':>10} {'hits':>10} {'misses':>10} {'backtracks':>10} "
+            f"{'hit rate':>8}"
+        ]
+
+        for row in self.get_rows(rule_names):
+            lines.append(
+                f"{row['rule']:<32} {row['calls']:>10} {row['hits']:>10} {row['misses']:>10} "
+                f"{row['backtracks']:>10} {row['hit_rate']:>8.1%}"
+            )
+
+        return "\n".join(lines)
@@ -14,12 +14,24 @@ class SymbolKind(Enum):
 
 class Scope:
     """
+    The symbols of a scope, keyed by the symbol IDs the compilation's `Interner` gives their names.
     """
-    def __init__(self, name, parent, typed={}, untyped={}):
+    def __init__(self, name, parent, typed=None, untyped=None):
         self.name = name
         self.parent = parent
-        self.typed = typed
-        self.untyped = untyped
+        self.typed = {} if typed is None else typed
+        self.untyped = {} if untyped is None else untyped
+
+    def get_named_scope(self, interner):
+        """
+        Returns a copy of the scope with its symbols keyed by their names instead of their IDs.
+        """
+        return Scope(
+            self.name,
+            self.parent,
+            {interner.get_name(symbol): info for symbol, info in self.typed.items()},
+            {interner.get_name(symbol): info for symbol, info in self.untyped.items()},
+        )
 
     def __repr__(self):
         fields = deepcopy(vars(self))
@@ -78,11 +90,12 @@ class SemanticInfo:
     """
     """
 
-    def __init__(self, tokens, compiler_opts=CompilerOptions()):
+    def __init__(self, tokens, compiler_opts=None):
+        compiler_opts = compiler_opts or CompilerOptions()
         self.tokens = tokens
         self.current_path = ""
         self.compiler_opts = compiler_opts
-        self.symbols = SemanticInfo.get_prelude_symbols()
+        self.symbols = SemanticInfo.get_prelude_symbols(compiler_opts.interner)
         self.current_parent_scope = 0 # 0 since the current scope is __main__
         self.inheritance_lists = SemanticInfo.get_primitive_types()
 
@@ -92,17 +105,17 @@ class SemanticInfo:
     def add_new_scope(self, symbol_name):
         self.symbols.append(Scope(symbol_name, self.current_parent_scope))
 
-    def add_new_symbol(self, name, symbol_info, typed=True):
+    def add_new_symbol(self, symbol, symbol_info, typed=True):
         if typed:
-            self.symbols[-1].typed[name] = symbol_info
+            self.symbols[-1].typed[symbol] = symbol_info
         else:
-            self.symbols[-1].untyped[name] = symbol_info
+            self.symbols[-1].untyped[symbol] = symbol_info
 
-    def add_new_top_level_symbol(self, name, symbol_info, typed=True):
+    def add_new_top_level_symbol(self, symbol, symbol_info, typed=True):
         if typed:
-            self.symbols[0].typed[name] = symbol_info
+            self.symbols[0].typed[symbol] = symbol_info
         else:
-            self.symbols[0].untyped[name] = symbol_info
+            self.symbols[0].untyped[symbol] = symbol_info
 
     @staticmethod
     def get_primitive_types():
@@ -126,14 +139,14 @@ class SemanticInfo:
         ]
 
     @staticmethod
-    def get_prelude_symbols():
+    def get_prelude_symbols(interner):
         """
         Get prelude symbols like str, int, etc.
         """
 
         # Create top-level scope and add __main__ to top-level
         top = [Scope("top", parent=-1, typed={
-            "__main__": SymbolInfo(
+            interner.intern("__main__"): SymbolInfo(
                 kind=SymbolKind.FUNCTION,
             )
         })]
@@ -147,8 +160,31 @@ class SemanticInfo:
     def get_prelude_ast():
         pass
 
+    def get_symbol(self, token):
+        """
+        Returns the symbol ID of an identifier token in the intern table of the compilation.
+        Tokens lexed with other compiler options carry IDs of another table, so their names are
+        interned again.
+        """
+        symbol = token.symbol
+        interner = self.compiler_opts.interner
+
+        if symbol is not None and symbol < len(interner):
+            if interner.get_name(symbol) == token.data:
+                return symbol
+
+        return interner.intern(token.data)
+
+    def get_named_symbols(self):
+        """
+        Returns the scopes with their symbols keyed by their names, for writing them out.
+        """
+        interner = self.compiler_opts.interner
+        return [scope.get_named_scope(interner) for scope in self.symbols]
+
     def __repr__(self):
         fields = deepcopy(vars(self))
+        fields['symbols'] = self.get_named_symbols()
         fields['kind'] = type(self).__name__
         string = ", ".join([f"{repr(key)}: {repr(val)}" for key, val in fields.items()])
         return "{" + string + "}"
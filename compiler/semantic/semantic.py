@@ -3,28 +3,19 @@ TODO:
     - Move the different visitors into their respective folders.
     - Module documentation.
 """
-import json
-from copy import deepcopy
-from collections import namedtuple
 from compiler import CompilerOptions, Visitor
+from compiler.visitor import DispatchVisitor
 from compiler.ast import (
-    Null,
-    Identifier,
-    Integer,
-    Float,
-    ImagInteger,
-    ImagFloat,
-    String,
-    ByteString,
-    PrefixedString,
-    Operator,
     Call,
     AssignmentStatement,
+    BinaryExpr,
+    Field,
+    FuncParams,
     Function,
-    Class,
-    ImportStatement,
+    MainPath,
+    StringList,
+    SubPath,
 )
-from compiler.errors.semantic import SemanticError
 from compiler.semantic.visitors import (
     AssignmentStatementVisitor,
     CallVisitor,
@@ -45,7 +36,8 @@ class SemanticAnalyzer:
     - SemanticVisitor
     """
 
-    def __init__(self, ast, tokens, compiler_opts=CompilerOptions()):
+    def __init__(self, ast, tokens, compiler_opts=None):
+        compiler_opts = compiler_opts or CompilerOptions()
         self.ast = ast
         self.tokens = tokens
         self.compiler_opts = compiler_opts
@@ -71,52 +63,54 @@ class SemanticAnalyzer:
         return semantic_info
 
 
-class TokenExtractionVisitor(Visitor):
+class TokenExtractionVisitor(DispatchVisitor):
     """
     This visitor class walks a Raccoon's AST, given a token list, extracts the tokens that are
     referenced by the AST.
     """
 
+    # The children that `accept_on_children` visits for the classes where it does not visit all
+    # fields, or visits them in another order, so that the same tokens are extracted in the same
+    # order as when this visitor was accepted by the AST.
+    child_fields = {
+        StringList: (),
+        BinaryExpr: ("rhs", "op", "lhs"),
+        FuncParams: ("params", "tuple_rest_param", "keyword_only_params", "named_tuple_rest_param"),
+        Field: ("expr",),
+        AssignmentStatement: ("lhses", "assignment_op", "value_expr"),
+        MainPath: ("path_names", "alias"),
+        SubPath: ("path_names", "alias"),
+    }
+
     def __init__(self, ast, tokens):
         self.ast = ast
         self.tokens = tokens
         self.relevant_tokens = {}
 
     def start_visit(self):
-        self.ast.accept(self)
+        self.walk(self.ast)
         self.tokens = None  # Free tokens
         return self.relevant_tokens
 
-    def act(self, ast):
-        """
-        Called by the visitable.
-        """
-
-        ty = type(ast)
-
-        base_types = {
-            Identifier,
-            Integer,
-            Float,
-            ImagInteger,
-            ImagFloat,
-            String,
-            ByteString,
-            PrefixedString,
-        }
-
-        if ty in base_types:
-            index = ast.index
-            self.relevant_tokens[index] = deepcopy(self.tokens[index])
+    def add_token(self, ast):
+        index = ast.index
+        self.relevant_tokens[index] = self.tokens[index]
 
-        elif ty == Operator:
-            first_idx = ast.op
-            self.relevant_tokens[first_idx] = deepcopy(self.tokens[first_idx])
+    visit_Identifier = add_token
+    visit_Integer = add_token
+    visit_Float = add_token
+    visit_ImagInteger = add_token
+    visit_ImagFloat = add_token
+    visit_String = add_token
+    visit_ByteString = add_token
+    visit_PrefixedString = add_token
 
-            if (second_idx := ast.rem_op) is not None:
-                self.relevant_tokens[second_idx] = deepcopy(self.tokens[second_idx])
+    def visit_Operator(self, ast):
+        first_idx = ast.op
+        self.relevant_tokens[first_idx] = self.tokens[first_idx]
 
-        return True
+        if (second_idx := ast.rem_op) is not None:
+            self.relevant_tokens[second_idx] = self.tokens[second_idx]
 
 
 class SemanticVisitor(Visitor):
@@ -127,9 +121,10 @@ class SemanticVisitor(Visitor):
     Making it do a lot in a single pass is an intentional design for preformance.
     """
 
-    def __init__(self, ast, tokens, compiler_opts=CompilerOptions()):
+    def __init__(self, ast, tokens, compiler_opts=None):
         """
         """
+        compiler_opts = compiler_opts or CompilerOptions()
         self.program = ast
         self.info = SemanticInfo(tokens, compiler_opts)
 
@@ -41,14 +41,17 @@ class FuncParamVisitor(Visitor):
         # Get scope, function and param tokens.
         param_name_token = self.info.tokens[self.param.name.index]
         function_name_token = self.info.tokens[self.function.name.index]
+        param_symbol = self.info.get_symbol(param_name_token)
         scope = self.info.symbols[-1]
 
         # Check params names do not conflict with each other
-        SemanticChecks.param_name_conflict(param_name_token, function_name_token, scope)
+        SemanticChecks.param_name_conflict(
+            param_name_token, param_symbol, function_name_token, scope
+        )
 
         # Save parameter in symbol table
         self.info.add_new_symbol(
-            param_name_token.data,
+            param_symbol,
             symbol_info=SymbolInfo(
                 SymbolKind.PARAM,
                 ast_ref=self.param
@@ -99,7 +102,7 @@ class FunctionVisitor(Visitor):
 
         # Save function in symbol table
         self.info.add_new_top_level_symbol(
-            function_name_token.data,
+            self.info.get_symbol(function_name_token),
             SymbolInfo(
                 kind=SymbolKind.FUNCTION,
                 ast_ref=self.function,
@@ -0,0 +1,213 @@
+"""
+Streaming JSON output of tokens, ASTs and semantic information.
+
+The output is the same JSON as `json.dumps(eval(repr(value)), indent=4)`, but it is written to a
+file piece by piece while the values are visited, so the values are never copied and the output
+is never held as one string.
+"""
+
+import json
+import sys
+from collections.abc import Sequence
+from enum import Enum
+from compiler.ast.ast import AST, Program
+from compiler.interner import Interner
+from compiler.lexer.buffer import TokenBuffer
+from compiler.lexer.lexer import Token
+from compiler.options import CompilerOptions
+
+# Output pieces collected before they are written to the file.
+BUFFER_PIECES = 1 << 12
+
+JSON_FORMATS = ("indent", "compact", "ndjson")
+
+
+class JSONSerializer:
+    """
+    Writes tokens, ASTs and semantic information to a file as JSON.
+
+        JSONSerializer(sys.stdout).write(ast)
+        JSONSerializer(sys.stdout, "ndjson").write_iter(lexer.iter_tokens())
+
+    The format is "indent", "compact" or "ndjson". NDJSON writes each item of a list, or each
+    statement of a program, as compact JSON on its own line.
+    """
+
+    def __init__(self, file=None, json_format="indent"):
+        if json_format not in JSON_FORMATS:
+            raise ValueError(f"Unknown JSON format {json_format!r}")
+
+        self.file = file or sys.stdout
+        self.is_ndjson = json_format == "ndjson"
+        self.indent = "    " if json_format == "indent" else None
+        self.key_separator = ": " if self.indent else ":"
+        self.pieces = []
+
+        # Imported here since `compiler.semantic` imports this module through `utils`.
+        from compiler.semantic.info import Scope, SymbolInfo, TypeInfo, SemanticInfo
+
+        self.handlers = {
+            str: self.serialize_scalar,
+            int: self.serialize_scalar,
+            float: self.serialize_scalar,
+            bool: self.serialize_scalar,
+            type(None): self.serialize_scalar,
+            list: self.serialize_sequence,
+            tuple: self.serialize_sequence,
+            dict: self.serialize_dict,
+            Token: self.serialize_token,
+            TokenBuffer: self.serialize_sequence,
+            Interner: self.serialize_interner,
+            CompilerOptions: self.serialize_compiler_options,
+            Scope: self.serialize_object,
+            TypeInfo: self.serialize_object,
+            SymbolInfo: self.serialize_symbol_info,
+            SemanticInfo: self.serialize_semantic_info,
+        }
+
+    def write(self, value):
+        """
+        Writes a value followed by a newline. In NDJSON format, the items of a list and the
+        statements of a program are written on their own lines.
+        """
+
+        if self.is_ndjson and isinstance(value, Program):
+            self.write_iter(value.statements)
+        elif self.is_ndjson and isinstance(value, (list, tuple, TokenBuffer)):
+            self.write_iter(value)
+        else:
+            self.serialize(value, 0)
+            self.pieces.append("\n")
+            self.flush()
+
+    def write_iter(self, values):
+        """
+        Writes the values of an iterator as a JSON array, or as NDJSON lines, as they are
+        produced, so that they do not all have to be in memory at the same time.
+        """
+
+        if self.is_ndjson:
+            for value in values:
+                self.serialize(value, 0)
+                self.pieces.append("\n")
+
+                if len(self.pieces) > BUFFER_PIECES:
+                    self.flush()
+        else:
+            self.serialize_sequence(values, 0)
+            self.pieces.append("\n")
+
+        self.flush()
+
+    def flush(self):
+        self.file.write("".join(self.pieces))
+        self.pieces.clear()
+
+    def serialize(self, value, level):
+        """
+        Adds the JSON of a value at an indentation level to the output.
+        """
+
+        handler = self.handlers.get(type(value))
+
+        if handler is not None:
+            handler(value, level)
+        elif isinstance(value, AST):
+            self.serialize_ast(value, level)
+        elif isinstance(value, Enum):
+            self.pieces.append(json.dumps(repr(value)))
+        elif isinstance(value, Sequence):
+            self.serialize_sequence(value, level)
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    def serialize_scalar(self, value, level):
+        self.pieces.append(json.dumps(value))
+
+    def serialize_sequence(self, values, level):
+        pieces = self.pieces
+        opening = "[" if self.indent is None else "[\n" + self.indent * (level + 1)
+        separator = "," if self.indent is None else ",\n" + self.indent * (level + 1)
+        is_first = True
+
+        for value in values:
+            pieces.append(opening if is_first else separator)
+            self.serialize(value, level + 1)
+            is_first = False
+
+            if len(pieces) > BUFFER_PIECES:
+                self.flush()
+
+        if is_first:
+            pieces.append("[]")
+        else:
+            pieces.append("]" if self.indent is None else "\n" + self.indent * level + "]")
+
+    def serialize_items(self, items, level):
+        """
+        Adds a JSON object with the keys and values of items to the output.
+        """
+
+        pieces = self.pieces
+        opening = "{" if self.indent is None else "{\n" + self.indent * (level + 1)
+        separator = "," if self.indent is None else ",\n" + self.indent * (level + 1)
+        is_first = True
+
+        for key, value in items:
+            pieces.append(opening if is_first else separator)
+            pieces.append(self.get_key(key) + self.key_separator)
+            self.serialize(value, level + 1)
+            is_first = False
+
+        if is_first:
+            pieces.append("{}")
+        else:
+            pieces.append("}" if self.indent is None else "\n" + self.indent * level + "}")
+
+    @staticmethod
+    def get_key(key):
+        """
+        Returns a dict key as a JSON string, converting it like `json.dumps` does.
+        """
+
+        if type(key) != str:
+            key = json.dumps(key) if key is None or type(key) in (bool, float) else str(key)
+
+        return json.dumps(key)
+
+    def serialize_dict(self, value, level):
+        self.serialize_items(value.items(), level)
+
+    def serialize_object(self, value, level):
+        self.serialize_items(vars(value).items(), level)
+
+    def serialize_ast(self, ast, level):
+        items = [(field, getattr(ast, field)) for field in ast.__slots__]
+        items.append(("kind", type(ast).__name__))
+        self.serialize_items(items, level)
+
+    def serialize_token(self, token, level):
+        fields = dict(vars(token))
+        fields.pop("symbol", None)
+        fields["kind"] = repr(token.kind)
+        self.serialize_items(fields.items(), level)
+
+    def serialize_interner(self, interner, level):
+        self.serialize_sequence(interner.names, level)
+
+    def serialize_symbol_info(self, symbol_info, level):
+        fields = dict(vars(symbol_info))
+        fields["ast_ref"] = "..."
+        fields["kind"] = repr(symbol_info.kind)
+        self.serialize_items(fields.items(), level)
+
+    def serialize_compiler_options(self, compiler_opts, level):
+        fields = dict(vars(compiler_opts))
+        del fields["interner"]
+        self.serialize_items(fields.items(), level)
+
+    def serialize_semantic_info(self, semantic_info, level):
+        fields = dict(vars(semantic_info))
+        fields["symbols"] = semantic_info.get_named_symbols()
+        fields["kind"] = type(semantic_info).__name__
+        self.serialize_items(fields.items(), level)
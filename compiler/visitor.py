@@ -2,6 +2,8 @@
 """
 
 from abc import ABC, abstractmethod
+from operator import attrgetter
+from compiler.ast.ast import AST_CLASSES, LazyList
 
 
 class Visitor(ABC):
@@ -20,3 +22,123 @@ class Visitor(ABC):
         visitable argument is optional but it may be useful in top-down recursive trasverse, which means it allows passing the children AST to the visitor.
         """
         pass
+
+
+# Marks on the stack of `DispatchVisitor.walk` that the node below it is being left.
+LEAVE = object()
+
+
+class DispatchVisitor(Visitor):
+    """
+    A visitor that walks an AST with an explicit stack instead of recursing through `accept`, so
+    that deeply nested ASTs do not hit the recursion limit.
+
+    Each node is handled by the `visit_<class name>` method of its class, like `visit_Identifier`,
+    before its children, and by the `leave_<class name>` method after them. `enter` and `leave`
+    are called for every node, before and after those. A node's children are skipped if `enter`
+    or its visit method returns False. Children are visited in the order of `iter_children`,
+    unless `child_fields` gives the fields of a class to visit the children of, in order.
+
+    The handlers of each AST class are looked up once per visitor class, into `handlers`.
+    """
+
+    handlers = {}
+    child_fields = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.handlers = {
+            node_class: (
+                getattr(cls, f"visit_{node_class.__name__}", None),
+                getattr(cls, f"leave_{node_class.__name__}", None),
+                get_fields_getter(node_class, cls.child_fields.get(node_class)),
+            )
+            for node_class in AST_CLASSES
+        }
+
+    def act(self, ast):
+        """
+        Walks the AST, for when the visitor is accepted by an AST.
+        """
+
+        self.walk(ast)
+        return False
+
+    def enter(self, ast):
+        """
+        Called before each node is handled. Returning False skips the node's children.
+        """
+
+        return True
+
+    def leave(self, ast):
+        """
+        Called after each node and its children are handled.
+        """
+
+        pass
+
+    def walk(self, ast):
+        """
+        Visits the nodes of an AST in pre-order, and leaves them in post-order.
+        """
+
+        handlers = self.handlers
+        enter = None if type(self).enter is DispatchVisitor.enter else self.enter
+        leave = None if type(self).leave is DispatchVisitor.leave else self.leave
+        stack = [ast]
+        pop, push, extend = stack.pop, stack.append, stack.extend
+
+        # The fields of nodes go on the stack as they are, lists and values that are not nodes
+        # are told apart when they come off it.
+        while stack:
+            node = pop()
+            node_handlers = handlers.get(type(node))
+
+            if node_handlers is None:
+                if node is LEAVE:
+                    node = pop()
+                    leave_handler = handlers[type(node)][1]
+
+                    if leave_handler is not None:
+                        leave_handler(self, node)
+
+                    if leave is not None:
+                        leave(node)
+                elif type(node) == list or type(node) == tuple or isinstance(node, LazyList):
+                    extend(node[::-1])
+
+                continue
+
+            visit_handler, leave_handler, get_fields = node_handlers
+
+            if enter is not None and enter(node) is False:
+                continue
+
+            if visit_handler is not None and visit_handler(self, node) is False:
+                continue
+
+            if leave_handler is not None or leave is not None:
+                push(node)
+                push(LEAVE)
+
+            if get_fields is not None:
+                extend(get_fields(node))
+
+
+def get_fields_getter(node_class, fields=None):
+    """
+    Returns a function that gives the fields of a node of a class in reverse order, or None if
+    the class has no fields. The fields are the class's `__slots__` if *fields* is not given.
+    """
+
+    fields = (node_class.__slots__ if fields is None else tuple(fields))[::-1]
+
+    if not fields:
+        return None
+
+    if len(fields) == 1:
+        field = fields[0]
+        return lambda node: (getattr(node, field),)
+
+    return attrgetter(*fields)
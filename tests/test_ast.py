@@ -0,0 +1,45 @@
+from compiler.lexer import Lexer
+from compiler.parser import Parser
+from compiler.ast import Function, Identifier, Integer
+from compiler.ast.arena import ASTArena
+from compiler.ast.hashing import get_structural_hash
+
+
+def test_ast_nodes_have_slots_and_iterate_their_children():
+    program = Parser(Lexer("x = {a: 1}\n").lex()).program()
+    statement = program.statements[0]
+    dict_expr = statement.value_expr
+
+    assert not hasattr(statement, "__dict__")
+    assert list(program.iter_children()) == [statement]
+    assert list(dict_expr.iter_children()) == [Identifier(3), Integer(5)]
+
+
+def test_ast_arena_holds_same_ast_in_pre_order():
+    tokens = Lexer("class A:\n    def f(self, x):\n        return {x: [1, 2.0]}\n").lex()
+    program = Parser(tokens).program()
+    arena = ASTArena.from_ast(program)
+    shared_arena = ASTArena.from_bytes(arena.to_bytes())
+    function = arena.find(Function)[0]
+
+    assert arena.to_ast() == shared_arena.to_ast() == program
+    assert arena.to_ast(function) == program.statements[0].body[0]
+    assert tokens[arena.token_indices[arena.get_field(function, "name")]].data == "f"
+    assert list(arena.walk(function)) == list(range(function, arena.ends[function]))
+    assert all(arena.parents[child] == function for child in arena.get_children(function))
+
+
+def test_structural_hash_depends_on_token_data_not_token_indices():
+    tokens = Lexer("def f(a):\n    return a + 1\nx = 2\ndef f(a):\n    return a + 1\n").lex()
+    program = Parser(tokens).program()
+    first, assignment, second = program.statements
+    program_hash = get_structural_hash(program, tokens)
+
+    assert first.structural_hash == second.structural_hash != assignment.structural_hash
+    assert len(program_hash) == 16
+    assert get_structural_hash(program, tokens) is program_hash
+
+    other_tokens = Lexer("def f(a):\n    return a + 2\n").lex()
+    other_function = Parser(other_tokens).program().statements[0]
+
+    assert get_structural_hash(other_function, other_tokens) != first.structural_hash
@@ -0,0 +1,58 @@
+from compiler.ast import Function
+from compiler.ast.arena import ASTArena
+from compiler.ast.hashing import get_structural_hash
+from compiler.options import CompilerOptions
+from compiler.parser.cache import RAM_MAGIC, LazyStatements, get_cache_path, parse_module
+from compiler.semantic.semantic import SemanticAnalyzer
+
+
+def test_parse_module_reuses_ast_cache_file_of_unchanged_code(tmp_path):
+    source_path = tmp_path / "module.ra"
+    code = "x = [i for i in y]\ndef f(a, *b):\n    return {a: b}\n"
+    program, tokens = parse_module(source_path, code)
+    cached_program, cached_tokens = parse_module(source_path, code)
+
+    assert type(cached_program.statements) == LazyStatements
+    assert cached_program == program
+    assert cached_tokens == list(tokens)
+    assert type(parse_module(source_path, code + "z = 1\n")[0].statements) == list
+
+
+def test_ast_consumers_go_through_statements_of_program_loaded_from_cache(tmp_path):
+    source_path = tmp_path / "module.ra"
+    code = "def f(a, b):\n    return a + b\nx = f(1, 2)\n"
+    compiler_opts, cached_opts = CompilerOptions(), CompilerOptions()
+    program, tokens = parse_module(source_path, code, compiler_opts)
+    cached_program, cached_tokens = parse_module(source_path, code, cached_opts)
+    arena = ASTArena.from_ast(cached_program)
+    semantic_info = SemanticAnalyzer(program, tokens, compiler_opts).analyze()
+    cached_semantic_info = SemanticAnalyzer(cached_program, cached_tokens, cached_opts).analyze()
+
+    assert type(cached_program.statements) == LazyStatements
+    assert get_structural_hash(cached_program, cached_tokens) == get_structural_hash(
+        program, tokens
+    )
+    assert arena.find(Function) and arena.to_ast() == program
+    assert ASTArena.from_bytes(arena.to_bytes()).to_ast() == program
+    assert cached_semantic_info.tokens and cached_semantic_info.tokens == semantic_info.tokens
+
+
+def test_parse_module_parses_code_again_if_ast_cache_file_is_damaged(tmp_path):
+    source_path = tmp_path / "module.ra"
+    code = "x = [i for i in y]\ndef f(a, *b):\n    return {a: b}\n"
+    program, tokens = parse_module(source_path, code)
+    cache_path = get_cache_path(source_path)
+    cache_data = cache_path.read_bytes()
+    header_end = len(RAM_MAGIC) + 4 + int.from_bytes(cache_data[len(RAM_MAGIC) : 8], "little")
+
+    # Flip a byte of the last statement, then one of the token data.
+    for position in (len(cache_data) - 2, header_end + 4):
+        damaged_data = bytearray(cache_data)
+        damaged_data[position] ^= 0xFF
+        cache_path.write_bytes(damaged_data)
+        damaged_program, damaged_tokens = parse_module(source_path, code)
+
+        assert type(damaged_program.statements) == list
+        assert damaged_program == program
+        assert list(damaged_tokens) == list(tokens)
+        assert cache_path.read_bytes() == cache_data
@@ -1,45 +1,65 @@
 from compiler.lexer.lexer import Lexer, Token, TokenKind, LexerError, IndentSpaceKind
-from pytest import raises
+from compiler.lexer.regex_lexer import RegexLexer
+from compiler.lexer.buffer import TokenBuffer
+from compiler.lexer.incremental import IncrementalLexer
+from compiler.lexer.byte_lexer import ByteLexer
+from compiler.lexer import parallel
+from compiler.lexer.parallel import ParallelLexer
+from compiler.options import CompilerOptions
+from compiler.interner import Interner
+from pytest import fixture, raises
+import mmap
+
+
+@fixture(params=["character", "regex"])
+def create_lexer(request):
+    """
+    Creates lexers of each lexer engine, so that the lexer tests check both engines.
+    """
+
+    compiler_opts = CompilerOptions()
+    compiler_opts.lexer_engine = request.param
+    return lambda code: Lexer.create(code, compiler_opts)
 
 
-def test_lexer_tokenizes_identifier_that_starts_with_underscore_as_identifier():
-    result = Lexer(r"_hello").lex()
+def test_lexer_tokenizes_identifier_that_starts_with_underscore_as_identifier(create_lexer):
+    result = create_lexer(r"_hello").lex()
     assert result == [Token(r"_hello", TokenKind.IDENTIFIER, 0, 5)]
 
 
-def test_lexer_tokenizes_identifier_that_starts_with_letter_as_identifier():
-    result = Lexer("raw").lex()
+def test_lexer_tokenizes_identifier_that_starts_with_letter_as_identifier(create_lexer):
+    result = create_lexer("raw").lex()
     assert result == [Token(r"raw", TokenKind.IDENTIFIER, 0, 2)]
 
 
-def test_lexer_tokenizes_identifier_with_digits_in_middle_as_identifier():
-    result = Lexer(r"_hello88_").lex()
+def test_lexer_tokenizes_identifier_with_digits_in_middle_as_identifier(create_lexer):
+    result = create_lexer(r"_hello88_").lex()
     assert result == [Token("_hello88_", TokenKind.IDENTIFIER, 0, 8)]
 
 
-def test_lexer_tokenizes_single_character_as_identifier():
-    result = Lexer("h").lex()
+def test_lexer_tokenizes_single_character_as_identifier(create_lexer):
+    result = create_lexer("h").lex()
     assert result == [Token(r"h", TokenKind.IDENTIFIER, 0, 0)]
 
 
-def test_lexer_tokenizes_valid_newline_successfully():
-    result = Lexer("\r\n\n").lex()
+def test_lexer_tokenizes_valid_newline_successfully(create_lexer):
+    result = create_lexer("\r\n\n").lex()
     assert result == [
         Token("", TokenKind.NEWLINE, 1, -1),
         Token("", TokenKind.NEWLINE, 2, -1),
     ]
 
 
-def test_lexer_tokenizes_underscore_as_identifier():
-    result = Lexer("_").lex()
+def test_lexer_tokenizes_underscore_as_identifier(create_lexer):
+    result = create_lexer("_").lex()
     assert result == [Token(r"_", TokenKind.IDENTIFIER, 0, 0)]
 
 
-def test_lexer_tokenizes_valid_prefixed_strings_successfully():
-    result0 = Lexer(r"r'hello'").lex()
-    result1 = Lexer(r'u"hello"').lex()
-    result2 = Lexer(r'f"""hello"""').lex()
-    result3 = Lexer(r"rf'hello'").lex()
+def test_lexer_tokenizes_valid_prefixed_strings_successfully(create_lexer):
+    result0 = create_lexer(r"r'hello'").lex()
+    result1 = create_lexer(r'u"hello"').lex()
+    result2 = create_lexer(r'f"""hello"""').lex()
+    result3 = create_lexer(r"rf'hello'").lex()
 
     assert result0 == [Token(r"hello", TokenKind.PREFIXED_STRING, 0, 7)]
     assert result1 == [Token(r"hello", TokenKind.PREFIXED_STRING, 0, 7)]
@@ -47,30 +67,32 @@ def test_lexer_tokenizes_valid_prefixed_strings_successfully():
     assert result3 == [Token(r"hello", TokenKind.PREFIXED_STRING, 0, 8)]
 
 
-def test_lexer_tokenizes_valid_byte_strings_successfully():
-    result0 = Lexer(r"b'hello'").lex()
-    result6 = Lexer(r"rb'''hello'''").lex()
+def test_lexer_tokenizes_valid_byte_strings_successfully(create_lexer):
+    result0 = create_lexer(r"b'hello'").lex()
+    result6 = create_lexer(r"rb'''hello'''").lex()
 
     assert result0 == [Token(r"hello", TokenKind.BYTE_STRING, 0, 7)]
     assert result6 == [Token(r"hello", TokenKind.BYTE_STRING, 0, 12)]
 
 
-def test_lexer_tokenizes_valid_single_quote_short_string_successfully():
-    result = Lexer(r"'erCA63y8hbb 54^58* (@$Q#3qDSHHScTw62-+'").lex()
+def test_lexer_tokenizes_valid_single_quote_short_string_successfully(create_lexer):
+    result = create_lexer(r"'erCA63y8hbb 54^58* (@$Q#3qDSHHScTw62-+'").lex()
     assert result == [
         Token(r"erCA63y8hbb 54^58* (@$Q#3qDSHHScTw62-+", TokenKind.STRING, 0, 39)
     ]
 
 
-def test_lexer_tokenizes_valid_double_quote_short_string_successfully():
-    result = Lexer(r'"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"').lex()
+def test_lexer_tokenizes_valid_double_quote_short_string_successfully(create_lexer):
+    result = create_lexer(r'"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"').lex()
     assert result == [
         Token(r"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+", TokenKind.STRING, 0, 38)
     ]
 
 
-def test_lexer_tokenizes_valid_double_char_prefixed_double_quote_short_string_successfully():
-    result = Lexer(r'rf"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"').lex()
+def test_lexer_tokenizes_valid_double_char_prefixed_double_quote_short_string_successfully(
+    create_lexer,
+):
+    result = create_lexer(r'rf"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"').lex()
     assert result == [
         Token(
             r"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+", TokenKind.PREFIXED_STRING, 0, 40
@@ -78,8 +100,10 @@ def test_lexer_tokenizes_valid_double_char_prefixed_double_quote_short_string_su
     ]
 
 
-def test_lexer_tokenizes_valid_single_char_prefixed_double_quote_short_string_successfully():
-    result = Lexer(r'r"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"').lex()
+def test_lexer_tokenizes_valid_single_char_prefixed_double_quote_short_string_successfully(
+    create_lexer,
+):
+    result = create_lexer(r'r"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"').lex()
     assert result == [
         Token(
             r"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+", TokenKind.PREFIXED_STRING, 0, 39
@@ -87,21 +111,21 @@ def test_lexer_tokenizes_valid_single_char_prefixed_double_quote_short_string_su
     ]
 
 
-def test_lexer_tokenizes_valid_empty_short_string_successfully():
-    result = Lexer(r'""').lex()
+def test_lexer_tokenizes_valid_empty_short_string_successfully(create_lexer):
+    result = create_lexer(r'""').lex()
     assert result == [Token(r"", TokenKind.STRING, 0, 1)]
 
 
-def test_lexer_fails_with_return_char_in_short_string():
-    lexer = Lexer('"\r"')
+def test_lexer_fails_with_return_char_in_short_string(create_lexer):
+    lexer = create_lexer('"\r"')
     with raises(LexerError) as exc_info:
         lexer.lex()
 
     assert (exc_info.value.row, exc_info.value.column) == (0, 0)
 
 
-def test_lexer_fails_with_newline_char_in_short_string():
-    lexer = Lexer('"\n"')
+def test_lexer_fails_with_newline_char_in_short_string(create_lexer):
+    lexer = create_lexer('"\n"')
     with raises(LexerError) as exc_info:
         lexer.lex()
 
@@ -112,8 +136,8 @@ def test_lexer_fails_with_newline_char_in_short_string():
     )
 
 
-def test_lexer_fails_with_unclosed_delimiter_for_short_string():
-    lexer = Lexer('"hello there')
+def test_lexer_fails_with_unclosed_delimiter_for_short_string(create_lexer):
+    lexer = create_lexer('"hello there')
     with raises(LexerError) as exc_info:
         lexer.lex()
 
@@ -124,22 +148,24 @@ def test_lexer_fails_with_unclosed_delimiter_for_short_string():
     )
 
 
-def test_lexer_tokenizes_valid_single_quote_long_string_successfully():
-    result = Lexer(r"'''erCA63y8hbb 54^58* (@$Q#3qDSHHScTw62-+'''").lex()
+def test_lexer_tokenizes_valid_single_quote_long_string_successfully(create_lexer):
+    result = create_lexer(r"'''erCA63y8hbb 54^58* (@$Q#3qDSHHScTw62-+'''").lex()
     assert result == [
         Token(r"erCA63y8hbb 54^58* (@$Q#3qDSHHScTw62-+", TokenKind.STRING, 0, 43)
     ]
 
 
-def test_lexer_tokenizes_valid_double_quote_long_string_successfully():
-    result = Lexer(r'"""erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"""').lex()
+def test_lexer_tokenizes_valid_double_quote_long_string_successfully(create_lexer):
+    result = create_lexer(r'"""erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"""').lex()
     assert result == [
         Token(r"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+", TokenKind.STRING, 0, 42)
     ]
 
 
-def test_lexer_tokenizes_valid_double_char_prefixed_single_quote_long_string_successfully():
-    result = Lexer(r"rf'''erCA63y8hbb 54^58* (@$Q#3qDSHHScTw62-+'''").lex()
+def test_lexer_tokenizes_valid_double_char_prefixed_single_quote_long_string_successfully(
+    create_lexer,
+):
+    result = create_lexer(r"rf'''erCA63y8hbb 54^58* (@$Q#3qDSHHScTw62-+'''").lex()
     assert result == [
         Token(
             r"erCA63y8hbb 54^58* (@$Q#3qDSHHScTw62-+", TokenKind.PREFIXED_STRING, 0, 45
@@ -147,8 +173,10 @@ def test_lexer_tokenizes_valid_double_char_prefixed_single_quote_long_string_suc
     ]
 
 
-def test_lexer_tokenizes_valid_single_char_prefixed_double_quote_long_string_successfully():
-    result = Lexer(r'r"""erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"""').lex()
+def test_lexer_tokenizes_valid_single_char_prefixed_double_quote_long_string_successfully(
+    create_lexer,
+):
+    result = create_lexer(r'r"""erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+"""').lex()
     assert result == [
         Token(
             r"erCA63y8hbb 54^58*(@$Q#3qDSHHScTw62-+", TokenKind.PREFIXED_STRING, 0, 43
@@ -156,23 +184,23 @@ def test_lexer_tokenizes_valid_single_char_prefixed_double_quote_long_string_suc
     ]
 
 
-def test_lexer_tokenizes_valid_empty_long_string_successfully():
-    result = Lexer(r'""""""').lex()
+def test_lexer_tokenizes_valid_empty_long_string_successfully(create_lexer):
+    result = create_lexer(r'""""""').lex()
     assert result == [Token(r"", TokenKind.STRING, 0, 5)]
 
 
-def test_lexer_tokenizes_long_string_with_incomplete_delimiter_successfully():
-    result = Lexer(r'"""Mary had a little lamb"" this is ridiculous"""').lex()
+def test_lexer_tokenizes_long_string_with_incomplete_delimiter_successfully(create_lexer):
+    result = create_lexer(r'"""Mary had a little lamb"" this is ridiculous"""').lex()
     assert result == [
         Token(r'Mary had a little lamb"" this is ridiculous', TokenKind.STRING, 0, 48)
     ]
 
 
-def test_lexer_tokenizes_long_string_with_valid_return_char_successfully():
+def test_lexer_tokenizes_long_string_with_valid_return_char_successfully(create_lexer):
     r"""
     TODO: \r has a weird effect on the string on my macOS development environment
     """
-    # lexer = Lexer('"""\r this is a doc \r\n#3qDSHHScTw62-+"""')
+    # lexer = create_lexer('"""\r this is a doc \r\n#3qDSHHScTw62-+"""')
     # result = lexer.lex()
     # assert result == [
     #     Token("\r this is a doc \r\n#3qDSHHScTw62-+", TokenKind.STRING, 2, 17)
@@ -180,15 +208,15 @@ def test_lexer_tokenizes_long_string_with_valid_return_char_successfully():
     pass
 
 
-def test_lexer_tokenizes_long_string_with_valid_newline_char_successfully():
-    result = Lexer('"""\n this is a \ndoc #3qDSHHScTw62-+"""').lex()
+def test_lexer_tokenizes_long_string_with_valid_newline_char_successfully(create_lexer):
+    result = create_lexer('"""\n this is a \ndoc #3qDSHHScTw62-+"""').lex()
     assert result == [
         Token("\n this is a \ndoc #3qDSHHScTw62-+", TokenKind.STRING, 2, 21)
     ]
 
 
-def test_lexer_fails_with_unclosed_delimiter_for_long_string():
-    lexer = Lexer('"""hello there""')
+def test_lexer_fails_with_unclosed_delimiter_for_long_string(create_lexer):
+    lexer = create_lexer('"""hello there""')
     with raises(LexerError) as exc_info:
         lexer.lex()
 
@@ -199,13 +227,13 @@ def test_lexer_fails_with_unclosed_delimiter_for_long_string():
     )
 
 
-def test_lexer_tokenizes_with_valid_long_byte_string():
-    result = Lexer('b"""This is spartan 0078#*"""').lex()
+def test_lexer_tokenizes_with_valid_long_byte_string(create_lexer):
+    result = create_lexer('b"""This is spartan 0078#*"""').lex()
     assert result == [Token("This is spartan 0078#*", TokenKind.BYTE_STRING, 0, 28)]
 
 
-def test_lexer_fails_with_non_ascii_char_in_long_byte_string():
-    lexer = Lexer('b"""hello thereΣ"""')
+def test_lexer_fails_with_non_ascii_char_in_long_byte_string(create_lexer):
+    lexer = create_lexer('b"""hello thereΣ"""')
     with raises(LexerError) as exc_info:
         lexer.lex()
 
@@ -216,8 +244,8 @@ def test_lexer_fails_with_non_ascii_char_in_long_byte_string():
     )
 
 
-def test_lexer_fails_with_unclosed_delimiter_for_short_byte_string():
-    lexer = Lexer('br"hello there')
+def test_lexer_fails_with_unclosed_delimiter_for_short_byte_string(create_lexer):
+    lexer = create_lexer('br"hello there')
     with raises(LexerError) as exc_info:
         lexer.lex()
 
@@ -228,8 +256,8 @@ def test_lexer_fails_with_unclosed_delimiter_for_short_byte_string():
     )
 
 
-def test_lexer_fails_with_unclosed_delimiter_for_long_byte_string():
-    lexer = Lexer('b"""hello there""')
+def test_lexer_fails_with_unclosed_delimiter_for_long_byte_string(create_lexer):
+    lexer = create_lexer('b"""hello there""')
     with raises(LexerError) as exc_info:
         lexer.lex()
 
@@ -240,13 +268,13 @@ def test_lexer_fails_with_unclosed_delimiter_for_long_byte_string():
     )
 
 
-def test_lexer_tokenizes_valid_dec_integer_successfully():
-    result0 = Lexer("0123456789").lex()
-    result1 = Lexer("123456789").lex()
-    result2 = Lexer("01_33456_789").lex()
-    result3 = Lexer("5_37450_99").lex()
-    result4 = Lexer("1").lex()
-    result5 = Lexer("0").lex()
+def test_lexer_tokenizes_valid_dec_integer_successfully(create_lexer):
+    result0 = create_lexer("0123456789").lex()
+    result1 = create_lexer("123456789").lex()
+    result2 = create_lexer("01_33456_789").lex()
+    result3 = create_lexer("5_37450_99").lex()
+    result4 = create_lexer("1").lex()
+    result5 = create_lexer("0").lex()
     assert result0 == [Token("0123456789", TokenKind.DEC_INTEGER, 0, 9)]
     assert result1 == [Token("123456789", TokenKind.DEC_INTEGER, 0, 8)]
     assert result2 == [Token("0133456789", TokenKind.DEC_INTEGER, 0, 11)]
@@ -255,24 +283,24 @@ def test_lexer_tokenizes_valid_dec_integer_successfully():
     assert result5 == [Token("0", TokenKind.DEC_INTEGER, 0, 0)]
 
 
-def test_lexer_tokenizes_valid_hex_integer_successfully():
-    result0 = Lexer("0x1234567890aAbBcCdDeEfF").lex()
-    result1 = Lexer("0x_23A_b4_567dD_90aBcCeEfF").lex()
+def test_lexer_tokenizes_valid_hex_integer_successfully(create_lexer):
+    result0 = create_lexer("0x1234567890aAbBcCdDeEfF").lex()
+    result1 = create_lexer("0x_23A_b4_567dD_90aBcCeEfF").lex()
     assert result0 == [Token("1234567890aAbBcCdDeEfF", TokenKind.HEX_INTEGER, 0, 23)]
     assert result1 == [Token("23Ab4567dD90aBcCeEfF", TokenKind.HEX_INTEGER, 0, 25)]
 
 
-def test_lexer_tokenizes_valid_oct_integer_successfully():
-    result0 = Lexer("0o01234567").lex()
-    result1 = Lexer("0o12_03_4").lex()
+def test_lexer_tokenizes_valid_oct_integer_successfully(create_lexer):
+    result0 = create_lexer("0o01234567").lex()
+    result1 = create_lexer("0o12_03_4").lex()
     assert result0 == [Token("01234567", TokenKind.OCT_INTEGER, 0, 9)]
     assert result1 == [Token("12034", TokenKind.OCT_INTEGER, 0, 8)]
 
 
-def test_lexer_fails_with_incomplete_non_decimal_integer_literal():
-    lexer0 = Lexer("0o")
-    lexer1 = Lexer("0btt")
-    lexer2 = Lexer("0x")
+def test_lexer_fails_with_incomplete_non_decimal_integer_literal(create_lexer):
+    lexer0 = create_lexer("0o")
+    lexer1 = create_lexer("0btt")
+    lexer2 = create_lexer("0x")
 
     with raises(LexerError) as exc_info0:
         lexer0.lex()
@@ -302,11 +330,11 @@ def test_lexer_fails_with_incomplete_non_decimal_integer_literal():
     )
 
 
-def test_lexer_fails_with_consecutive_underscores_in_integer_literal():
-    lexer0 = Lexer("0o1_234__5")
-    lexer1 = Lexer("0b1_111__0")
-    lexer2 = Lexer("0x1_234__5")
-    lexer3 = Lexer("1_234__5")
+def test_lexer_fails_with_consecutive_underscores_in_integer_literal(create_lexer):
+    lexer0 = create_lexer("0o1_234__5")
+    lexer1 = create_lexer("0b1_111__0")
+    lexer2 = create_lexer("0x1_234__5")
+    lexer3 = create_lexer("1_234__5")
 
     with raises(LexerError) as exc_info0:
         lexer0.lex()
@@ -345,12 +373,14 @@ def test_lexer_fails_with_consecutive_underscores_in_integer_literal():
     )
 
 
-def test_lexer_tokenizes_coefficient_expression_with_adjacent_number_and_identifier_successfully():
-    result0 = Lexer("045_").lex()
-    result1 = Lexer("123f").lex()
-    result2 = Lexer("1_234e_00").lex()
-    result3 = Lexer("1_000_500r_ac").lex()
-    result3 = Lexer("1_000.500r_ac").lex()
+def test_lexer_tokenizes_coefficient_expression_with_adjacent_number_and_identifier_successfully(
+    create_lexer,
+):
+    result0 = create_lexer("045_").lex()
+    result1 = create_lexer("123f").lex()
+    result2 = create_lexer("1_234e_00").lex()
+    result3 = create_lexer("1_000_500r_ac").lex()
+    result3 = create_lexer("1_000.500r_ac").lex()
 
     assert result0 == [
         Token("045", TokenKind.DEC_INTEGER, 0, 2),
@@ -377,16 +407,16 @@ def test_lexer_tokenizes_coefficient_expression_with_adjacent_number_and_identif
     ]
 
 
-def test_lexer_tokenizes_valid_dec_float_literal_successfully():
-    result0 = Lexer("0123.456789").lex()
-    result1 = Lexer(".00").lex()
-    result2 = Lexer(".12_34").lex()
-    result3 = Lexer(".12_34e-100").lex()
-    result4 = Lexer("1_234e00").lex()
-    result5 = Lexer("1234.").lex()
-    result6 = Lexer("1234.e-56789").lex()
-    result7 = Lexer("12_34.5_67e+8_900").lex()
-    result8 = Lexer("00.1_23456_789").lex()
+def test_lexer_tokenizes_valid_dec_float_literal_successfully(create_lexer):
+    result0 = create_lexer("0123.456789").lex()
+    result1 = create_lexer(".00").lex()
+    result2 = create_lexer(".12_34").lex()
+    result3 = create_lexer(".12_34e-100").lex()
+    result4 = create_lexer("1_234e00").lex()
+    result5 = create_lexer("1234.").lex()
+    result6 = create_lexer("1234.e-56789").lex()
+    result7 = create_lexer("12_34.5_67e+8_900").lex()
+    result8 = create_lexer("00.1_23456_789").lex()
     assert result0 == [Token("0123.456789", TokenKind.DEC_FLOAT, 0, 10)]
     assert result1 == [Token("0.00", TokenKind.DEC_FLOAT, 0, 2)]
     assert result2 == [Token("0.1234", TokenKind.DEC_FLOAT, 0, 5)]
@@ -398,10 +428,10 @@ def test_lexer_tokenizes_valid_dec_float_literal_successfully():
     assert result8 == [Token("00.123456789", TokenKind.DEC_FLOAT, 0, 13)]
 
 
-def test_lexer_tokenizes_valid_code_that_looks_like_dec_float_literal_successfully():
-    result0 = Lexer("12_34.e_00").lex()
-    result1 = Lexer("12_34.f100").lex()
-    result2 = Lexer("12_34e_00").lex()
+def test_lexer_tokenizes_valid_code_that_looks_like_dec_float_literal_successfully(create_lexer):
+    result0 = create_lexer("12_34.e_00").lex()
+    result1 = create_lexer("12_34.f100").lex()
+    result2 = create_lexer("12_34e_00").lex()
 
     assert result0 == [
         Token("1234", TokenKind.DEC_INTEGER, 0, 4),
@@ -422,11 +452,11 @@ def test_lexer_tokenizes_valid_code_that_looks_like_dec_float_literal_successful
     ]
 
 
-def test_lexer_fails_with_consecutive_underscores_in_dec_float_literal():
-    lexer0 = Lexer("1_234.0__5")
-    lexer1 = Lexer(".111__0")
-    lexer2 = Lexer("1_23.e-4__5")
-    lexer3 = Lexer("1_23.100e-4__5")
+def test_lexer_fails_with_consecutive_underscores_in_dec_float_literal(create_lexer):
+    lexer0 = create_lexer("1_234.0__5")
+    lexer1 = create_lexer(".111__0")
+    lexer2 = create_lexer("1_23.e-4__5")
+    lexer3 = create_lexer("1_23.100e-4__5")
 
     with raises(LexerError) as exc_info0:
         lexer0.lex()
@@ -465,10 +495,10 @@ def test_lexer_fails_with_consecutive_underscores_in_dec_float_literal():
     )
 
 
-def test_lexer_fails_with_coefficient_literal_on_non_dec_numeric_literal():
-    lexer0 = Lexer("0b1_110f")
-    lexer1 = Lexer("0x1234fereef")
-    lexer2 = Lexer("0o23_347good")
+def test_lexer_fails_with_coefficient_literal_on_non_dec_numeric_literal(create_lexer):
+    lexer0 = create_lexer("0b1_110f")
+    lexer1 = create_lexer("0x1234fereef")
+    lexer2 = create_lexer("0o23_347good")
 
     with raises(LexerError) as exc_info0:
         lexer0.lex()
@@ -498,36 +528,36 @@ def test_lexer_fails_with_coefficient_literal_on_non_dec_numeric_literal():
     )
 
 
-def test_lexer_tokenizes_valid_dec_imaginary_literal_successfully():
-    result0 = Lexer("1_234.0_5im").lex()
-    result1 = Lexer("1_234im").lex()
+def test_lexer_tokenizes_valid_dec_imaginary_literal_successfully(create_lexer):
+    result0 = create_lexer("1_234.0_5im").lex()
+    result1 = create_lexer("1_234im").lex()
     assert result0 == [Token("1234.05", TokenKind.DEC_FLOAT_IMAG, 0, 10)]
     assert result1 == [Token("1234", TokenKind.DEC_INTEGER_IMAG, 0, 6)]
 
 
-def test_lexer_tokenizes_valid_operator_successfully():
-    result0 = Lexer("+").lex()
-    result1 = Lexer("-").lex()
-    result2 = Lexer("/").lex()
-    result3 = Lexer("*").lex()
-    result4 = Lexer("//").lex()
-    result5 = Lexer("%").lex()
-    result6 = Lexer("<<").lex()
-    result8 = Lexer(">>").lex()
-    result9 = Lexer("&").lex()
-    result10 = Lexer("|").lex()
-    result11 = Lexer("^").lex()
-    result12 = Lexer("~").lex()
-    result13 = Lexer("<").lex()
-    result14 = Lexer(">").lex()
-    result15 = Lexer("<=").lex()
-    result16 = Lexer(">=").lex()
-    result17 = Lexer("==").lex()
-    result18 = Lexer("!=").lex()
-    result19 = Lexer("||").lex()
-    result20 = Lexer("**").lex()
-    result21 = Lexer("²").lex()
-    result22 = Lexer("√").lex()
+def test_lexer_tokenizes_valid_operator_successfully(create_lexer):
+    result0 = create_lexer("+").lex()
+    result1 = create_lexer("-").lex()
+    result2 = create_lexer("/").lex()
+    result3 = create_lexer("*").lex()
+    result4 = create_lexer("//").lex()
+    result5 = create_lexer("%").lex()
+    result6 = create_lexer("<<").lex()
+    result8 = create_lexer(">>").lex()
+    result9 = create_lexer("&").lex()
+    result10 = create_lexer("|").lex()
+    result11 = create_lexer("^").lex()
+    result12 = create_lexer("~").lex()
+    result13 = create_lexer("<").lex()
+    result14 = create_lexer(">").lex()
+    result15 = create_lexer("<=").lex()
+    result16 = create_lexer(">=").lex()
+    result17 = create_lexer("==").lex()
+    result18 = create_lexer("!=").lex()
+    result19 = create_lexer("||").lex()
+    result20 = create_lexer("**").lex()
+    result21 = create_lexer("²").lex()
+    result22 = create_lexer("√").lex()
 
     assert result0 == [Token("+", TokenKind.OPERATOR, 0, 0)]
     assert result1 == [Token("-", TokenKind.OPERATOR, 0, 0)]
@@ -553,33 +583,33 @@ def test_lexer_tokenizes_valid_operator_successfully():
     assert result22 == [Token("√", TokenKind.OPERATOR, 0, 0)]
 
 
-def test_lexer_tokenizes_valid_delimiter_successfully():
-    result0 = Lexer("(").lex()
-    result1 = Lexer(")").lex()
-    result2 = Lexer("[").lex()
-    result3 = Lexer("]").lex()
-    result4 = Lexer("{").lex()
-    result5 = Lexer("}").lex()
-    result6 = Lexer(",").lex()
-    result8 = Lexer(":").lex()
-    result9 = Lexer(".").lex()
-    result10 = Lexer(";").lex()
-    result11 = Lexer("@").lex()
-    result12 = Lexer("=").lex()
-    result13 = Lexer("->").lex()
-    result14 = Lexer("+=").lex()
-    result15 = Lexer("-=").lex()
-    result16 = Lexer("*=").lex()
-    result17 = Lexer("/=").lex()
-    result18 = Lexer("//=").lex()
-    result19 = Lexer("%=").lex()
-    result20 = Lexer("@=").lex()
-    result21 = Lexer("&=").lex()
-    result22 = Lexer("|=").lex()
-    result23 = Lexer("^=").lex()
-    result24 = Lexer(">>=").lex()
-    result25 = Lexer("<<=").lex()
-    result26 = Lexer("||=").lex()
+def test_lexer_tokenizes_valid_delimiter_successfully(create_lexer):
+    result0 = create_lexer("(").lex()
+    result1 = create_lexer(")").lex()
+    result2 = create_lexer("[").lex()
+    result3 = create_lexer("]").lex()
+    result4 = create_lexer("{").lex()
+    result5 = create_lexer("}").lex()
+    result6 = create_lexer(",").lex()
+    result8 = create_lexer(":").lex()
+    result9 = create_lexer(".").lex()
+    result10 = create_lexer(";").lex()
+    result11 = create_lexer("@").lex()
+    result12 = create_lexer("=").lex()
+    result13 = create_lexer("->").lex()
+    result14 = create_lexer("+=").lex()
+    result15 = create_lexer("-=").lex()
+    result16 = create_lexer("*=").lex()
+    result17 = create_lexer("/=").lex()
+    result18 = create_lexer("//=").lex()
+    result19 = create_lexer("%=").lex()
+    result20 = create_lexer("@=").lex()
+    result21 = create_lexer("&=").lex()
+    result22 = create_lexer("|=").lex()
+    result23 = create_lexer("^=").lex()
+    result24 = create_lexer(">>=").lex()
+    result25 = create_lexer("<<=").lex()
+    result26 = create_lexer("||=").lex()
 
     assert result0 == [Token("(", TokenKind.DELIMITER, 0, 0)]
     assert result1 == [Token(")", TokenKind.DELIMITER, 0, 0)]
@@ -609,8 +639,8 @@ def test_lexer_tokenizes_valid_delimiter_successfully():
     assert result26 == [Token("||=", TokenKind.DELIMITER, 0, 2)]
 
 
-def test_lexer_fails_with_single_exclamation_mark():
-    lexer = Lexer('!')
+def test_lexer_fails_with_single_exclamation_mark(create_lexer):
+    lexer = create_lexer('!')
     with raises(LexerError) as exc_info:
         lexer.lex()
 
@@ -621,25 +651,25 @@ def test_lexer_fails_with_single_exclamation_mark():
     )
 
 
-def test_lexer_skips_comment():
-    result0 = Lexer("# hello world!\n").lex()
-    result1 = Lexer("# dhdgsdgjf,adtw%$#@5C%^@VY2;P'K9(").lex()
-    result2 = Lexer("#").lex()
+def test_lexer_skips_comment(create_lexer):
+    result0 = create_lexer("# hello world!\n").lex()
+    result1 = create_lexer("# dhdgsdgjf,adtw%$#@5C%^@VY2;P'K9(").lex()
+    result2 = create_lexer("#").lex()
 
     assert result0 == [Token("", TokenKind.NEWLINE, 1, -1)]
     assert result1 == []
     assert result2 == []
 
 
-def test_lexer_continues_on_valid_line_continuation():
-    result = Lexer(r"""\
+def test_lexer_continues_on_valid_line_continuation(create_lexer):
+    result = create_lexer(r"""\
     """).lex()
     assert result == []
 
 
-def test_lexer_fails_on_invalid_line_continuation():
-    lexer0 = Lexer(r"\    \n")
-    lexer1 = Lexer(r"\x")
+def test_lexer_fails_on_invalid_line_continuation(create_lexer):
+    lexer0 = create_lexer(r"\    \n")
+    lexer1 = create_lexer(r"\x")
 
     with raises(LexerError) as exc_info0:
         lexer0.lex()
@@ -660,8 +690,8 @@ def test_lexer_fails_on_invalid_line_continuation():
     )
 
 
-def test_lexer_tokenizes_keywords_successfully():
-    result = Lexer(
+def test_lexer_tokenizes_keywords_successfully(create_lexer):
+    result = create_lexer(
         "False None True and as assert async await break class continue def del elif else except "
         "finally for from global if import in is lambda nonlocal not or pass raise return try "
         "while with yield const ref ptr val match let var enum true false interface where macro "
@@ -721,21 +751,21 @@ def test_lexer_tokenizes_keywords_successfully():
     ]
 
 
-def test_lexer_tokenizes_valid_indentations_successfully():
+def test_lexer_tokenizes_valid_indentations_successfully(create_lexer):
     # Indentation with spaces
-    lexer0 = Lexer("name \n    age \n        gender")
+    lexer0 = create_lexer("name \n    age \n        gender")
     result0 = lexer0.lex()
 
     # Indentation with tabs
-    lexer1 = Lexer("name \n\t\tage \n\t\t\t\tgender\nhello")
+    lexer1 = create_lexer("name \n\t\tage \n\t\t\t\tgender\nhello")
     result1 = lexer1.lex()
 
     # Indentation in nested brackets
-    lexer2 = Lexer("name \n\t(age \n{\n\t\n\t\tgender\n} try)\n\thello")
+    lexer2 = create_lexer("name \n\t(age \n{\n\t\n\t\tgender\n} try)\n\thello")
     result2 = lexer2.lex()
 
     # Unmatched indentation for parentheses with block inside
-    lexer3 = Lexer(
+    lexer3 = create_lexer(
         "name (\r\n"
         "\t\tlambda:\n"
         "\t\t\t\tname, match (x, y): \t\n"
@@ -744,7 +774,7 @@ def test_lexer_tokenizes_valid_indentations_successfully():
     result3 = lexer3.lex()
 
     # Matched indentation for parentheses with block inside
-    lexer4 = Lexer(
+    lexer4 = create_lexer(
         "name (\n"
         " 1_000_234, lambda:\n"
         "   name, match (x, y): \t\r\n"
@@ -754,7 +784,7 @@ def test_lexer_tokenizes_valid_indentations_successfully():
     result4 = lexer4.lex()
 
     # Matched indentation for parentheses with block inside
-    lexer5 = Lexer(
+    lexer5 = create_lexer(
         "name (\n"
         "  1_000_234\n"
         "    lambda:\n"
@@ -767,7 +797,7 @@ def test_lexer_tokenizes_valid_indentations_successfully():
     result5 = lexer5.lex()
 
     # Unmatched indentation for parentheses with block inside, but not currently in block
-    lexer6 = Lexer(
+    lexer6 = create_lexer(
         "name (\n"
         "  lambda:\n"
         "    name, match (x, y): \n"
@@ -918,30 +948,30 @@ def test_lexer_tokenizes_valid_indentations_successfully():
     assert (lexer6.indent_factor, lexer6.indent_space_type) == (2, IndentSpaceKind.SPACE)
 
 
-def test_lexer_fails_on_invalid_indentation():
+def test_lexer_fails_on_invalid_indentation(create_lexer):
     # Mixed space types in indentation
-    lexer0 = Lexer(
+    lexer0 = create_lexer(
         "lambda *args:\n"
         "\t\t[1, 2, 3]\r\n"
         "\t\t  0x110"
     )
 
     # Wrong number of spaces in indent
-    lexer1 = Lexer(
+    lexer1 = create_lexer(
         "lambda *args:\n"
         "\t\t[1, 2, 3]\r\n"
         "\t\t\t0x110"
     )
 
     # Wrong number of spaces in dedent
-    lexer2 = Lexer(
+    lexer2 = create_lexer(
         "lambda *args:\n"
         "\t\t[1, 2, 3]\r\n"
         "\t0x110"
     )
 
     # Mixed space types in separate indentation
-    lexer3 = Lexer(
+    lexer3 = create_lexer(
         "lambda *args:\n"
         "\t\t[1, 2, 3]\r\n"
         "    0x110"
@@ -982,3 +1012,244 @@ def test_lexer_fails_on_invalid_indentation():
         2,
         3,
     )
+
+
+def test_lexer_iter_tokens_generates_same_tokens_as_lex():
+    code = "def foo(a, b):\n    return (2x + 5im) * 0x10\n\nfoo(1, 2)\n"
+    result = list(Lexer(code).iter_tokens())
+
+    assert result == Lexer(code).lex()
+
+
+def test_lexer_iter_tokens_generates_tokens_before_lexing_ends():
+    tokens = Lexer("hello world !").iter_tokens()
+
+    assert next(tokens) == Token("hello", TokenKind.IDENTIFIER, 0, 4)
+
+    with raises(LexerError) as exc_info:
+        next(tokens)
+
+    assert (exc_info.value.row, exc_info.value.column) == (0, 12)
+
+
+def test_lexer_create_selects_lexer_engine_from_compiler_options():
+    compiler_opts = CompilerOptions()
+    compiler_opts.lexer_engine = "regex"
+
+    assert type(Lexer.create("hello")) == Lexer
+    assert type(Lexer.create("hello", compiler_opts)) == RegexLexer
+
+
+def test_regex_lexer_generates_same_tokens_as_lexer():
+    codes = [
+        "def foo(a, b):\n    return (2x + 5im) * 0x10\n\nfoo(1, 2)\n",
+        "class Foo:\n\tx: int = 1_000.5e-2\n\tdef bar(self): pass # comment\n",
+        "a = [\n    1,\n    2,\n]\nb //= r'\\n' + f\"{a}\" + '''long\nstring'''\n",
+        "if a not in b and c is not d:\n  x->y\r\n  z <<= 0b101 | 0o17\n",
+    ]
+
+    for code in codes:
+        assert RegexLexer(code).lex() == Lexer(code).lex()
+
+
+def test_regex_lexer_reports_same_errors_as_lexer():
+    codes = ["hello world !", "a\n    b\n  c", "x = 0x", "a\n  b\n \tc"]
+
+    for code in codes:
+        with raises(LexerError) as exc_info0:
+            Lexer(code).lex()
+
+        with raises(LexerError) as exc_info1:
+            RegexLexer(code).lex()
+
+        error0, error1 = exc_info0.value, exc_info1.value
+        assert (error0.message, error0.row, error0.column) == (
+            error1.message,
+            error1.row,
+            error1.column,
+        )
+
+
+def test_lexer_lex_buffer_generates_same_tokens_as_lex():
+    code = "def foo(a, b):\n    return (2x + 5im) * 0x1_0\n\nfoo('a', \"\"\"b\r\nc\"\"\")\n"
+    result = Lexer(code).lex_buffer()
+
+    assert type(result) == TokenBuffer
+    assert list(result) == Lexer(code).lex()
+
+
+def test_token_buffer_slices_token_data_from_code():
+    code = "x = 'hello' + 2y"
+    result = Lexer(code).lex_buffer()
+
+    assert (result.starts[0], result.ends[0]) == (0, 1)
+    assert (result.starts[2], result.ends[2]) == (5, 10)
+    assert result.overrides == {5: "*"}
+    assert result[2] == Token("hello", TokenKind.STRING, 0, 10)
+    assert result[-1] == Token("y", TokenKind.IDENTIFIER, 0, 15)
+
+
+def test_incremental_lexer_generates_same_tokens_as_lexer_after_edits():
+    code = "def foo(a, b):\n    return (a +\n        b)\n\nfoo(1, 2)\nbar = 5\n"
+    lexer = IncrementalLexer(code)
+    lexer.lex()
+    edits = [(4, 3, "fooo"), (39, 0, "\n    x = 2"), (0, 0, "if a:\n"), (20, 9, ""), (9, 4, "")]
+
+    for offset, removed_length, inserted_text in edits:
+        code = code[:offset] + inserted_text + code[offset + removed_length :]
+        result = lexer.edit(offset, removed_length, inserted_text)
+
+        assert result == Lexer(code).lex()
+
+
+def test_incremental_lexer_reuses_tokens_after_edit():
+    code = "a = 1\nb = 2\nc = 3\n"
+    lexer = IncrementalLexer(code)
+    tokens = lexer.lex()
+    result = lexer.edit(10, 1, "22")
+
+    assert result == Lexer("a = 1\nb = 22\nc = 3\n").lex()
+    assert result[0] is tokens[0]
+    assert result[-1] is tokens[-1]
+
+
+def test_incremental_lexer_lexes_whole_code_after_lexer_error():
+    lexer = IncrementalLexer("a = 1\nb = 2\n")
+    lexer.lex()
+
+    with raises(LexerError):
+        lexer.edit(6, 0, "$")
+
+    result = lexer.edit(6, 1, "")
+
+    assert result == Lexer("a = 1\nb = 2\n").lex()
+
+
+def test_byte_lexer_generates_same_tokens_as_lexer_over_memory_mapped_file(tmp_path):
+    code = "def foo(a, b):\n    return 'héllo' + √a ² # ünïcode\n\nx = 1.5 + 2x\n"
+    file_path = tmp_path / "code.ra"
+    file_path.write_bytes(code.encode("utf-8"))
+
+    with open(file_path, mode="rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_code:
+            lexer = Lexer.create(mapped_code)
+            result = lexer.lex()
+
+    assert type(lexer) == ByteLexer
+    assert result == Lexer(code).lex()
+
+
+def test_byte_lexer_lex_buffer_records_byte_offsets():
+    code = "'é' + 'ü'\nb = 2"
+    result = ByteLexer(code.encode("utf-8")).lex_buffer()
+
+    assert list(result) == Lexer(code).lex()
+    assert (result.starts[0], result.ends[0]) == (1, 3)
+    assert (result.starts[2], result.ends[2]) == (8, 10)
+    assert (result.starts[4], result.ends[4]) == (12, 13)
+
+
+def test_byte_lexer_translates_line_endings_in_long_strings(tmp_path):
+    code = 'x = """a\r\nb\rc"""\r\ny = """\\t\r\nd""" + é\r\n'
+    file_path = tmp_path / "code.ra"
+    file_path.write_bytes(code.encode("utf-8"))
+
+    with open(file_path, encoding="utf-8") as f:
+        expected = Lexer(f.read()).lex()
+
+    result = ByteLexer(code.encode("utf-8")).lex_buffer()
+
+    assert result[2].data == "a\nb\nc"
+    assert list(result) == expected
+
+
+def test_lexer_tokenizes_unicode_identifiers_in_nfkc_form():
+    result = Lexer("ﬁx = café + 𝔘nit_٣").lex()
+
+    assert result == [
+        Token("fix", TokenKind.IDENTIFIER, 0, 1),
+        Token("=", TokenKind.DELIMITER, 0, 3),
+        Token("café", TokenKind.IDENTIFIER, 0, 8),
+        Token("+", TokenKind.OPERATOR, 0, 10),
+        Token("Unit_٣", TokenKind.IDENTIFIER, 0, 17),
+    ]
+
+    assert RegexLexer("ﬁx = café + 𝔘nit_٣").lex() == result
+    assert ByteLexer("ﬁx = café + 𝔘nit_٣".encode("utf-8")).lex() == result
+
+
+def test_parallel_lexer_gives_same_tokens_as_lexer(monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_CHUNK_LENGTH", 16)
+    code = (
+        "def foo(a):\n    return (a,\n2)\n\n"
+        "x = '''\ndef bar():\n'''\n"
+        "# comment (\n"
+        "class Foo:\n    def bar(self):\n        pass\n"
+        "y = [1,\n  2] + \\\n3\n"
+    ) * 4
+    lexer = ParallelLexer(code, jobs=2)
+
+    assert len(lexer.split()[0]) > 2
+    assert lexer.lex() == Lexer(code).lex()
+
+
+def test_parallel_lexer_raises_same_error_as_lexer(monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_CHUNK_LENGTH", 16)
+    code = "def foo():\n    pass\n\n" * 4 + "def bar():\n  pass\n"
+
+    with raises(LexerError) as error:
+        Lexer(code).lex()
+
+    with raises(LexerError) as parallel_error:
+        ParallelLexer(code, jobs=2).lex()
+
+    assert repr(parallel_error.value) == repr(error.value)
+
+
+def test_parallel_lexer_raises_error_of_token_that_spans_chunks_where_lexer_does(monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_CHUNK_LENGTH", 16)
+    code = "a = 1\nb = '''oops\n" + "x = 1\n" * 20
+
+    with raises(LexerError) as error:
+        Lexer(code).lex()
+
+    with raises(LexerError) as parallel_error:
+        ParallelLexer(code, jobs=2).lex()
+
+    assert error.value.row == 22
+    assert repr(parallel_error.value) == repr(error.value)
+
+
+def test_lexer_decodes_string_escape_sequences():
+    result = Lexer(r"'a\'b\n\x41\101é\N{BULLET}\q' r'a\'b\n' b'\xff\u00e9'").lex()
+
+    assert result == [
+        Token("a'b\nAAé•\\q", TokenKind.STRING, 0, 28),
+        Token("a\\'b\\n", TokenKind.PREFIXED_STRING, 0, 38),
+        Token("\xff\\u00e9", TokenKind.BYTE_STRING, 0, 52),
+    ]
+
+
+def test_lexer_reports_invalid_escape_sequence_position():
+    with raises(LexerError) as error:
+        Lexer('x = """\nab\\x4g"""').lex()
+
+    assert (error.value.message, error.value.row, error.value.column) == (
+        "Truncated \\xXX escape sequence",
+        1,
+        2,
+    )
+
+
+def test_lexer_interns_identifiers_into_shared_symbol_ids():
+    compiler_opts = CompilerOptions()
+    compiler_opts.interner = Interner()
+    code = "foo = bar + foo\nbar(foo)"
+    result = Lexer(code, compiler_opts).lex()
+    symbols = [token.symbol for token in result if token.kind == TokenKind.IDENTIFIER]
+
+    assert symbols == [0, 1, 0, 1, 0]
+    assert compiler_opts.interner.get_name(1) == "bar"
+    assert [token.symbol for token in Lexer(code, compiler_opts).lex_buffer()] == [
+        token.symbol for token in result
+    ]
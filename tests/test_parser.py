@@ -1,5 +1,14 @@
 from unittest.mock import MagicMock, Mock
+from pytest import raises
+from compiler.errors import LexerError
+from compiler.lexer import Lexer, TokenStream
 from compiler.parser import Parser
+from compiler.parser.parser import DEFAULT_UNMEMOIZED_RULES, RULE_NAMES
+from compiler.parser.generator import ParserGenerator
+from compiler.parser.incremental import reparse
+from compiler.parser import parallel
+from compiler.parser.parallel import ParallelParser, find_split_points
+from compiler.options import CompilerOptions
 from compiler.ast import (
     Null,
     Newline,
@@ -17,7 +26,7 @@ from compiler.ast import (
     IfExpr,
     FuncParam,
     FuncParams,
-    FuncExpr,
+    Function,
     TupleRestExpr,
     NamedTupleRestExpr,
     Comprehension,
@@ -25,12 +34,16 @@ from compiler.ast import (
 
 
 def test_parser_memoizes_parser_functions_results_successfully():
+    # Memoize all rules, not just the ones memoized by default
+    compiler_opts = CompilerOptions()
+    compiler_opts.unmemoized_rules = ()
+
     # Memoize if parser successful
-    parser0 = Parser.from_code("identifier")
+    parser0 = Parser.from_code("identifier", compiler_opts)
     result0 = parser0.identifier()
 
     assert result0 == Identifier(0)
-    assert parser0.cache == {-1: {"identifier": (Identifier(0), 0)}}
+    assert parser0.get_memoized_results() == {-1: {"identifier": (Identifier(0), 0)}}
 
     def parse(parser, *parsers, fn=None):
         """
@@ -67,10 +80,10 @@ def test_parser_memoizes_parser_functions_results_successfully():
         return func
 
     # Check to see if parser is memoizing subccesses and failures properly
-    parser1 = Parser.from_code("u'hello' .05im _wr2t4gdbeYFS")
+    parser1 = Parser.from_code("u'hello' .05im _wr2t4gdbeYFS", compiler_opts)
     parse(parser1, parser1.prefixed_string, parser1.imag_float, parser1.integer)()
 
-    assert parser1.cache == {
+    assert parser1.get_memoized_results() == {
         -1: {"prefixed_string": (PrefixedString(0), 0),},
         0: {"imag_float": (ImagFloat(1), 1),},
         1: {"integer": (None, 2)},
@@ -78,14 +91,14 @@ def test_parser_memoizes_parser_functions_results_successfully():
 
     parse(parser1, parser1.prefixed_string, parser1.imag_float, parser1.identifier)()
 
-    assert parser1.cache == {
+    assert parser1.get_memoized_results() == {
         -1: {"prefixed_string": (PrefixedString(0), 0),},
         0: {"imag_float": (ImagFloat(1), 1),},
         1: {"integer": (None, 2), "identifier": (Identifier(2), 2)},
     }
 
-    # Check to see if parser reuses cache instead of making repeated calls
-    parser2 = Parser.from_code("u'hello' .05im _wr2t4gdbeYFS")
+    # Check to see if parser reuses memoized results instead of making repeated calls
+    parser2 = Parser.from_code("u'hello' .05im _wr2t4gdbeYFS", compiler_opts)
     imag_float = MagicMock(return_value=ImagFloat(1), __name__="imag_float")
 
     # These functions are needed because the decorators have wrapper functions that take
@@ -107,6 +120,24 @@ def test_parser_memoizes_parser_functions_results_successfully():
     assert len(imag_float.mock_calls) == 1
 
 
+def test_parser_pulls_tokens_from_token_stream_lazily():
+    parser = Parser.from_code("hello world !")
+
+    assert parser.identifier() == Identifier(0)
+    assert parser.tokens == Lexer("hello").lex()
+
+    with raises(LexerError):
+        parser.identifier()
+
+
+def test_parser_parses_token_stream_and_token_list_the_same():
+    code = "def foo(a, b):\n    return a + b\n\nfoo(1, 2)\n"
+    result0 = Parser(Lexer(code).lex()).parse()
+    result1 = Parser(TokenStream(Lexer(code).iter_tokens())).parse()
+
+    assert result0 == result1
+
+
 def test_parser_backtracks_on_fail_successfully():
     parser0 = Parser.from_code("1hello")
     result0 = parser0.identifier()
@@ -510,3 +541,153 @@ def test_not_test_function_parses_not_test_successfully():
     #         UnaryExpr(Integer(10), Operator(9))
     #     )
     # )
+
+
+def test_parser_parses_token_buffer_and_token_list_the_same():
+    code = "def foo(a, b):\n    return a * (b + 2)\n\nfoo(1, 2)\n"
+    result0 = Parser(Lexer(code).lex()).parse()
+    result1 = Parser(Lexer(code).lex_buffer()).parse()
+
+    assert result0 == result1
+
+
+def test_parser_parses_whole_generated_benchmark_corpus():
+    from benchmarks.corpus import generate_program
+
+    code = generate_program(200, seed=1)
+    tokens = Lexer(code).lex()
+    parser = Parser(tokens)
+    parser.program()
+
+    assert code == generate_program(200, seed=1)
+    assert parser.cursor == len(tokens) - 1
+
+
+def test_parser_parses_program_larger_than_memo_budget():
+    from benchmarks.corpus import generate_program
+
+    code = generate_program(50, seed=1)
+    tokens = Lexer(code).lex()
+    compiler_opts = CompilerOptions()
+    compiler_opts.parser_memo_budget = 64
+
+    assert len(tokens) > compiler_opts.parser_memo_budget
+    assert Parser(tokens, compiler_opts).parse() == Parser(Lexer(code).lex()).program()
+
+
+def test_parser_cuts_memo_after_top_level_statements():
+    code = "a = 1\ndef f(x):\n    y = x\n    return y\nb = f(a)\n"
+    compiler_opts = CompilerOptions()
+    compiler_opts.parser_memo_budget = 0
+    compiler_opts.unmemoized_rules = ()
+    parser = Parser(Lexer(code).lex(), compiler_opts)
+    result = parser.program()
+
+    assert result == Parser(Lexer(code).lex()).program()
+
+    # Only the results from the last statement's trailing newline on are kept.
+    assert parser.memo_start == len(parser.tokens) - 1
+    assert min(parser.get_memoized_results()) == len(parser.tokens) - 2
+
+
+def test_parser_records_rule_stats_and_skips_unmemoized_rules():
+    compiler_opts = CompilerOptions()
+    compiler_opts.parser_stats = True
+    compiler_opts.unmemoized_rules = ("integer",)
+    parser = Parser(Lexer("x = 1\nx\n").lex(), compiler_opts)
+    parser.program()
+    rows = {row["rule"]: row for row in parser.stats.get_rows(RULE_NAMES)}
+
+    assert rows["integer"]["calls"] > 0
+    assert rows["integer"]["hits"] == rows["integer"]["misses"] == 0
+    assert rows["identifier"]["calls"] == rows["identifier"]["hits"] + rows["identifier"]["misses"]
+    assert rows["identifier"]["hits"] > 0
+    assert not any("integer" in results for results in parser.get_memoized_results().values())
+
+
+def test_parser_stats_only_suggest_unmemoizing_often_called_rules_of_default_profile():
+    compiler_opts = CompilerOptions()
+    compiler_opts.parser_stats = True
+    compiler_opts.unmemoized_rules = ()
+    parser = Parser(Lexer("def f(x):\n    return g(x) + 1\ny = f(2)\n").lex(), compiler_opts)
+    parser.parse()
+    stats = parser.stats
+    suggested_rules = stats.get_unprofitable_rules(RULE_NAMES, min_calls=0)
+
+    assert stats.get_unprofitable_rules(RULE_NAMES) == []
+    assert "atom_trailer" in suggested_rules
+    assert DEFAULT_UNMEMOIZED_RULES.issuperset(suggested_rules)
+    assert not {"parse", "program", "statements"}.intersection(suggested_rules)
+
+
+def test_parser_iter_statements_yields_statements_as_they_are_parsed():
+    code = "a = 1\n\ndef f(x):\n    return x\nf(a)\n)\n"
+    parser = Parser.from_code(code)
+    statements = parser.iter_statements()
+
+    assert next(statements) == Parser(Lexer("a = 1\n").lex()).program().statements[0]
+    assert len(parser.tokens) < len(Lexer(code).lex())
+    assert list(statements) == Parser(Lexer(code).lex()).program().statements[1:]
+
+
+def test_parser_only_tries_alternatives_that_can_start_with_next_token():
+    compiler_opts = CompilerOptions()
+    compiler_opts.parser_stats = True
+    parser = Parser(Lexer("while x:\n    pass\n").lex(), compiler_opts)
+    parser.program()
+    rows = {row["rule"]: row for row in parser.stats.get_rows(RULE_NAMES)}
+
+    assert rows["while_statement"]["calls"] == rows["pass_statement"]["calls"] == 1
+    assert "if_statement" not in rows
+    assert "assignment_statement" not in rows
+    assert "float" not in rows
+
+
+def test_parser_generator_generates_parser_functions_from_grammar():
+    generator = ParserGenerator(actions={"global_statement": ["Globals([{1}, *{2}])"]})
+    GeneratedParser = generator.create_parser(["global_statement"])
+    tokens = Lexer("global a, b, c\n").lex()
+
+    assert "TokenKind.IDENTIFIER" in generator.generate(["global_statement"])
+    assert GeneratedParser(tokens).global_statement() == Parser(tokens).global_statement()
+
+
+def test_parser_reparse_reuses_statements_the_edit_did_not_change():
+    old_tokens = Lexer("a = 1\ndef f(x):\n    return x\nb = f(a)\nc = b\n").lex()
+    new_tokens = Lexer("a = 1\ndef f(x, y):\n    return x\nb = f(a)\nc = b\n").lex()
+    parser = Parser(old_tokens)
+    program = parser.program()
+    first_statement, last_statement = program.statements[0], program.statements[-1]
+    result, statement_ends = reparse(program, parser.statement_ends, old_tokens, new_tokens)
+    new_parser = Parser(new_tokens)
+
+    assert result == new_parser.program()
+    assert statement_ends == new_parser.statement_ends
+    assert result.statements[0] is first_statement
+    assert result.statements[-1] is last_statement
+
+
+def test_parser_reparse_completes_statement_the_old_tokens_left_incomplete():
+    old_tokens = Lexer("a = 1\ny = (1 +\n").lex()
+    new_tokens = Lexer("a = 1\ny = (1 +\n2)\n").lex()
+    parser = Parser(old_tokens)
+    result = reparse(parser.program(), parser.statement_ends, old_tokens, new_tokens)[0]
+
+    assert result == Parser(new_tokens).program()
+
+
+def test_parallel_parser_gives_same_program_as_parser(monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_CHUNK_TOKENS", 8)
+    code = (
+        "@decorator\ndef foo(a):\n    return (a,\n2)\n"
+        "if a:\n    b = 1\nelse:\n    b = 2\n"
+        "class Foo:\n    def bar(self):\n        pass\n"
+        "x = [1,\n  2] + 3\n"
+    ) * 4
+    tokens = Lexer(code).lex()
+
+    parallel_parser, parser = ParallelParser(tokens, jobs=2), Parser(tokens)
+
+    assert len(find_split_points(tokens, 8)) > 2
+    assert parallel_parser.program() == parser.program()
+    assert parallel_parser.statement_ends == parser.statement_ends
@@ -0,0 +1,44 @@
+import io
+import json
+from compiler.lexer import Lexer
+from compiler.parser import Parser
+from compiler.options import CompilerOptions
+from compiler.serializer import JSONSerializer
+from compiler.semantic.semantic import SemanticAnalyzer, TokenExtractionVisitor
+
+
+def test_compilations_intern_symbols_separately_and_write_out_their_names():
+    code = "def f(a, b):\n    return a\n"
+    outputs = []
+
+    for _ in range(2):
+        compiler_opts = CompilerOptions()
+        tokens = Lexer(code, compiler_opts).lex()
+        program = Parser(tokens, compiler_opts).parse()
+        semantic_info = SemanticAnalyzer(program, tokens, compiler_opts).analyze()
+        output = io.StringIO()
+        JSONSerializer(output).write(semantic_info)
+        outputs.append(json.loads(output.getvalue()))
+
+    assert outputs[0] == outputs[1]
+    assert "interner" not in outputs[0]["compiler_opts"]
+    assert list(outputs[0]["symbols"][0]["typed"]) == ["__main__", "f"]
+    assert list(outputs[0]["symbols"][2]["typed"]) == ["a", "b"]
+
+
+def test_semantic_analyzer_names_symbols_of_tokens_lexed_with_default_options():
+    code = "class A:\n    pass\ndef f(x, y):\n    return x\n"
+    Lexer("def g(a, b, c):\n    return c\n").lex()
+    tokens = Lexer(code).lex()
+    semantic_info = SemanticAnalyzer(Parser(tokens).parse(), tokens).analyze()
+    symbols = semantic_info.get_named_symbols()
+
+    assert list(symbols[0].typed) == ["__main__", "f"]
+    assert list(symbols[2].typed) == ["x", "y"]
+
+
+def test_token_extraction_visitor_extracts_tokens_of_children_the_ast_accepts_visitors_on():
+    tokens = Lexer("def f(a, /, b):\n    return a.c + b\n").lex()
+    relevant_tokens = TokenExtractionVisitor(Parser(tokens).parse(), tokens).start_visit()
+
+    assert [token.data for token in relevant_tokens.values()] == ["f", "b", "+", "a", "b"]
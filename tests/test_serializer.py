@@ -0,0 +1,27 @@
+import io
+import json
+from compiler.lexer import Lexer
+from compiler.parser import Parser
+from compiler.serializer import JSONSerializer
+
+
+def test_json_serializer_writes_tokens_with_same_fields_for_every_kind():
+    tokens = Lexer("x = 'a'\n").lex()
+    output = io.StringIO()
+    JSONSerializer(output, "ndjson").write_iter(tokens)
+    written = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert written == [eval(repr(token)) for token in tokens]
+    assert all(list(token) == ["data", "kind", "row", "column"] for token in written)
+
+
+def test_json_serializer_writes_same_json_as_repr():
+    program = Parser(Lexer("def f(a, b=2):\n    return a + b\nx = f(1, b='é')\n").lex()).program()
+    indented, lines = io.StringIO(), io.StringIO()
+    JSONSerializer(indented).write(program)
+    JSONSerializer(lines, "ndjson").write(program)
+
+    assert indented.getvalue() == json.dumps(eval(repr(program)), indent=4) + "\n"
+    assert [json.loads(line) for line in lines.getvalue().splitlines()] == [
+        eval(repr(statement)) for statement in program.statements
+    ]
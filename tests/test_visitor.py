@@ -0,0 +1,41 @@
+from compiler.lexer import Lexer
+from compiler.parser import Parser
+from compiler.ast import BinaryExpr, Identifier, Operator
+from compiler.visitor import DispatchVisitor
+
+
+class NameCollector(DispatchVisitor):
+    def __init__(self):
+        self.events = []
+
+    def start_visit(self):
+        pass
+
+    def visit_Identifier(self, ast):
+        self.events.append(ast.index)
+
+    def visit_Function(self, ast):
+        self.events.append("function")
+        return False
+
+    def leave_BinaryExpr(self, ast):
+        self.events.append("binary")
+
+
+def test_dispatch_visitor_walks_deep_ast_without_recursion():
+    program = Parser(Lexer("a + b\ndef f(c):\n    d\n").lex()).program()
+    collector = NameCollector()
+    collector.walk(program)
+
+    assert collector.events == [0, 2, "binary", "function"]
+
+    expr = Identifier(0)
+
+    for index in range(1, 10000):
+        expr = BinaryExpr(expr, Operator(index), Identifier(index))
+
+    collector = NameCollector()
+    collector.walk(expr)
+
+    assert collector.events[:3] == [0, 1, "binary"]
+    assert len(collector.events) == 10000 + 9999
@@ -1,6 +1,10 @@
-import json
+import io
+from compiler.serializer import JSONSerializer
 
 def json_dumps(value):
-    value = eval(repr(value))
-    return json.dumps(value, indent=4)
-
+    """
+    Returns a value as indented JSON, written by `JSONSerializer`.
+    """
+    file = io.StringIO()
+    JSONSerializer(file).write(value)
+    return file.getvalue()[:-1]